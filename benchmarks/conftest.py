@@ -0,0 +1,40 @@
+"""Synthetic datasets for the benchmarks, see garmin_daily.synthetic."""
+
+from datetime import date
+from typing import Any
+
+import pytest
+
+from garmin_daily import DayResponses, GarminDaily
+from garmin_daily.garmin_aggregations import Activity, GarminDay
+from garmin_daily.synthetic import DatasetGenerator
+
+DATASET_DAYS = (1, 100, 10_000)
+FIRST_DAY = date(2000, 1, 1)
+SEED = 2000
+ACTIVITIES_PER_DAY = 2.0
+
+
+@pytest.fixture(scope="session", params=DATASET_DAYS, ids=lambda days: f"{days}d")
+def dataset(request) -> list[DayResponses]:
+    """Garmin responses for the days."""
+    generator = DatasetGenerator(seed=SEED, activities_per_day=ACTIVITIES_PER_DAY)
+    return list(generator.days(FIRST_DAY, request.param))
+
+
+@pytest.fixture(scope="session")
+def garmin_days(dataset) -> list[GarminDay]:
+    """Aggregated days."""
+    return [GarminDaily.aggregate(responses) for responses in dataset]
+
+
+@pytest.fixture(scope="session")
+def garmin_activities(dataset) -> list[dict[str, Any]]:
+    """Garmin activities of all the days."""
+    return [activity for responses in dataset for activity in responses.activities]
+
+
+@pytest.fixture(scope="session")
+def activities(garmin_activities) -> list[Activity]:
+    """Activities of all the days."""
+    return [Activity.init_from_garmin_activity(activity) for activity in garmin_activities]
@@ -0,0 +1,32 @@
+from garmin_daily import GarminDaily
+from garmin_daily.garmin_aggregations import Activity
+from garmin_daily.parallel import ParallelAggregator
+
+
+def test_init_from_garmin_activity(benchmark, garmin_activities):
+    result = benchmark(
+        lambda: [Activity.init_from_garmin_activity(activity) for activity in garmin_activities],
+    )
+    assert len(result) == len(garmin_activities)
+
+
+def test_detect_sport(benchmark, garmin_days, activities):
+    garmin_day = garmin_days[0]
+    result = benchmark(lambda: [garmin_day.detect_sport(activity) for activity in activities])
+    assert len(result) == len(activities)
+
+
+def test_aggregate_activities(benchmark, garmin_days):
+    result = benchmark(lambda: [garmin_day.aggregate_activities() for garmin_day in garmin_days])
+    assert all(result)
+
+
+def test_aggregate_day(benchmark, dataset):
+    result = benchmark(lambda: [GarminDaily.aggregate(responses) for responses in dataset])
+    assert len(result) == len(dataset)
+
+
+def test_parallel_aggregate_day(benchmark, dataset):
+    with ParallelAggregator() as aggregator:
+        result = benchmark(lambda: list(aggregator.map(dataset)))
+    assert len(result) == len(dataset)
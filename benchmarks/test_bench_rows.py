@@ -0,0 +1,87 @@
+import pytest
+
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper
+from garmin_daily.google_sheet import create_day_rows, localized_csv_raw
+from garmin_daily.mappers import ActivityMapper, LocationMapper
+from garmin_daily.number_formatter import NumberFormatter
+
+LOCATIONS = [
+    ("bike|cycling", "Park"),
+    ("ski", "Mountains"),
+    ("swim", "Pool"),
+    ("gym", "Fitness club"),
+    ("run", "Stadium"),
+]
+ACTIVITIES = [
+    ("yoga", "Stretching"),
+    ("ski", "Skiing"),
+    ("cycling", "Bike"),
+    ("walk", "Walking"),
+]
+HEADER = ["Date", "Location", "Sport", "Comment", "Unknown", *DEFAULT_HEADER[4:]]
+
+
+@pytest.fixture(scope="module")
+def location_mapper():
+    return LocationMapper(LOCATIONS)
+
+
+@pytest.fixture(scope="module")
+def activity_mapper():
+    return ActivityMapper(ACTIVITIES)
+
+
+def create_rows(garmin_days, location_mapper, activity_mapper):
+    # no gym days: create_day_rows() would add the gym activity to the same GarminDay each round
+    return [
+        create_day_rows(
+            daily=None,  # type: ignore[arg-type]
+            day=garmin_day.date,
+            gym_duration=30,
+            gym_days=[],
+            location_mapper=location_mapper,
+            activity_mapper=activity_mapper,
+            garmin_day=garmin_day,
+        )
+        for garmin_day in garmin_days
+    ]
+
+
+@pytest.fixture(scope="module")
+def day_rows(garmin_days, location_mapper, activity_mapper):
+    return [
+        row for rows in create_rows(garmin_days, location_mapper, activity_mapper) for row in rows
+    ]
+
+
+def test_create_day_rows(benchmark, garmin_days, location_mapper, activity_mapper):
+    result = benchmark(create_rows, garmin_days, location_mapper, activity_mapper)
+    assert len(result) == len(garmin_days)
+
+
+def test_columns_mapper_row(benchmark, day_rows):
+    columns = ColumnsMapper(HEADER)
+    result = benchmark(lambda: [columns.row(row) for row in day_rows])
+    assert len(result[0]) == len(HEADER)
+
+
+@pytest.mark.parametrize(
+    "formatter",
+    [NumberFormatter(), NumberFormatter(",", " ")],
+    ids=["point", "comma"],
+)
+def test_localized_csv_raw(benchmark, day_rows, formatter):
+    result = benchmark(lambda: [localized_csv_raw(list(row), formatter) for row in day_rows])
+    assert len(result) == len(day_rows)
+
+
+def test_location_mapper(benchmark, activities, location_mapper):
+    names = [activity.activity_type for activity in activities]
+    result = benchmark(lambda: [location_mapper.get_location(name, "Home") for name in names])
+    assert len(result) == len(names)
+
+
+def test_activity_mapper(benchmark, activities, activity_mapper):
+    names = [activity.activity_type for activity in activities]
+    result = benchmark(lambda: [activity_mapper.get_activity_name(name) for name in names])
+    assert len(result) == len(names)
@@ -45,6 +45,9 @@ setuptools.setup(
     package_dir={"": "src"},
     packages=setuptools.find_packages(where="src"),
     install_requires=requirements,
+    extras_require={
+        "parquet": ["pyarrow"],
+    },
     python_requires=">=3.9",  # Because of using `Annotated`
     keywords="Garmin Connect Health Google Sheets",
     classifiers=[
@@ -1,14 +1,24 @@
-"""Garmin data aggregated daily."""
+"""Garmin data aggregated daily.
 
-from garmin_daily.garmin_aggregations import (
-    SPORT_STEP_LENGTH_KM,
-    WALKING_SPORT,
-    Activity,
-    ActivityField,
-    AggFunc,
-    GarminDaily,
-    GarminDay,
-)
+The names are imported on first use, so the CLI does not import Garmin Connect client
+(and its HTTP stack) for `--version` or `--help`.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from garmin_daily.garmin_aggregations import (
+        SPORT_STEP_LENGTH_KM,
+        WALKING_SPORT,
+        Activity,
+        ActivityField,
+        AggFunc,
+        DayResponses,
+        GarminDaily,
+        GarminDay,
+        ReplayApi,
+    )
 
 __all__ = [
     "GarminDaily",
@@ -16,6 +26,17 @@ __all__ = [
     "Activity",
     "ActivityField",
     "AggFunc",
+    "DayResponses",
+    "ReplayApi",
     "WALKING_SPORT",
     "SPORT_STEP_LENGTH_KM",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the names from `garmin_aggregations` on first use."""
+    if name in __all__:
+        value = getattr(import_module("garmin_daily.garmin_aggregations"), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,166 @@
+"""Sync several Garmin accounts in one process, see `--accounts` option.
+
+Each account has its own Garmin session, sheet or output file and local store,
+and the Garmin requests pauses are per account, so the accounts are synced concurrently.
+The Google Sheets client and the mapping rules are shared.
+"""
+
+import configparser
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import gspread
+
+from garmin_daily import GarminDaily
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper
+from garmin_daily.day_store import DayStore
+from garmin_daily.google_sheet import (
+    GoogleSheetSink,
+    add_rows_from_garmin,
+    days_to_add_after,
+    detect_days_to_add,
+    open_google_sheet,
+)
+from garmin_daily.mappers import MappingRules
+from garmin_daily.pipeline import StageStats
+from garmin_daily.sinks import Sink, open_sink
+
+
+@dataclass
+class Account:
+    """Garmin account and where to add its days."""
+
+    name: str
+    email: str
+    password: str
+    sheet: str | None = None
+    output: Path | None = None
+
+
+@dataclass
+class SyncOptions:
+    """Options shared by the accounts."""
+
+    gym_days: list[int]
+    gym_duration: int
+    rules: MappingRules
+    max_days: int  # refuse to add more days without `force`, also the days for a new file
+    force: bool = False
+    store: bool = True
+
+
+def load_accounts(path: Path) -> list[Account]:
+    """Accounts from the INI file, a section per account.
+
+    The section has `email`, `password` (or `password_env` with the password env var name)
+    and `sheet` (Google Sheet name) or `output` (file, see `--output`).
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        with path.open(encoding="utf8") as accounts_file:
+            parser.read_file(accounts_file)
+    except (OSError, configparser.Error) as exc:
+        raise ValueError(f"Cannot read accounts file '{path}': {exc}") from exc
+    accounts = []
+    for name in parser.sections():
+        section = parser[name]
+        password = section.get("password")
+        if password_env := section.get("password_env"):
+            password = os.getenv(password_env)
+            if not password:
+                raise ValueError(f"Account '{name}': env var `{password_env}` is not set")
+        if not section.get("email") or not password:
+            raise ValueError(f"Account '{name}' needs email and password (or password_env)")
+        if ("sheet" in section) == ("output" in section):
+            raise ValueError(f"Account '{name}' needs sheet or output, one of them")
+        accounts.append(
+            Account(
+                name=name,
+                email=section["email"],
+                password=password,
+                sheet=section.get("sheet"),
+                output=Path(section["output"]).expanduser() if "output" in section else None,
+            ),
+        )
+    if not accounts:
+        raise ValueError(f"No accounts in '{path}'")
+    return accounts
+
+
+def sync_account(
+    account: Account,
+    options: SyncOptions,
+    gspread_client: gspread.Client | None = None,
+) -> list[StageStats]:
+    """Add new days of the account.
+
+    Sheet and file problems are raised as ValueError with the cause, see `sync_accounts`.
+    """
+    daily = GarminDaily(account.email, account.password)
+    daily.login()
+    sink: Sink
+    first_row: list[Any] = []
+    if account.output is not None:
+        sink = open_sink(account.output, ColumnsMapper(DEFAULT_HEADER), DEFAULT_HEADER)
+    else:
+        assert account.sheet is not None
+        fitness, columns, first_row = open_google_sheet(account.sheet, gspread_client)
+        sink = GoogleSheetSink(fitness, columns)
+    with sink:
+        if isinstance(sink, GoogleSheetSink):
+            start_date, days_to_add = detect_days_to_add(
+                sink.fitness,
+                sink.columns,
+                first_row=first_row,
+            )
+        else:
+            last_date = sink.last_date()
+            if last_date is None:  # new file
+                last_date = datetime.now().date() - timedelta(days=options.max_days + 1)
+            start_date, days_to_add = days_to_add_after(last_date)
+        if days_to_add > options.max_days and not options.force:
+            raise ValueError(f"Too many days to add ({days_to_add}), use --force to confirm")
+        if not days_to_add:
+            return []
+        store = DayStore(account.email) if options.store else None
+        try:
+            return add_rows_from_garmin(
+                fitness=None,
+                columns=sink.columns,
+                start_date=start_date,
+                days_to_add=days_to_add,
+                gym_days=options.gym_days,
+                gym_duration=options.gym_duration,
+                location_mapper=options.rules.location_mapper,
+                activity_mapper=options.rules.activity_mapper,
+                sink=sink,
+                daily=daily,
+                store=store,
+            )
+        finally:
+            daily.close()  # the activities index opened by the sync
+            if store is not None:
+                store.close()
+
+
+def sync_accounts(
+    accounts: list[Account],
+    options: SyncOptions,
+) -> dict[str, BaseException | None]:
+    """Sync the accounts concurrently, one failed account does not stop the others.
+
+    Returns the account errors by the account name, None if synced.
+    """
+    gspread_client = (
+        gspread.service_account() if any(account.sheet for account in accounts) else None
+    )
+    with ThreadPoolExecutor(len(accounts), thread_name_prefix="account") as pool:
+        futures = {
+            account.name: pool.submit(sync_account, account, options, gspread_client)
+            for account in accounts
+        }
+    return {name: future.exception() for name, future in futures.items()}
@@ -0,0 +1,182 @@
+"""Seen Garmin activities, so recent days activities are synced incrementally.
+
+Garmin lists the account activities newest first. We page through the list only
+till the first activity we already have unchanged, so a sync of the recent days
+is usually one small request instead of an activities request per day.
+Activities changed, deleted or uploaded late behind the first unchanged one are not detected,
+except for the days we page through completely (the days we add), see `ActivityIndex.sync`.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections.abc import Callable
+from datetime import date, timedelta
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from garmin_daily.cache import cache_dir
+
+INDEX_FILE = "activities.sqlite"  # in cache_dir()
+PAGE_SIZE = 20  # activities in one request, usually more than a day has
+
+
+def fingerprint(activity: dict[str, Any]) -> str:
+    """Digest of the activity fields, changes if the activity was edited."""
+    data = json.dumps(activity, sort_keys=True, default=str).encode("utf8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def activity_day(activity: dict[str, Any]) -> date:
+    """Local day of the activity."""
+    return date.fromisoformat(activity["startTimeLocal"][:10])
+
+
+class ActivityIndex:
+    """Activities of the account by `activityId` with their fingerprints, in SQLite."""
+
+    def __init__(self, account: str, path: Path | None = None) -> None:
+        """Open (create if not exists) the index, `account` separates accounts activities."""
+        self.account = account
+        self.path = path or cache_dir() / INDEX_FILE
+        self.db = sqlite3.connect(self.path, check_same_thread=False)  # read from pipeline thread
+        self.lock = threading.Lock()
+        self.synced_since: date | None = None  # the days the index is synced for in this run
+        with self.lock, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS activities (account TEXT, id INTEGER, day TEXT, "
+                "fingerprint TEXT, data TEXT, PRIMARY KEY (account, id))",
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS activities_day ON activities (account, day)",
+            )
+            self.db.execute(  # the first day the activities were fully synced from
+                "CREATE TABLE IF NOT EXISTS synced (account TEXT PRIMARY KEY, first_day TEXT)",
+            )
+
+    def sync(
+        self,
+        get_page: Callable[[int, int], list[dict[str, Any]]],
+        first_day: date,
+        complete_from: date | None = None,
+    ) -> set[date]:
+        """Get new and changed activities from `first_day` with `get_page(start, limit)`.
+
+        Pages newest first till the activity before `first_day`, or till the first known
+        unchanged activity if the index was synced from `first_day` before.
+        We do not stop on the known activities of the days from `complete_from`.
+        The activities of the days we paged through completely but did not see
+        were deleted in Garmin Connect, so we drop them.
+        Returns the days that gained, changed or lost activities.
+        """
+        stop_on_known = (synced := self.synced_from()) is not None and synced <= first_day
+        changed: set[date] = set()
+        seen: set[int] = set()
+        paged_from = first_day  # the days we see all the activities of
+        start = 0
+        done = False
+        while not done:
+            page = get_page(start, PAGE_SIZE)
+            done = len(page) < PAGE_SIZE  # the oldest activities
+            for activity in page:
+                day = activity_day(activity)
+                if day < first_day:
+                    done = True
+                    break
+                seen.add(activity["activityId"])
+                if self.put(activity):
+                    changed.add(day)
+                elif stop_on_known and (complete_from is None or day < complete_from):
+                    paged_from = day + timedelta(days=1)
+                    done = True
+                    break
+            start += len(page)
+        changed |= self.drop_unseen(paged_from, seen)
+        if synced is None or first_day < synced:
+            with self.lock, self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO synced VALUES (?, ?)",
+                    (self.account, first_day.isoformat()),
+                )
+        self.synced_since = first_day
+        return changed
+
+    def drop_unseen(self, first_day: date, seen: set[int]) -> set[date]:
+        """Drop the activities from `first_day` which are not `seen`, returns their days."""
+        with self.lock, self.db:
+            rows = self.db.execute(
+                "SELECT id, day FROM activities WHERE account = ? AND day >= ?",
+                (self.account, first_day.isoformat()),
+            ).fetchall()
+            deleted = [(activity_id, day) for activity_id, day in rows if activity_id not in seen]
+            self.db.executemany(
+                "DELETE FROM activities WHERE account = ? AND id = ?",
+                [(self.account, activity_id) for activity_id, _ in deleted],
+            )
+        return {date.fromisoformat(day) for _, day in deleted}
+
+    def synced_from(self) -> date | None:
+        """The first day the activities were synced from, None if never synced."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT first_day FROM synced WHERE account = ?",
+                (self.account,),
+            ).fetchone()
+        return None if row is None else date.fromisoformat(row[0])
+
+    def put(self, activity: dict[str, Any]) -> bool:
+        """Add or update the activity, False if we have it unchanged."""
+        digest = fingerprint(activity)
+        with self.lock, self.db:
+            row = self.db.execute(
+                "SELECT fingerprint FROM activities WHERE account = ? AND id = ?",
+                (self.account, activity["activityId"]),
+            ).fetchone()
+            if row is not None and row[0] == digest:
+                return False
+            self.db.execute(
+                "INSERT OR REPLACE INTO activities VALUES (?, ?, ?, ?, ?)",
+                (
+                    self.account,
+                    activity["activityId"],
+                    activity_day(activity).isoformat(),
+                    digest,
+                    json.dumps(activity),
+                ),
+            )
+        return True
+
+    def covers(self, day: date) -> bool:
+        """The day activities are synced in this run."""
+        return self.synced_since is not None and day >= self.synced_since
+
+    def activities(self, day: date) -> list[dict[str, Any]]:
+        """The day activities in the start time order."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT data FROM activities WHERE account = ? AND day = ?",
+                (self.account, day.isoformat()),
+            ).fetchall()
+        return sorted(
+            (json.loads(data) for (data,) in rows),
+            key=lambda activity: activity["startTimeLocal"],
+        )
+
+    def close(self) -> None:
+        """Close DB."""
+        self.db.close()
+
+    def __enter__(self) -> "ActivityIndex":
+        """Context manager to close the index."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the index."""
+        self.close()
@@ -0,0 +1,135 @@
+"""Historical mode: add long dates range fast, see `--since` and `--until` options."""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from garmin_daily import DayResponses, GarminDaily
+from garmin_daily.day_store import DayStore
+from garmin_daily.garmin_aggregations import call_endpoint
+from garmin_daily.rate_limit import REQUESTS_PER_MINUTE, HostRateLimiter, host_rate_limiter
+
+RANGE_DAYS = 28  # Garmin limit for dates range requests, also days in one bulk write
+DAY_REQUESTS = 4  # steps, heart rates, sleep and training status have no range requests
+REQUEST_TIME = 0.5  # seconds, typical Garmin request for the estimate
+WRITE_TIME = 2.0  # seconds, typical bulk write for the estimate
+SETTLED_DAYS = 3  # Garmin could get the watch data for recent days later, so we request them
+
+
+def settled_days(store: DayStore | None, first_day: date, last_day: date) -> set[date]:
+    """Days with stored Garmin responses we do not request again, see SETTLED_DAYS."""
+    if store is None:
+        return set()
+    last_day = min(last_day, datetime.now().date() - timedelta(days=SETTLED_DAYS))
+    return store.response_days(first_day, last_day)
+
+
+class RangeFetcher:
+    """Get the days from Garmin using dates range requests where Garmin has them.
+
+    Activities for `RANGE_DAYS` days come with one request, other data is requested per day
+    (Garmin has no range requests with the intraday data).
+    Settled days with the Garmin responses in the local `store` are not requested
+    (add_rows_from_garmin stores the requested days).
+    The requests are paced by the host requests budget instead of the pauses
+    add_rows_from_garmin makes, with REQUESTS_PER_MINUTE if GARMIN_DAILY_RATE_LIMIT is not set,
+    so a long import does not trip Garmin robot protection.
+    """
+
+    def __init__(
+        self,
+        daily: GarminDaily,
+        last_day: date,
+        store: DayStore | None = None,
+    ) -> None:
+        """Init, `last_day` is the range end to not request activities after it."""
+        self.daily = daily
+        self.last_day = last_day
+        self.store = store
+        self.limiter = host_rate_limiter(default=REQUESTS_PER_MINUTE)
+        self.activities: dict[str, list[dict[str, Any]]] = {}
+        self.activities_till: date | None = None  # last day of the requested activities
+        self.fetched = 0  # days requested from Garmin
+        self.requests = 0
+
+    def __call__(self, day: date) -> DayResponses:
+        """Get the day from the local store or Garmin."""
+        if day in settled_days(self.store, day, day):
+            assert self.store is not None
+            return next(self.store.responses(day, day))
+        if self.activities_till is None or day > self.activities_till:
+            self.fetch_activities(day)
+        responses = DayResponses.fetch(
+            self.daily.api,
+            day,
+            activities=self.activities.pop(day.isoformat(), []),
+            limiter=self.limiter,
+        )
+        self.fetched += 1
+        self.requests += DAY_REQUESTS
+        return responses
+
+    def fetch_activities(self, first_day: date) -> None:
+        """Request activities for `RANGE_DAYS` days from `first_day` and group them by day."""
+        last_day = min(first_day + timedelta(days=RANGE_DAYS - 1), self.last_day)
+        activities = call_endpoint(
+            self.daily.api,
+            "get_activities_by_date",
+            first_day.isoformat(),
+            last_day.isoformat(),
+            "",
+            limiter=self.limiter,
+        )
+        self.activities = defaultdict(list)
+        for activity in activities:
+            self.activities[activity["startTimeLocal"][:10]].append(activity)
+        self.activities_till = last_day
+        self.requests += 1
+
+
+@dataclass
+class BackfillEstimate:
+    """Expected cost of the historical mode run."""
+
+    days: int
+    cached: int
+    requests: int  # Garmin API requests
+    writes: int
+    seconds: float
+
+    def __str__(self) -> str:
+        """Show the estimate."""
+        return (
+            f"{self.days} days ({self.cached} cached): "
+            f"about {self.requests} Garmin API requests and {self.writes} writes, "
+            f"estimated time {timedelta(seconds=round(self.seconds))}"
+        )
+
+
+def estimate_backfill(
+    first_day: date,
+    days: int,
+    store: DayStore | None = None,
+    limiter: HostRateLimiter | None = None,
+) -> BackfillEstimate:
+    """Estimate requests and time to add `days` days from `first_day` with RangeFetcher.
+
+    With the `limiter` the requests after its burst take at least its interval each,
+    the budget is supposed to be not spent by other runs.
+    """
+    cached = len(settled_days(store, first_day, first_day + timedelta(days=days - 1)))
+    ranges = math.ceil((days - cached) / RANGE_DAYS)
+    requests = (days - cached) * DAY_REQUESTS + ranges
+    requests_time = requests * REQUEST_TIME
+    if limiter is not None:
+        requests_time = max(requests_time, (requests - limiter.burst) * limiter.interval)
+    writes = math.ceil(days / RANGE_DAYS)
+    return BackfillEstimate(
+        days=days,
+        cached=cached,
+        requests=requests,
+        writes=writes,
+        seconds=requests_time + writes * WRITE_TIME,
+    )
@@ -0,0 +1,19 @@
+"""Local cache location."""
+
+import os
+from pathlib import Path
+
+CACHE_DIR_ENV = "GARMIN_DAILY_CACHE"
+
+
+def cache_dir() -> Path:
+    """Directory for garmin-daily local data, created if not exists.
+
+    `GARMIN_DAILY_CACHE` env var or `garmin-daily` in `XDG_CACHE_HOME` (`~/.cache` by default).
+    """
+    if path := os.getenv(CACHE_DIR_ENV):
+        result = Path(path)
+    else:
+        result = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "garmin-daily"
+    result.mkdir(parents=True, exist_ok=True)
+    return result
@@ -1,6 +1,13 @@
 """Map fields to columns using spreadsheet header row."""
 
+from collections.abc import Callable, Sequence
+from datetime import date
 from enum import Enum, IntEnum
+from operator import itemgetter
+from typing import Any
+
+LETTERS_NUM = 26
+WEEKS_START = date(2013, 1, 13)  # see week_num()
 
 
 class GarminCol(IntEnum):
@@ -14,7 +21,7 @@ class GarminCol(IntEnum):
         SPORT,  # detected from Garmin activity type - see GarminDay.detect_sport()
         DURATION,  # in minutes
         COMMENT,  # HR and speed details for sport activities / HR and sleep details for Walking
-        WEEK,  # see google_sheet:week_num()
+        WEEK,  # see week_num()
         HOURS,  # duration in hours
         WEEKDAY,  # 1 - Monday
         HR_REST,  # Rest heart rate
@@ -40,9 +47,33 @@ COLUMNS_MAP: dict[str, Enum] = {
     "vo2 max": GarminCol.VO2_MAX,
 }
 
+# header for outputs without own header, like files: the first name for each column
+DEFAULT_HEADER = [
+    next(name for name, col in COLUMNS_MAP.items() if col == column) for column in GarminCol
+]
+
+
+def week_num(day: date) -> int:
+    """Week number for the sheet (starting from some arbitrary date)."""
+    return int(round((day - WEEKS_START).days / 7))
+
+
+def column_letter(idx: int) -> str:
+    """Spreadsheet column letters for the index (starting from 0): A, ..., Z, AA, AB, ..."""
+    letters = ""
+    idx += 1
+    while idx:
+        idx, remainder = divmod(idx - 1, LETTERS_NUM)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
 
 class ColumnsMapper:
-    """Map columns based on a spreadsheet header row."""
+    """Map columns based on a spreadsheet header row.
+
+    The header is compiled into a positional row template, so `row()` builds sheet rows
+    from values ordered as `columns_type` without intermediate dicts.
+    """
 
     def __init__(
         self,
@@ -54,15 +85,33 @@ class ColumnsMapper:
         self.columns_map = COLUMNS_MAP if columns_map is None else columns_map
         self.columns_type = columns_type
         self.column_refs = {
-            self.header_to_col(name): chr(ord("A") + idx) for idx, name in enumerate(header_row)
+            self.header_to_col(name): column_letter(idx) for idx, name in enumerate(header_row)
         }
         self.column_idxs = {self.header_to_col(name): idx for idx, name in enumerate(header_row)}
         self.row_columns = self.fill_row_columns(header_row)
+        self.row_template = self.compile_row_template()
+        self._row_getter = self.compile_row_getter(self.row_template)
 
     def fill_row_columns(self, header_row: list[str]) -> list[Enum | None]:
         """Fill list with columns as they listed in the spreadsheet header row."""
         return [self.header_to_col(header) for header in header_row]
 
+    def compile_row_template(self) -> list[int]:
+        """For each sheet column the position of its value in the `row()` values.
+
+        Unknown columns point to the empty value after the last `columns_type` value.
+        """
+        positions = {column: pos for pos, column in enumerate(self.columns_type)}
+        empty_pos = len(positions)
+        return [empty_pos if column is None else positions[column] for column in self.row_columns]
+
+    @staticmethod
+    def compile_row_getter(template: list[int]) -> Callable[[Sequence[Any]], tuple[Any, ...]]:
+        """Getter of the `template` positions, always returns tuple."""
+        if len(template) > 1:
+            return itemgetter(*template)
+        return lambda values: tuple(values[pos] for pos in template)
+
     def header_to_col(self, header: str) -> Enum | None:
         """Return column ID for the header.
 
@@ -73,12 +122,12 @@ class ColumnsMapper:
             return self.columns_map[header_canonical]
         return None
 
-    def map(self, fields: dict[Enum, str | int | float | None]) -> list[str | int | float | None]:
-        """Map fields to spreadsheet row.
+    def row(self, values: Sequence[Any]) -> list[Any]:
+        """Map values ordered as `columns_type` to spreadsheet row.
 
         Unknown columns are filled with empty strings.
         """
-        return [fields.get(column, "") if column is not None else "" for column in self.row_columns]
+        return list(self._row_getter((*values, "")))
 
     def _raise_missing_column_error(self, column: Enum) -> None:
         """Raise a detailed error for missing column."""
@@ -0,0 +1,132 @@
+"""Long-running mode: sync on schedule keeping Garmin session and the sheet open."""
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from datetime import time as day_time
+
+DEFAULT_SYNC_TIME = "00:30"  # after midnight, with time for Garmin to settle the previous day
+TOKEN_REFRESH_INTERVAL = 10 * 60  # seconds between Garmin session checks
+
+
+def parse_sync_time(value: str) -> day_time:
+    """Parse `HH:MM` local time of the day."""
+    try:
+        return datetime.strptime(value.strip(), "%H:%M").time()
+    except ValueError as exc:
+        raise ValueError(f"Wrong sync time '{value}', expected HH:MM like 00:30.") from exc
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Local times of the day to sync."""
+
+    times: tuple[day_time, ...]
+
+    def next_run(self, now: datetime) -> datetime:
+        """The first scheduled time after `now`."""
+        candidates = [
+            datetime.combine(now.date() + timedelta(days=days), sync_time)
+            for days in (0, 1)
+            for sync_time in self.times
+        ]
+        return min(candidate for candidate in candidates if candidate > now)
+
+
+@dataclass
+class CycleMetrics:
+    """One sync cycle result."""
+
+    started: datetime
+    duration: float = 0.0  # seconds
+    days_added: int = 0
+    rows_written: int = 0
+    stages: list[str] = field(default_factory=list)  # stages timing
+    error: str | None = None
+
+    def __str__(self) -> str:
+        """Log line."""
+        result = (
+            f"Sync {self.started:%Y-%m-%d %H:%M:%S}: {self.duration:.1f}s, "
+            f"{self.days_added} days, {self.rows_written} rows"
+        )
+        if self.stages:
+            result += f" ({', '.join(self.stages)})"
+        if self.error:
+            result += f", error: {self.error}"
+        return result
+
+
+class Daemon:
+    """Run `sync` on the schedule, and `refresh` the Garmin session in background.
+
+    `sync` fills `CycleMetrics` for the cycle.
+    A failed cycle is logged and the daemon waits for the next scheduled time.
+    Sync and refresh never run at the same time, so they can share the Garmin session.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        sync: Callable[[CycleMetrics], None],
+        schedule: Schedule,
+        refresh: Callable[[], None] | None = None,
+        refresh_interval: float = TOKEN_REFRESH_INTERVAL,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        """Init."""
+        self.sync = sync
+        self.schedule = schedule
+        self.refresh = refresh
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()  # sync or refresh
+        self.cycles: list[CycleMetrics] = []
+
+    def run(self, max_cycles: int | None = None) -> None:
+        """Sync on schedule till `stop()` or `max_cycles` syncs."""
+        refresher = None
+        if self.refresh is not None:
+            refresher = threading.Thread(target=self._refresh_loop, name="garmin-refresh")
+            refresher.daemon = True
+            refresher.start()
+        try:
+            while max_cycles is None or len(self.cycles) < max_cycles:
+                next_run = self.schedule.next_run(self.clock())
+                print(f"Next sync at {next_run:%Y-%m-%d %H:%M}")
+                if self.stop_event.wait(max((next_run - self.clock()).total_seconds(), 0)):
+                    break
+                self.cycles.append(self.run_cycle())
+        finally:
+            self.stop_event.set()
+            if refresher is not None:
+                refresher.join()
+
+    def run_cycle(self) -> CycleMetrics:
+        """Sync once and log the cycle metrics."""
+        metrics = CycleMetrics(started=self.clock())
+        started = time.perf_counter()
+        with self.lock:
+            try:
+                self.sync(metrics)
+            except Exception as exc:  # noqa: BLE001
+                metrics.error = str(exc)
+        metrics.duration = time.perf_counter() - started
+        print(metrics)
+        return metrics
+
+    def stop(self) -> None:
+        """Stop after the current cycle."""
+        self.stop_event.set()
+
+    def _refresh_loop(self) -> None:
+        """Keep the Garmin session alive between the syncs."""
+        assert self.refresh is not None
+        while not self.stop_event.wait(self.refresh_interval):
+            with self.lock:
+                try:
+                    self.refresh()
+                except Exception as exc:  # noqa: BLE001
+                    print(f"Garmin session refresh failed: {exc}")
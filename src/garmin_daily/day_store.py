@@ -0,0 +1,191 @@
+"""Local SQLite store of the aggregated days, see `--store` option.
+
+The store keeps every number GarminDay computes, its aggregated activities,
+and the raw Garmin responses of the day. So a sheet can be rebuilt or the days
+re-aggregated with changed rules from the local data, without Garmin requests.
+The day intraday heart rates are also archived in hr_archive for fast analyses.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections.abc import Iterator
+from dataclasses import fields
+from datetime import date
+from pathlib import Path
+from types import TracebackType, UnionType
+from typing import Any, Union, get_args, get_origin, get_type_hints
+from urllib.parse import quote
+
+from garmin_daily.cache import cache_dir
+from garmin_daily.garmin_aggregations import Activity, DayResponses, GarminDaily, GarminDay
+from garmin_daily.hr_archive import HR_ARCHIVE_DIR, HeartRateArchive
+
+STORE_FILE = "days.sqlite"  # in the account folder, see store_path()
+STORES_DIR = "stores"  # in cache_dir(), a folder per Garmin account
+
+DAY_FIELDS = {  # GarminDay attributes
+    "total_steps": "INTEGER",
+    "hr_min": "INTEGER",
+    "hr_max": "INTEGER",
+    "hr_average": "INTEGER",
+    "hr_rest": "INTEGER",
+    "sleep_time": "REAL",
+    "sleep_deep_time": "REAL",
+    "sleep_light_time": "REAL",
+    "sleep_rem_time": "REAL",
+    "vo2max": "REAL",
+}
+SQL_TYPES = {int: "INTEGER", float: "REAL", str: "TEXT"}
+
+
+def sql_type(hint: Any) -> str:
+    """SQLite column type for the `Activity` field type hint."""
+    types_ = set(get_args(hint)) if get_origin(hint) in (Union, UnionType) else {hint}
+    types_.discard(type(None))
+    if float in types_:
+        return "REAL"
+    return next((SQL_TYPES[type_] for type_ in types_ if type_ in SQL_TYPES), "TEXT")
+
+
+ACTIVITY_FIELDS = {
+    field.name: sql_type(get_type_hints(Activity)[field.name]) for field in fields(Activity)
+}
+
+
+def store_path(account: str | None = None) -> Path:
+    """Store file of the Garmin account (email), by default from `GARMIN_EMAIL` env var.
+
+    Each account has its own folder, so the accounts days and heart rates are not mixed.
+    """
+    account = account or os.getenv("GARMIN_EMAIL") or ""
+    return cache_dir() / STORES_DIR / (quote(account, safe="@") or "default") / STORE_FILE
+
+
+class DayStore:
+    """Aggregated days and their Garmin responses in SQLite.
+
+    Tables `days` (GarminDay attributes), `activities` (Activity fields and the activity
+    number in the day) and `responses` (zlib compressed DayResponses JSON), all keyed by ISO day.
+    Columns for new GarminDay attributes or Activity fields are added on open.
+    Storing the day again replaces it.
+    The day heart rates are archived in `heart_rates` next to the store file.
+    """
+
+    def __init__(self, account: str | None = None, path: Path | None = None) -> None:
+        """Open (create if not exists) the store of the account, see store_path()."""
+        self.path = path or store_path(account)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)  # put from pipeline thread
+        self.lock = threading.Lock()
+        self.heart_rates = HeartRateArchive(self.path.parent / HR_ARCHIVE_DIR)
+        with self.lock, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS days (day TEXT PRIMARY KEY, "
+                + ", ".join(f"{name} {type_}" for name, type_ in DAY_FIELDS.items())
+                + ")",
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS activities (day TEXT, idx INTEGER, "
+                + ", ".join(f"{name} {type_}" for name, type_ in ACTIVITY_FIELDS.items())
+                + ", PRIMARY KEY (day, idx))",
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (day TEXT PRIMARY KEY, data BLOB)",
+            )
+            self.add_columns("days", DAY_FIELDS)
+            self.add_columns("activities", ACTIVITY_FIELDS)
+
+    def add_columns(self, table: str, columns: dict[str, str]) -> None:
+        """Add the columns missed in the table created by the older version."""
+        existing = {row[1] for row in self.db.execute(f"PRAGMA table_info({table})")}
+        for name, type_ in columns.items():
+            if name not in existing:
+                self.db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {type_}")
+
+    def put(self, garmin_day: GarminDay, responses: DayResponses | None = None) -> None:
+        """Store the aggregated day, and the Garmin responses it was aggregated from."""
+        day = garmin_day.date.isoformat()
+        with self.lock, self.db:
+            self.db.execute(
+                f"INSERT OR REPLACE INTO days (day, {', '.join(DAY_FIELDS)}) "  # noqa: S608
+                f"VALUES (?{', ?' * len(DAY_FIELDS)})",
+                (day, *(getattr(garmin_day, name) for name in DAY_FIELDS)),
+            )
+            self.db.execute("DELETE FROM activities WHERE day = ?", (day,))
+            self.db.executemany(
+                f"INSERT INTO activities (day, idx, {', '.join(ACTIVITY_FIELDS)}) "  # noqa: S608
+                f"VALUES (?, ?{', ?' * len(ACTIVITY_FIELDS)})",
+                [
+                    (day, idx, *(getattr(activity, name) for name in ACTIVITY_FIELDS))
+                    for idx, activity in enumerate(garmin_day.activities)
+                ],
+            )
+            if responses is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (day, data) VALUES (?, ?)",
+                    (day, zlib.compress(json.dumps(responses.to_dict()).encode("utf8"))),
+                )
+                self.heart_rates.put(garmin_day.date, responses.heart_rates)
+
+    def day(self, day: date) -> dict[str, Any] | None:
+        """The day attributes, None if the day is not stored."""
+        with self.lock:
+            row = self.db.execute(
+                f"SELECT {', '.join(DAY_FIELDS)} FROM days WHERE day = ?",  # noqa: S608
+                (day.isoformat(),),
+            ).fetchone()
+        return None if row is None else dict(zip(DAY_FIELDS, row, strict=True))
+
+    def activities(self, day: date) -> list[Activity]:
+        """Aggregated activities of the day."""
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT {', '.join(ACTIVITY_FIELDS)} FROM activities "  # noqa: S608
+                "WHERE day = ? ORDER BY idx",
+                (day.isoformat(),),
+            ).fetchall()
+        return [Activity(**dict(zip(ACTIVITY_FIELDS, row, strict=True))) for row in rows]
+
+    def responses(self, first_day: date, last_day: date) -> Iterator[DayResponses]:
+        """Stored Garmin responses of the days from `first_day` till `last_day` (including)."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT data FROM responses WHERE day BETWEEN ? AND ? ORDER BY day",
+                (first_day.isoformat(), last_day.isoformat()),
+            ).fetchall()
+        for (data,) in rows:
+            yield DayResponses.from_dict(json.loads(zlib.decompress(data)))
+
+    def response_days(self, first_day: date, last_day: date) -> set[date]:
+        """Days with stored Garmin responses from `first_day` till `last_day` (including)."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT day FROM responses WHERE day BETWEEN ? AND ?",
+                (first_day.isoformat(), last_day.isoformat()),
+            ).fetchall()
+        return {date.fromisoformat(day) for (day,) in rows}
+
+    def replay(self, first_day: date, last_day: date) -> Iterator[GarminDay]:
+        """Aggregate the stored days again, with the current aggregation rules."""
+        for responses in self.responses(first_day, last_day):
+            yield GarminDaily.aggregate(responses)
+
+    def close(self) -> None:
+        """Close DB."""
+        self.db.close()
+
+    def __enter__(self) -> "DayStore":
+        """Context manager to close the store."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the store."""
+        self.close()
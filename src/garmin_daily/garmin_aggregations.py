@@ -1,17 +1,22 @@
 """Garmin data aggregated daily."""
 
 import os
+import threading
 from collections import defaultdict
 from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import date, datetime
 from enum import Enum
+from types import TracebackType
 from typing import Annotated, Any, get_type_hints
 
 import urllib3.exceptions
 from curl_cffi.requests.session import RetryStrategy
 from garminconnect import Garmin, GarminConnectAuthenticationError
 
+from garmin_daily import metrics, tracing
+from garmin_daily.activity_index import ActivityIndex
+from garmin_daily.rate_limit import HostRateLimiter, host_rate_limiter
 from garmin_daily.snake_to_camel import capitalize_words, snake_to_camel
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -149,6 +154,194 @@ class Activity:
         )
 
 
+HTTP_UNAUTHORIZED = 401  # garminconnect refreshes the token and repeats the request
+OTHER_ENDPOINT = "other"  # login and session refresh
+
+
+class GarminResponses(threading.local):
+    """Garmin Connect API HTTP responses in the current thread, see GarminDaily.observe_requests."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.count = 0
+        self.unauthorized = 0  # 401 responses, see HTTP_UNAUTHORIZED
+        self.size = 0  # bytes
+        self.endpoint = OTHER_ENDPOINT  # API method we are in, see call_endpoint()
+
+    def record(self, response: Any, *args: Any, **kwargs: Any) -> None:  # noqa: ARG002
+        """`requests` response hook."""
+        self.count += 1
+        self.size += len(response.content)
+        metrics.GARMIN_REQUESTS.inc(endpoint=self.endpoint, status=str(response.status_code))
+        if response.status_code == HTTP_UNAUTHORIZED:
+            self.unauthorized += 1
+            metrics.GARMIN_UNAUTHORIZED.inc(endpoint=self.endpoint)
+
+
+GARMIN_RESPONSES = GarminResponses()
+
+
+def call_endpoint(
+    api: Garmin,
+    endpoint: str,
+    *args: Any,
+    limiter: HostRateLimiter | None = None,
+    **span_attributes: Any,
+) -> Any:
+    """Call Garmin Connect API method in trace span with the day, 401 responses and size.
+
+    The day is the first argument, other requests (like pages) set `span_attributes` instead.
+    With `limiter` the request waits for its slot in the host requests budget.
+    """
+    with tracing.span(
+        f"garmin.{endpoint}",
+        endpoint=endpoint,
+        **(span_attributes or {"day": args[0]}),
+    ) as span:
+        count, unauthorized, size = (
+            GARMIN_RESPONSES.count,
+            GARMIN_RESPONSES.unauthorized,
+            GARMIN_RESPONSES.size,
+        )
+        if limiter is not None:
+            limiter.acquire()  # the host budget shared with other garmin-daily processes
+        GARMIN_RESPONSES.endpoint = endpoint
+        try:
+            result = getattr(api, endpoint)(*args)
+        except Exception:
+            if GARMIN_RESPONSES.count == count:  # no response, like connection error
+                metrics.GARMIN_REQUESTS.inc(endpoint=endpoint, status="error")
+            raise
+        finally:
+            GARMIN_RESPONSES.endpoint = OTHER_ENDPOINT
+        if span is not None:
+            span.set(
+                unauthorized=GARMIN_RESPONSES.unauthorized - unauthorized,
+                response_size=GARMIN_RESPONSES.size - size,
+            )
+    return result
+
+
+@dataclass
+class DayResponses:
+    """Garmin Connect API responses for one day.
+
+    So we can aggregate the day later without the API, see ReplayApi.
+    """
+
+    day: date
+    steps: list[dict[str, Any]]
+    heart_rates: dict[str, Any]
+    sleep: dict[str, Any]
+    training_status: dict[str, Any] | None
+    activities: list[dict[str, Any]]
+
+    @classmethod
+    def fetch(
+        cls,
+        api: Garmin,
+        day: date,
+        activities: list[dict[str, Any]] | None = None,
+        limiter: HostRateLimiter | None = None,
+    ) -> "DayResponses":
+        """Get the day data from Garmin Connect.
+
+        `activities` of the day if we already got them with the dates range request.
+        """
+        date_str = day.isoformat()
+        try:
+            training_status = call_endpoint(
+                api,
+                "get_training_status",
+                date_str,
+                limiter=limiter,
+            )
+        except Exception:  # noqa: BLE001
+            training_status = None  # no VO2 max, see GarminDay.get_vo2max()
+        return cls(
+            day=day,
+            steps=call_endpoint(api, "get_steps_data", date_str, limiter=limiter),
+            heart_rates=call_endpoint(api, "get_heart_rates", date_str, limiter=limiter),
+            sleep=call_endpoint(api, "get_sleep_data", date_str, limiter=limiter),
+            training_status=training_status,
+            activities=(
+                call_endpoint(
+                    api,
+                    "get_activities_by_date",
+                    date_str,
+                    date_str,
+                    "",
+                    limiter=limiter,
+                )
+                if activities is None
+                else activities
+            ),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serializable dict."""
+        return {
+            "day": self.day.isoformat(),
+            "steps": self.steps,
+            "heart_rates": self.heart_rates,
+            "sleep": self.sleep,
+            "training_status": self.training_status,
+            "activities": self.activities,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "DayResponses":
+        """Create from to_dict() result."""
+        return cls(
+            day=date.fromisoformat(data["day"]),
+            steps=data["steps"],
+            heart_rates=data["heart_rates"],
+            sleep=data["sleep"],
+            training_status=data["training_status"],
+            activities=data["activities"],
+        )
+
+
+class ReplayApi:
+    """Serve stored DayResponses as Garmin Connect API for GarminDay."""
+
+    def __init__(self, *responses: DayResponses) -> None:
+        """Init."""
+        self.responses = {
+            day_responses.day.isoformat(): day_responses for day_responses in responses
+        }
+
+    def get_steps_data(self, date_str: str) -> list[dict[str, Any]]:
+        """Steps buckets."""
+        return self.responses[date_str].steps
+
+    def get_heart_rates(self, date_str: str) -> dict[str, Any]:
+        """Heart rates."""
+        return self.responses[date_str].heart_rates
+
+    def get_sleep_data(self, date_str: str) -> dict[str, Any]:
+        """Sleep."""
+        return self.responses[date_str].sleep
+
+    def get_training_status(self, date_str: str) -> dict[str, Any] | None:
+        """Training status."""
+        return self.responses[date_str].training_status
+
+    def get_activities_by_date(
+        self,
+        startdate: str,
+        enddate: str,
+        activitytype: str | None = None,  # noqa: ARG002
+    ) -> list[dict[str, Any]]:
+        """Activities for the dates range (including)."""
+        return [
+            activity
+            for date_str, day_responses in sorted(self.responses.items())
+            if startdate <= date_str <= enddate
+            for activity in day_responses.activities
+        ]
+
+
 class GarminDay:
     """Aggregate one day Garmin data."""
 
@@ -388,16 +581,49 @@ class GarminDay:
 class GarminDaily:
     """Aggregate activities daily."""
 
-    def __init__(self) -> None:
-        """Init."""
-        email = os.getenv("GARMIN_EMAIL")
-        password = os.getenv("GARMIN_PASSWORD")
-        self.api = Garmin(email, password)
+    def __init__(
+        self,
+        email: str | None = None,
+        password: str | None = None,
+        activity_index: ActivityIndex | None = None,
+    ) -> None:
+        """Init with the Garmin Connect credentials.
+
+        By default from `GARMIN_EMAIL` and `GARMIN_PASSWORD` environment vars.
+        Each instance has its own session, so several accounts could be used at once.
+        `activity_index` keeps the seen activities, by default in the cache folder,
+        it is closed with close() or on the context manager exit.
+        The requests take slots of the process host budget, see host_rate_limiter().
+        """
+        self.email = email or os.getenv("GARMIN_EMAIL")
+        self.api = Garmin(self.email, password or os.getenv("GARMIN_PASSWORD"))
+        self.activity_index = activity_index
+        self.rate_limiter = host_rate_limiter()
         self.api.client.cs.retry = RetryStrategy(
             count=5,
             delay=3,
             backoff="exponential",
         )
+        self.observe_requests()
+
+    def observe_requests(self) -> None:
+        """Count API responses in GARMIN_RESPONSES.
+
+        garminconnect creates new `requests` session for each API request,
+        so we add our response hook to each of them.
+        That is a private method, if garminconnect changed it the responses are not counted.
+        """
+        client = self.api.client
+        fresh_api_session = getattr(client, "_fresh_api_session", None)
+        if fresh_api_session is None:  # pragma: no cover
+            return
+
+        def observed_api_session() -> Any:
+            session = fresh_api_session()
+            session.hooks["response"].append(GARMIN_RESPONSES.record)
+            return session
+
+        client._fresh_api_session = observed_api_session  # noqa: SLF001  # checked above
 
     def login(self) -> None:  # pragma: no cover
         """Login."""
@@ -405,13 +631,87 @@ class GarminDaily:
             self.api.login()
         except GarminConnectAuthenticationError as exc:
             raise ValueError(
-                "Wrong Garmin Connect login or password. "
-                "Check environment vars `GARMIN_EMAIL` and `GARMIN_PASSWORD`.",
+                f"Wrong Garmin Connect login or password for '{self.email}'. "
+                "Check environment vars `GARMIN_EMAIL` and `GARMIN_PASSWORD` "
+                "or the account credentials.",
             ) from exc
         except Exception as exc:
             # Raising a SystemError with the original stack trace and error message
             raise SystemError(f"An Garmin Connect API error occurred: {exc}") from exc
 
+    def refresh_session(self) -> None:  # pragma: no cover
+        """Refresh Garmin Connect tokens if they expire soon, login again if lost the session.
+
+        garminconnect has no public API for that, so we use the same client methods
+        as `Garmin.login()` does for the stored tokens, or login if there are no such methods.
+        """
+        client = self.api.client
+        expires_soon = getattr(client, "_token_expires_soon", None)
+        refresh = getattr(client, "_refresh_session", None)
+        if not client.is_authenticated or expires_soon is None or refresh is None:
+            self.login()
+        elif expires_soon():
+            refresh()
+
+    def close(self) -> None:
+        """Close the activities index."""
+        if self.activity_index is not None:
+            self.activity_index.close()
+            self.activity_index = None
+
+    def __enter__(self) -> "GarminDaily":
+        """Context manager to close the activities index."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the activities index."""
+        self.close()
+
     def __getitem__(self, day: date) -> GarminDay:  # pragma: no cover
         """Get aggregated day."""
         return GarminDay(self.api, day)
+
+    def sync_activities(self, first_day: date, complete_from: date | None = None) -> set[date]:
+        """Get new and changed activities from `first_day` into the activities index.
+
+        So fetch() takes the days activities from the index instead of requesting them.
+        The days from `complete_from` are fully synced, with deleted activities dropped.
+        Returns the days that gained, changed or lost activities.
+        """
+        if self.activity_index is None:
+            self.activity_index = ActivityIndex(self.email or "")
+        return self.activity_index.sync(
+            lambda start, limit: call_endpoint(
+                self.api,
+                "get_activities",
+                start,
+                limit,
+                limiter=self.rate_limiter,
+                page_start=start,
+                page_limit=limit,
+            ),
+            first_day,
+            complete_from,
+        )
+
+    def fetch(self, day: date) -> DayResponses:
+        """Get the day data from Garmin Connect without aggregation."""
+        activities = None
+        if self.activity_index is not None and self.activity_index.covers(day):
+            activities = self.activity_index.activities(day)
+        return DayResponses.fetch(
+            self.api,
+            day,
+            activities=activities,
+            limiter=self.rate_limiter,
+        )
+
+    @staticmethod
+    def aggregate(responses: DayResponses) -> GarminDay:
+        """Aggregate fetched day."""
+        return GarminDay(ReplayApi(responses), responses.day)  # type: ignore[arg-type]
@@ -0,0 +1,184 @@
+"""Garmin Connect account data export as the days source, see `--import-export` option.
+
+The export zip (Garmin account, Data Management, Export Your Data) has JSON files:
+- `DI-Connect-Aggregator/UDSFile_*.json` daily steps and heart rates
+- `DI-Connect-Wellness/*sleepData.json` sleep
+- `DI-Connect-Metrics/MetricsMaxMetData_*.json` VO2 max
+- `DI-Connect-Fitness/*summarizedActivities.json` activities
+
+The archive members are read directly from the zip, the records are converted
+to the Garmin Connect API responses, so the days are aggregated with the usual rules.
+"""
+
+import json
+import re
+import zipfile
+from collections import defaultdict
+from datetime import UTC, date, datetime
+from pathlib import Path
+from typing import Any
+
+from garmin_daily.garmin_aggregations import DayResponses
+
+EXPORT_FILES = {
+    "uds": re.compile(r"DI-Connect-Aggregator/UDSFile_[^/]*\.json$"),
+    "sleep": re.compile(r"DI-Connect-Wellness/[^/]*sleepData\.json$"),
+    "vo2max": re.compile(r"DI-Connect-Metrics/MetricsMaxMetData_[^/]*\.json$"),
+    "activities": re.compile(r"DI-Connect-Fitness/[^/]*summarizedActivities\.json$"),
+}
+ACTIVITIES_EXPORT_KEY = "summarizedActivitiesExport"
+# export activity units: ms, cm, cm/ms and kJ instead of API s, m, m/s and kcal
+MS_IN_SECOND = 1000
+CM_IN_METER = 100
+SPEED_TO_M_S = 10
+KJ_IN_KCAL = 4.184
+SLEEP_PHASES = ("deepSleepSeconds", "lightSleepSeconds", "remSleepSeconds")
+DAY_FIELDS = {  # the export day records fields we aggregate
+    "uds": ("totalSteps", "minHeartRate", "maxHeartRate", "restingHeartRate"),
+    "sleep": SLEEP_PHASES,
+    "vo2max": ("vo2MaxValue",),
+}
+
+
+def export_records(data: Any) -> list[dict[str, Any]]:
+    """Records of the export JSON file, activities are wrapped in the export key."""
+    if not isinstance(data, list):
+        raise TypeError("expected the list of records")
+    records = []
+    for item in data:
+        if isinstance(item, dict) and ACTIVITIES_EXPORT_KEY in item:
+            records.extend(item[ACTIVITIES_EXPORT_KEY])
+        else:
+            records.append(item)
+    return records
+
+
+def record_day(value: Any) -> date:
+    """Date of the export `calendarDate`, ISO string or `{"date": ISO string}`."""
+    if isinstance(value, dict):
+        value = value.get("date")
+    return date.fromisoformat(str(value)[:10])
+
+
+def scale(value: float | None, divider: float) -> float | None:
+    """Convert the export unit."""
+    return None if value is None else value / divider
+
+
+def local_time(value: Any) -> str:
+    """API `startTimeLocal` from the export local time in ms."""
+    if isinstance(value, str):
+        return value[:19].replace("T", " ")
+    return datetime.fromtimestamp(value / MS_IN_SECOND, UTC).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def api_activity(activity: dict[str, Any]) -> dict[str, Any]:
+    """Garmin Connect API activity from the export activity."""
+    return {
+        "activityId": activity.get("activityId"),
+        "activityName": activity.get("name"),
+        "activityType": {"typeKey": activity.get("activityType", "")},
+        "locationName": activity.get("locationName"),
+        "startTimeLocal": local_time(activity["startTimeLocal"]),
+        "duration": scale(activity.get("duration"), MS_IN_SECOND),
+        "movingDuration": scale(activity.get("movingDuration"), MS_IN_SECOND),
+        "distance": scale(activity.get("distance"), CM_IN_METER),
+        "elevationGain": scale(activity.get("elevationGain"), CM_IN_METER),
+        "averageSpeed": scale(activity.get("avgSpeed"), 1 / SPEED_TO_M_S),
+        "maxSpeed": scale(activity.get("maxSpeed"), 1 / SPEED_TO_M_S),
+        "averageHR": activity.get("avgHr"),
+        "maxHR": activity.get("maxHr"),
+        "calories": scale(activity.get("calories"), KJ_IN_KCAL),
+        "steps": activity.get("steps"),
+    }
+
+
+class GarminExport:
+    """Days from the Garmin Connect export zip as DayResponses.
+
+    The archive is read once on init keeping only the fields we aggregate,
+    then the instance is `fetch` for add_rows_from_garmin().
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Read the export archive."""
+        self.path = path
+        self.days: dict[date, dict[str, Any]] = defaultdict(dict)  # day: {kind: record}
+        self.activities: dict[date, list[dict[str, Any]]] = defaultdict(list)
+        try:
+            archive = zipfile.ZipFile(path)
+        except (OSError, zipfile.BadZipFile) as exc:
+            raise ValueError(f"Cannot open Garmin export '{path}': {exc}") from exc
+        with archive:
+            for info in archive.infolist():
+                kind = next(
+                    (
+                        kind
+                        for kind, pattern in EXPORT_FILES.items()
+                        if pattern.search(info.filename)
+                    ),
+                    None,
+                )
+                if kind is None:
+                    continue
+                try:
+                    with archive.open(info) as member:
+                        records = export_records(json.load(member))
+                    for record in records:
+                        self.add(kind, record)
+                except (ValueError, KeyError, TypeError) as exc:
+                    raise ValueError(f"Wrong Garmin export file '{info.filename}': {exc}") from exc
+        if not self.days and not self.activities:
+            raise ValueError(f"No Garmin data in '{path}', is it Garmin Connect export?")
+
+    def add(self, kind: str, record: dict[str, Any]) -> None:
+        """Keep the export record."""
+        if kind == "activities":
+            activity = api_activity(record)
+            self.activities[date.fromisoformat(activity["startTimeLocal"][:10])].append(activity)
+        else:
+            self.days[record_day(record["calendarDate"])][kind] = {
+                field: record.get(field) for field in DAY_FIELDS[kind]
+            }
+
+    @property
+    def first_day(self) -> date:
+        """The first day with data."""
+        return min([*self.days, *self.activities])
+
+    @property
+    def last_day(self) -> date:
+        """The last day with data."""
+        return max([*self.days, *self.activities])
+
+    def __call__(self, day: date) -> DayResponses:
+        """The day as Garmin Connect API responses, empty if the export has no data for it."""
+        records = self.days.get(day, {})
+        uds = records.get("uds", {})
+        sleep = {phase: records.get("sleep", {}).get(phase) or 0 for phase in SLEEP_PHASES}
+        vo2max = records.get("vo2max", {}).get("vo2MaxValue")
+        return DayResponses(
+            day=day,
+            steps=[{"steps": uds["totalSteps"]}] if uds.get("totalSteps") is not None else [],
+            heart_rates={
+                "calendarDate": day.isoformat(),
+                "maxHeartRate": uds.get("maxHeartRate"),
+                "minHeartRate": uds.get("minHeartRate"),
+                "restingHeartRate": uds.get("restingHeartRate"),
+                "heartRateValues": None,  # the export has no intraday heart rates
+            },
+            sleep={
+                "dailySleepDTO": {
+                    "calendarDate": day.isoformat(),
+                    "sleepTimeSeconds": sum(sleep.values()) if "sleep" in records else None,
+                    **sleep,
+                },
+            },
+            training_status=None
+            if vo2max is None
+            else {"mostRecentVO2Max": {"generic": {"vo2MaxValue": vo2max}}},
+            activities=sorted(
+                self.activities.get(day, []),
+                key=lambda activity: activity["startTimeLocal"],
+            ),
+        )
@@ -1,27 +1,54 @@
 """Google Sheet related functions."""
 
-import locale
-import sys
+import json
 import time
+from collections.abc import Callable, Iterable, Mapping
+from contextlib import nullcontext
 from datetime import date, datetime, timedelta
-from enum import Enum
 from functools import cache
-from typing import cast
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Protocol
 
 import gspread
-import pandas as pd
-from gspread.utils import ValueInputOption
-
-from garmin_daily import SPORT_STEP_LENGTH_KM, WALKING_SPORT, Activity, GarminDaily
-from garmin_daily.columns_mapper import ColumnsMapper, GarminCol
+from gspread.http_client import ParamsType
+from gspread.utils import DateTimeOption, ValueInputOption, ValueRenderOption
+
+from garmin_daily import (
+    SPORT_STEP_LENGTH_KM,
+    WALKING_SPORT,
+    Activity,
+    DayResponses,
+    GarminDaily,
+    GarminDay,
+    metrics,
+    tracing,
+)
+from garmin_daily.cache import cache_dir
+from garmin_daily.columns_mapper import ColumnsMapper, GarminCol, week_num
 from garmin_daily.mappers import ActivityMapper, LocationMapper
+from garmin_daily.number_formatter import NumberFormatter
+from garmin_daily.parallel import ParallelAggregator
+from garmin_daily.pipeline import Pipeline, StageStats
+from garmin_daily.sinks import SheetRow, Sink
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from garmin_daily.day_store import DayStore
 
 BATCH_SIZE = 7  # Add days by batches to prevent block grom Garmin API
 API_DELAY = 15  # seconds to wait between batches to prevent robot protection from Garmin API
+FIRST_DATA_ROW = 2  # after header row #1
+DEFAULT_FORMATTER = NumberFormatter()
+SPREADSHEET_KEYS_FILE = "spreadsheet-keys.json"  # in cache_dir(), to open spreadsheet by key
+ACTIVITIES_LOOKBACK = 7  # days before the added ones to check for edited or late activities
+LOOKUP_GROUP_DAYS = 7  # looked up dates closer than that are read as one rows block
 
+DayRow = list[str | int | float | None]  # values by GarminCol index
 
-def add_rows_from_garmin(  # noqa: PLR0913
-    fitness: gspread.Worksheet,
+
+def add_rows_from_garmin(  # noqa: C901,PLR0913,PLR0915
+    fitness: gspread.Worksheet | None,
     columns: ColumnsMapper,
     start_date: date,
     days_to_add: int,
@@ -29,44 +56,357 @@ def add_rows_from_garmin(  # noqa: PLR0913
     gym_duration: int,
     location_mapper: "LocationMapper",
     activity_mapper: "ActivityMapper",
-) -> None:
-    """Add activities from Garmin to the Google Sheet."""
-    daily = GarminDaily()
-    daily.login()
-
-    batches_num = days_to_add // BATCH_SIZE
-    if days_to_add % BATCH_SIZE:
-        batches_num += 1
-    for batch in range(batches_num):
-        for day_in_batch in range(BATCH_SIZE):
-            day_num = batch * BATCH_SIZE + day_in_batch
-            day = start_date + timedelta(days=day_num)
-            if day >= datetime.now().date() or day_num >= days_to_add:
-                break
-            rows_fields = create_day_rows(
+    steps_lookup: "StepsLookup | None" = None,
+    sink: Sink | None = None,
+    daily: GarminDaily | None = None,
+    fetch: Callable[[date], DayResponses] | None = None,
+    bulk_days: int = 1,
+    store: "DayStore | None" = None,
+    workers: int = 1,
+) -> list[StageStats]:
+    """Add activities from Garmin to the sink, by default to the Google Sheet `fitness`.
+
+    `steps_lookup` is used to find missed in Garmin steps, see search_missed_steps_in_sheet().
+    `daily` is logged in Garmin session to reuse, by default we create and login new one
+    (and close it at the end).
+    `fetch` gets the day from Garmin, by default `daily.fetch` with pauses between batches.
+    `bulk_days` days are written to the sink at once.
+    `store` keeps the aggregated days and their Garmin responses.
+    `workers` processes aggregate the days, for the local `fetch` without Garmin requests.
+
+    Fetch from Garmin, aggregation, rows creation and writing run as pipeline stages,
+    so Garmin requests for the next days overlap writing of the previous days.
+    Returns the stages timing.
+    """
+    if sink is None:
+        assert fitness is not None
+        sink = GoogleSheetSink(fitness, columns, steps_lookup)
+    if daily is None:
+        with GarminDaily() as own_daily:
+            own_daily.login()
+            return add_rows_from_garmin(
+                fitness=fitness,
+                columns=columns,
+                start_date=start_date,
+                days_to_add=days_to_add,
+                gym_days=gym_days,
+                gym_duration=gym_duration,
+                location_mapper=location_mapper,
+                activity_mapper=activity_mapper,
+                steps_lookup=steps_lookup,
+                sink=sink,
+                daily=own_daily,
+                fetch=fetch,
+                bulk_days=bulk_days,
+                store=store,
+                workers=workers,
+            )
+
+    today = datetime.now().date()
+    days = [
+        (day_num, start_date + timedelta(days=day_num))
+        for day_num in range(days_to_add)
+        if start_date + timedelta(days=day_num) < today
+    ]
+    if fetch is None and days:  # the days activities from one incremental request
+        sync_activities(daily, store, start_date)
+
+    day_spans = tracing.ItemSpans("day")
+
+    def fetch_day(day_item: tuple[int, date]) -> DayResponses:
+        day_num, day = day_item
+        day_spans.begin(day, day=day.isoformat())
+        with day_spans.stage("fetch", day):
+            if fetch is not None:
+                return fetch(day)
+            if day_num and day_num % BATCH_SIZE == 0:
+                time.sleep(API_DELAY)  # pause to prevent robot protection from Garmin API
+                metrics.RATE_LIMIT_SLEEP.inc(API_DELAY)
+            return daily.fetch(day)
+
+    def aggregate(responses: DayResponses) -> GarminDay:
+        with day_spans.stage("aggregate", responses.day):
+            return keep(responses, daily.aggregate(responses))
+
+    def keep(responses: DayResponses, garmin_day: GarminDay) -> GarminDay:
+        if store is not None:
+            store.put(garmin_day, responses)  # before create_rows() adds the gym activity
+        return garmin_day
+
+    def keep_aggregated(aggregated: tuple[DayResponses, GarminDay]) -> GarminDay:
+        responses, garmin_day = aggregated
+        with day_spans.stage("aggregate", responses.day):  # only keep, aggregated in the pool
+            return keep(responses, garmin_day)
+
+    def create_rows(garmin_day: GarminDay) -> tuple[date, list[SheetRow]]:
+        with day_spans.stage("rows", garmin_day.date):
+            rows_values = create_day_rows(
                 daily=daily,
-                day=day,
+                day=garmin_day.date,
                 gym_duration=gym_duration,
                 gym_days=gym_days,
                 location_mapper=location_mapper,
                 activity_mapper=activity_mapper,
+                formulas=not sink.typed,
+                garmin_day=garmin_day,
+                formatter=sink.formatter,
             )
-            rows = [
-                localized_csv_raw(columns.map(cast(dict[Enum, str | int | float | None], fields)))
-                for fields in rows_fields
+            return garmin_day.date, [columns.row(values) for values in rows_values]
+
+    def write(day_rows: tuple[date, list[SheetRow]]) -> None:
+        day, rows = day_rows
+        with day_spans.stage("write", day, last=True):
+            sink.write_rows(rows)
+
+    sink.bulk_days = bulk_days
+    items: Iterable[Any] = days
+    aggregator = None
+    if workers > 1:  # fetch in the pipeline feeder, aggregate in the pool
+        aggregator = ParallelAggregator(workers)
+        items = aggregator.map(fetch_day(day_item) for day_item in days)
+        pipeline = Pipeline(
+            ("aggregate", keep_aggregated),
+            ("rows", create_rows),
+            ("write", write),
+        )
+    else:
+        pipeline = Pipeline(
+            ("fetch", fetch_day),
+            ("aggregate", aggregate),
+            ("rows", create_rows),
+            ("write", write),
+        )
+    with (
+        aggregator or nullcontext(),  # stops the workers if the pipeline stopped early
+        tracing.span("run", days=len(days)),
+        day_spans,
+        metrics.run_metrics(pipeline.stats),
+    ):
+        try:
+            stats = pipeline.run(items)
+        finally:
+            with tracing.span("flush"):
+                sink.flush()  # the days collected for bulk write, even if a stage failed
+    print("Stages time:", ", ".join(str(stage) for stage in stats))
+    return stats
+
+
+def sync_activities(daily: GarminDaily, store: "DayStore | None", start_date: date) -> None:
+    """Sync the activities index from `ACTIVITIES_LOOKBACK` days before `start_date`.
+
+    The days from `start_date` are synced completely, so deleted activities are not added.
+    The already added days with changed activities are aggregated again in the local store.
+    """
+    changed_days = daily.sync_activities(
+        start_date - timedelta(days=ACTIVITIES_LOOKBACK),
+        complete_from=start_date,
+    )
+    if store is None or daily.activity_index is None:
+        return
+    updated = []
+    for day in sorted(day for day in changed_days if day < start_date):
+        for responses in store.responses(day, day):
+            responses.activities = daily.activity_index.activities(day)
+            store.put(daily.aggregate(responses), responses)
+            updated.append(day.isoformat())
+    if updated:
+        print(
+            f"Activities changed for already added days {', '.join(updated)}: "
+            "updated in the local store, please check the rows.",
+        )
+
+
+class GoogleSheetSink(Sink):
+    """Insert rows at the top of the Google Sheet, as locale specific strings and formulas."""
+
+    typed = False
+
+    def __init__(
+        self,
+        fitness: gspread.Worksheet,
+        columns: ColumnsMapper,
+        steps_lookup: "StepsLookup | None" = None,
+    ) -> None:
+        """Init, by default look up steps with SheetDateLookup."""
+        super().__init__(columns)
+        self.fitness = fitness
+        # one lookup for the run, so its probes are reused for all the days
+        self.steps_lookup = steps_lookup or SheetDateLookup(fitness, columns)
+        self.formatter = NumberFormatter.from_locale(fitness.spreadsheet.locale)
+
+    def prepare(self, rows: list[SheetRow]) -> list[SheetRow]:
+        """Localize and fill missed steps from the sheet."""
+        result: list[SheetRow] = [localized_csv_raw(row, self.formatter) for row in rows]
+        search_missed_steps_in_sheet(self.fitness, result, self.columns, self.steps_lookup)
+        return result
+
+    def merge(self, days_rows: list[list[SheetRow]]) -> list[SheetRow]:
+        """Newest day first, as if each day was inserted at the top in turn."""
+        return [row for rows in reversed(days_rows) for row in rows]
+
+    def write(self, rows: list[SheetRow]) -> None:
+        """Insert rows after the header."""
+        self.steps_lookup.before_insert()
+        self.fitness.insert_rows(
+            rows,
+            row=FIRST_DATA_ROW,
+            value_input_option=ValueInputOption.user_entered,
+        )
+        self.steps_lookup.rows_inserted(rows)
+
+
+class StepsLookup(Protocol):
+    """Source of earlier entered in the sheet steps."""
+
+    def steps(self, days: Iterable[str]) -> dict[str, int]:
+        """Get first positive steps for each of the dates like '2022-02-16'."""
+
+    def before_insert(self) -> None:
+        """The rows are going to be inserted at the sheet top."""
+
+    def rows_inserted(self, rows: list[SheetRow]) -> None:
+        """The rows were inserted at the sheet top."""
+
+
+class SheetDateLookup:
+    """Look up rows by date in the sheet sorted by date, newest first.
+
+    Instead of downloading the whole sheet we binary search the Date column
+    reading one cell per probe, and then fetch only the rows blocks with the dates we need,
+    one block per group of close dates, all the blocks in one request.
+    So the lookup costs O(log rows) small range requests per group.
+    """
+
+    def __init__(self, fitness: gspread.Worksheet, columns: ColumnsMapper) -> None:
+        """Init."""
+        self.fitness = fitness
+        self.columns = columns
+        self.requests = 0  # number of Google Sheet API reads, to see the lookup cost
+        # gspread does not update `row_count` after `insert_rows()`, so we count the inserts
+        self.row_count = fitness.row_count
+        self._probed: dict[int, str] = {}
+
+    def date_at(self, row: int) -> str:
+        """Date string in the row, empty string for empty row.
+
+        Raise ValueError if the cell is not an ISO date so the sheet cannot be binary searched.
+        """
+        if row not in self._probed:
+            self.requests += 1
+            values = self.fitness.get(f"{self.columns[GarminCol.DATE]}{row}")
+            value = str(values[0][0]) if values and values[0] else ""
+            if value:
+                date.fromisoformat(value)
+            self._probed[row] = value
+        return self._probed[row]
+
+    def before_insert(self) -> None:
+        """Nothing to check, the probes are kept for the run."""
+
+    def rows_inserted(self, rows: list[SheetRow]) -> None:
+        """Shift probed rows by the rows inserted at the top, and remember the inserted dates."""
+        date_idx = self.columns.idx(GarminCol.DATE)
+        self.row_count += len(rows)
+        self._probed = {row + len(rows): value for row, value in self._probed.items()}
+        for row_num, row in enumerate(rows):
+            self._probed[FIRST_DATA_ROW + row_num] = str(row[date_idx])
+
+    def bisect(self, is_older: Callable[[str], bool]) -> int:
+        """First row with the date for which `is_older` is True.
+
+        Empty rows at the sheet end are treated as older than any date.
+        """
+        low, high = FIRST_DATA_ROW, self.row_count + 1
+        while low < high:
+            middle = (low + high) // 2
+            value = self.date_at(middle)
+            if not value or is_older(value):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    @staticmethod
+    def day_groups(days: Iterable[str]) -> list[tuple[str, str]]:
+        """Newest and oldest dates of the groups of close days, newest group first."""
+        groups: list[tuple[str, str]] = []
+        for day in sorted(days, reverse=True):
+            gap = date.fromisoformat(groups[-1][1]) - date.fromisoformat(day) if groups else None
+            if gap is not None and gap < timedelta(days=LOOKUP_GROUP_DAYS):
+                groups[-1] = (groups[-1][0], day)
+            else:
+                groups.append((day, day))
+        return groups
+
+    def rows_ranges(self, days: Iterable[str]) -> list[tuple[int, int]]:
+        """Not empty rows ranges [first, last), one for each group of close days."""
+        ranges = []
+        for newest, oldest in self.day_groups(days):
+            first = self.bisect(lambda value, newest=newest: value <= newest)
+            first_date = self.date_at(first) if first <= self.row_count else ""
+            if not first_date or first_date < oldest:
+                continue  # no rows with the group dates
+            ranges.append((first, self.bisect(lambda value, oldest=oldest: value < oldest)))
+        return ranges
+
+    def get_columns(
+        self,
+        ranges: list[tuple[int, int]],
+        *columns: GarminCol,
+    ) -> list[list[str | int | float]]:
+        """Get the rows blocks values for the columns, all the blocks in one request."""
+        self.requests += 1
+        blocks = self.fitness.batch_get(
+            [
+                f"{self.columns[column]}{first}:{self.columns[column]}{last - 1}"
+                for first, last in ranges
+                for column in columns
+            ],
+            value_render_option=ValueRenderOption.unformatted,
+            date_time_render_option=DateTimeOption.formatted_string,
+        )
+        result = []
+        for block_num, (first, last) in enumerate(ranges):
+            column_values = [
+                [row[0] if row else "" for row in values]
+                for values in blocks[block_num * len(columns) : (block_num + 1) * len(columns)]
             ]
-            search_missed_steps_in_sheet(fitness, rows, columns)
-            for row in rows:
-                print("; ".join(row))
-            fitness.insert_rows(rows, row=2, value_input_option=ValueInputOption.user_entered)
-        if batch < batches_num - 1:  # do not pause on last iteration
-            time.sleep(API_DELAY)  # pause to prevent robot protection from Garmin API
+            result.extend(
+                [values[idx] if idx < len(values) else "" for values in column_values]
+                for idx in range(last - first)
+            )
+        return result
+
+    def steps(self, days: Iterable[str]) -> dict[str, int]:
+        """Get first positive steps for each of the dates like '2022-02-16'.
+
+        Dates without steps in the sheet are absent in the result.
+        """
+        days = set(days)
+        if not days:
+            return {}
+        try:
+            top = self.date_at(FIRST_DATA_ROW)
+            if not top or min(days) > top:
+                return {}  # all the days are newer than the sheet, like on backfill
+            ranges = self.rows_ranges(days)
+        except ValueError:
+            print(f"Google Sheet '{self.fitness.title}' is not sorted by date")
+            return fitness_df_steps(self.fitness, days)
+        result: dict[str, int] = {}
+        if not ranges:
+            return result
+        for day, steps in self.get_columns(ranges, GarminCol.DATE, GarminCol.STEPS):
+            if day in days and day not in result and isinstance(steps, (int, float)) and steps > 0:
+                result[str(day)] = int(steps)
+        return result
 
 
 def search_missed_steps_in_sheet(
     fitness: gspread.Worksheet,
     rows: list[list[str]],
     columns: ColumnsMapper,
+    lookup: StepsLookup | None = None,
 ) -> None:
     """Add missed in Garmin API steps data from earlier entered in the spreadsheet.
 
@@ -78,61 +418,76 @@ def search_missed_steps_in_sheet(
     we can find and use them.
 
     Just once I needed this mode so I keep it in the code.
-    If you have steps from Garmin API we won't read the Google Sheet to Pandas DataFrame
-    so this code won't take any resources.
+    If you have steps from Garmin API we won't read the Google Sheet at all,
+    otherwise we read only the rows with the dates we need, see SheetDateLookup,
+    or use the local sheet copy if `lookup` is SheetMirror.
     """
-
-    def get_steps(day: str) -> int:
-        """Get steps for the date like '2022-02-16'."""
-        steps = fitness_df(fitness)[(fitness_df(fitness).index == day)]["Steps"]
-        steps = steps[steps != ""]
-        steps = steps[steps > 0].values
-        return steps[0] if len(steps) > 0 else 0
-
-    for row in rows:
-        no_steps_distance = "=0*"
-        steps_correction = "=0"
-        if row[columns.idx(GarminCol.DISTANCE)].startswith(no_steps_distance):
-            # Garmin did not return data for the day
-            # try to look in the table
-            manually_entered_steps = str(get_steps(row[columns.idx(GarminCol.DATE)]))
-            if row[columns.idx(GarminCol.STEPS)].startswith(steps_correction):
-                manually_entered_steps = (
-                    f"{manually_entered_steps}"
-                    f"{row[columns.idx(GarminCol.STEPS)][len(steps_correction) :]}"
-                )
-                row[columns.idx(GarminCol.STEPS)] = f"={manually_entered_steps}"
-            else:
-                # no correction formula
-                row[columns.idx(GarminCol.STEPS)] = manually_entered_steps
-            row[columns.idx(GarminCol.DISTANCE)] = (
-                f"=({manually_entered_steps})*"
-                f"{row[columns.idx(GarminCol.DISTANCE)][len(no_steps_distance) :]}"
+    no_steps_distance = "=0*"
+    steps_correction = "=0"
+    missed_rows = [
+        row for row in rows if row[columns.idx(GarminCol.DISTANCE)].startswith(no_steps_distance)
+    ]
+    if not missed_rows:
+        return
+    # Garmin did not return data for the days, try to look in the table
+    if lookup is None:
+        lookup = SheetDateLookup(fitness, columns)
+    sheet_steps = lookup.steps(row[columns.idx(GarminCol.DATE)] for row in missed_rows)
+    for row in missed_rows:
+        manually_entered_steps = str(sheet_steps.get(row[columns.idx(GarminCol.DATE)], 0))
+        if row[columns.idx(GarminCol.STEPS)].startswith(steps_correction):
+            manually_entered_steps = (
+                f"{manually_entered_steps}"
+                f"{row[columns.idx(GarminCol.STEPS)][len(steps_correction) :]}"
             )
+            row[columns.idx(GarminCol.STEPS)] = f"={manually_entered_steps}"
+        else:
+            # no correction formula
+            row[columns.idx(GarminCol.STEPS)] = manually_entered_steps
+        row[columns.idx(GarminCol.DISTANCE)] = (
+            f"=({manually_entered_steps})*"
+            f"{row[columns.idx(GarminCol.DISTANCE)][len(no_steps_distance) :]}"
+        )
 
 
-def detect_days_to_add(fitness: gspread.Worksheet, columns: ColumnsMapper) -> tuple[date, int]:
+def detect_days_to_add(
+    fitness: gspread.Worksheet,
+    columns: ColumnsMapper,
+    first_row: list[Any] | None = None,
+) -> tuple[date, int]:
     """Get last filled date and calculate number of days to add till today.
 
+    If we already have the first data row (e.g. from read_top_rows) we do not read the sheet.
+    Raise ValueError if there is no valid date in the first data row.
+
     Returns (start_date, days_to_add)
     """
     sheet_name = fitness.spreadsheet.title
-    first_data_row = 2  # after header row #1
-    date_cell = fitness.acell(f"{columns[GarminCol.DATE]}{first_data_row}").value
+    first_data_row = FIRST_DATA_ROW
+    if first_row is None:
+        date_cell = fitness.acell(f"{columns[GarminCol.DATE]}{first_data_row}").value
+    else:
+        date_cell = str(first_row[columns.idx(GarminCol.DATE)]) if first_row else None
     if not date_cell:
-        print(
-            f"\nCannot find last filled date in Google Sheet '{sheet_name}'.'{fitness.title}'"
+        raise ValueError(
+            f"Cannot find last filled date in Google Sheet '{sheet_name}'.'{fitness.title}'"
             f", cell {columns[GarminCol.DATE]}{first_data_row}",
         )
-        sys.exit(1)
     try:
         last_date = datetime.strptime(date_cell, "%Y-%m-%d").date()
     except ValueError as exc:
-        print(
-            f"\nWrong date string in Google Sheet '{sheet_name}'.'{fitness.title}', "
+        raise ValueError(
+            f"Wrong date string in Google Sheet '{sheet_name}'.'{fitness.title}', "
             f"cell {columns[GarminCol.DATE]}{first_data_row}:\n{exc}",
-        )
-        sys.exit(1)
+        ) from exc
+    return days_to_add_after(last_date)
+
+
+def days_to_add_after(last_date: date) -> tuple[date, int]:
+    """Calculate days to add after the last filled date till today.
+
+    Returns (start_date, days_to_add)
+    """
     print("Last filled date", last_date)
     start_date = last_date + timedelta(days=1)
     days_to_add = (datetime.now().date() - start_date).days
@@ -141,26 +496,105 @@ def detect_days_to_add(fitness: gspread.Worksheet, columns: ColumnsMapper) -> tu
     return start_date, days_to_add
 
 
-def open_google_sheet(sheet: str) -> tuple[gspread.Worksheet, ColumnsMapper]:
-    """Open Google Sheet.
+class MetadataSpreadsheet(gspread.Spreadsheet):
+    """Spreadsheet that keeps the metadata fetched on open.
 
-    Return worksheet and columns map.
-    Also set current locale from the spreadsheet so it will affect %n formatting.
+    So we get the locale and the first worksheet without more requests.
     """
-    gspread_client = gspread.service_account()
+
+    metadata: Mapping[str, Any] | None = None
+
+    def fetch_sheet_metadata(self, params: ParamsType | None = None) -> Mapping[str, Any]:
+        """Fetch and keep full metadata."""
+        metadata = super().fetch_sheet_metadata(params)
+        if params is None:
+            self.metadata = metadata
+        return metadata
+
+    @property
+    def first_worksheet(self) -> gspread.Worksheet:
+        """First worksheet as it was on open, like `sheet1` but without request."""
+        assert self.metadata is not None
+        properties = self.metadata["sheets"][0]["properties"]
+        return gspread.Worksheet(self, properties, self.id, self.client)
+
+
+def spreadsheet_keys_path() -> Path:
+    """Local cache of spreadsheet keys by title."""
+    return cache_dir() / SPREADSHEET_KEYS_FILE
+
+
+def load_spreadsheet_keys() -> dict[str, str]:
+    """Cached spreadsheet keys by title, empty if no or broken cache."""
     try:
-        spreadsheet = gspread_client.open(sheet)
-        worksheet = spreadsheet.sheet1
-    except gspread.exceptions.SpreadsheetNotFound:
-        print(f"\nGoogle sheet '{sheet}' not found.")
-        sys.exit(1)
-    spreadsheet_locale = spreadsheet.locale
+        keys = json.loads(spreadsheet_keys_path().read_text(encoding="utf8"))
+    except (OSError, ValueError):
+        return {}
+    return keys if isinstance(keys, dict) else {}
+
+
+def save_spreadsheet_key(title: str, key: str) -> None:
+    """Cache the spreadsheet key."""
+    keys = load_spreadsheet_keys()
+    keys[title] = key
+    spreadsheet_keys_path().write_text(json.dumps(keys, indent=2), encoding="utf8")
+
+
+def open_spreadsheet(gspread_client: gspread.Client, title: str) -> MetadataSpreadsheet:
+    """Open spreadsheet by the cached key, search it by title in Google Drive if not cached.
+
+    If the cached spreadsheet was deleted, renamed or is not shared with us anymore
+    we search it by title again.
+    """
+    if key := load_spreadsheet_keys().get(title):
+        try:
+            spreadsheet = MetadataSpreadsheet(gspread_client.http_client, {"id": key})
+            if spreadsheet.title == title:
+                return spreadsheet
+        except gspread.exceptions.APIError as exc:
+            print(
+                f"Cannot open spreadsheet '{title}' by cached key "
+                f"(HTTP {exc.response.status_code}), searching it by title.",
+            )
+    files = gspread_client.list_spreadsheet_files(title)
+    properties = next((file for file in files if file["name"] == title), None)
+    if properties is None:
+        raise gspread.exceptions.SpreadsheetNotFound(title)
+    properties["title"] = properties["name"]  # Drive uses different terminology
+    spreadsheet = MetadataSpreadsheet(gspread_client.http_client, properties)
+    save_spreadsheet_key(title, spreadsheet.id)
+    return spreadsheet
+
+
+def open_google_sheet(
+    sheet: str,
+    gspread_client: gspread.Client | None = None,
+) -> tuple[gspread.Worksheet, ColumnsMapper, list[Any]]:
+    """Open Google Sheet, with the shared `gspread_client` or the new service account client.
+
+    Return worksheet, columns map and the first data row (empty if no data yet).
+    With the cached spreadsheet key that is one metadata request (with the spreadsheet locale)
+    and one values request for the header and the first data row.
+    Numbers are formatted for the spreadsheet locale by GoogleSheetSink.formatter.
+    Raise ValueError if the spreadsheet is not found.
+    """
+    gspread_client = gspread_client or gspread.service_account()
     try:
-        locale.setlocale(locale.LC_NUMERIC, spreadsheet_locale)
-    except Exception as exc:  # noqa: BLE001
-        print(f"Error using the spreadsheet locale '{spreadsheet_locale}':\n{exc}")
-    mapper = ColumnsMapper(worksheet.get("A1:M1")[0])
-    return worksheet, mapper
+        worksheet = open_spreadsheet(gspread_client, sheet).first_worksheet
+    except gspread.exceptions.SpreadsheetNotFound as exc:
+        raise ValueError(f"Google sheet '{sheet}' not found.") from exc
+    header, first_row = read_top_rows(worksheet)
+    return worksheet, ColumnsMapper(header), first_row
+
+
+def read_top_rows(worksheet: gspread.Worksheet) -> tuple[list[Any], list[Any]]:
+    """Read header and the first data row (empty if no data) in one request."""
+    header, first_rows = worksheet.batch_get(
+        ["1:1", f"{FIRST_DATA_ROW}:{FIRST_DATA_ROW}"],  # full rows, any width
+        value_render_option=ValueRenderOption.unformatted,
+        date_time_render_option=DateTimeOption.formatted_string,
+    )
+    return header[0] if header else [], first_rows[0] if first_rows else []
 
 
 def create_day_rows(  # noqa: PLR0913
@@ -170,9 +604,18 @@ def create_day_rows(  # noqa: PLR0913
     gym_days: list[int],
     location_mapper: "LocationMapper",
     activity_mapper: "ActivityMapper",
-) -> list[dict[GarminCol, str | int | float | None]]:
-    """Sheet rows for the day."""
-    gday = daily[day]
+    formulas: bool = True,
+    garmin_day: GarminDay | None = None,
+    formatter: NumberFormatter = DEFAULT_FORMATTER,
+) -> list[DayRow]:
+    """Sheet rows for the day, values are by `GarminCol` index, see ColumnsMapper.row().
+
+    With `formulas` distance and steps are Google Sheet formulas, so you can see how we got them,
+    otherwise they are calculated numbers.
+    If we already have aggregated `garmin_day` we do not get it from `daily`.
+    `formatter` formats numbers in the formulas.
+    """
+    gday = daily[day] if garmin_day is None else garmin_day
     if day.weekday() in gym_days:
         gday.activities.append(
             Activity(
@@ -184,7 +627,10 @@ def create_day_rows(  # noqa: PLR0913
             ),
         )
 
-    rows_fields: list[dict[GarminCol, str | int | float | None]] = []
+    day_str = day.strftime("%Y-%m-%d")
+    week = week_num(day)
+    week_day = sheet_week_day(day)
+    rows_values: list[DayRow] = []
     for activity in gday.activities:
         mapped_sport = activity_mapper.get_activity_name(activity.sport)
 
@@ -194,69 +640,85 @@ def create_day_rows(  # noqa: PLR0913
             activity.location_name or "",
         )
 
-        rows_fields.append(
-            {
-                GarminCol.LOCATION: activity_location,
-                GarminCol.SPORT: mapped_sport,
-                GarminCol.DURATION: round(activity.duration / 60) if activity.duration else "",
-                GarminCol.DATE: day.strftime("%Y-%m-%d"),
-                GarminCol.DISTANCE: (
-                    round(activity.distance / 1000, 2)
-                    if activity.distance
-                    else (
-                        (
-                            f"=({activity.steps}"
-                            f"-{activity.non_walking_steps if activity.non_walking_steps else 0})"
-                            f"*{SPORT_STEP_LENGTH_KM[activity.sport]:.2n}"
-                        )
-                        if activity.sport is not None and activity.sport in SPORT_STEP_LENGTH_KM
-                        else ""
-                    )
-                ),
-                GarminCol.STEPS: (
-                    f"={activity.steps}-{activity.non_walking_steps}"
-                    if activity.non_walking_steps
-                    else f"={activity.steps}"
-                    if activity.sport == WALKING_SPORT
-                    else ""
-                ),
-                GarminCol.COMMENT: activity.comment,
-                GarminCol.WEEK: week_num(day),
-                GarminCol.HOURS: round(activity.duration / 60 / 60, 1) if activity.duration else 0,
-                GarminCol.WEEKDAY: sheet_week_day(day),
-                GarminCol.HR_REST: (
-                    round(gday.hr_rest, 1)
-                    if activity.sport == WALKING_SPORT and gday.hr_rest
-                    else ""
-                ),
-                GarminCol.SLEEP_TIME: (
-                    round(gday.sleep_time, 1)
-                    if activity.sport == WALKING_SPORT and gday.sleep_time
-                    else ""
-                ),
-                GarminCol.VO2_MAX: (
-                    gday.vo2max if activity.sport == WALKING_SPORT and gday.vo2max else ""
-                ),
-            },
-        )
-    return rows_fields
-
-
-def localized_csv_raw(row: list[str | int | float | None]) -> list[str]:
+        walking_steps = (activity.steps or 0) - (activity.non_walking_steps or 0)
+        if activity.distance:
+            distance: str | float = round(activity.distance / 1000, 2)
+        elif activity.sport is not None and activity.sport in SPORT_STEP_LENGTH_KM:
+            distance = (
+                (
+                    f"=({activity.steps}"
+                    f"-{activity.non_walking_steps if activity.non_walking_steps else 0})"
+                    f"*{formatter.format(SPORT_STEP_LENGTH_KM[activity.sport], precision=2)}"
+                )
+                if formulas
+                else round(walking_steps * SPORT_STEP_LENGTH_KM[activity.sport], 2)
+            )
+        else:
+            distance = ""
+        if activity.non_walking_steps:
+            steps: str | int = (
+                f"={activity.steps}-{activity.non_walking_steps}" if formulas else walking_steps
+            )
+        elif activity.sport == WALKING_SPORT:
+            steps = f"={activity.steps}" if formulas else walking_steps
+        else:
+            steps = ""
+
+        is_walking = activity.sport == WALKING_SPORT
+        values: DayRow = [""] * len(GarminCol)
+        values[GarminCol.DATE] = day_str
+        values[GarminCol.DISTANCE] = distance
+        values[GarminCol.STEPS] = steps
+        values[GarminCol.LOCATION] = activity_location
+        values[GarminCol.SPORT] = mapped_sport
+        values[GarminCol.DURATION] = round(activity.duration / 60) if activity.duration else ""
+        values[GarminCol.COMMENT] = activity.comment
+        values[GarminCol.WEEK] = week
+        values[GarminCol.HOURS] = round(activity.duration / 60 / 60, 1) if activity.duration else 0
+        values[GarminCol.WEEKDAY] = week_day
+        if is_walking:
+            values[GarminCol.HR_REST] = round(gday.hr_rest, 1) if gday.hr_rest else ""
+            values[GarminCol.SLEEP_TIME] = round(gday.sleep_time, 1) if gday.sleep_time else ""
+            values[GarminCol.VO2_MAX] = gday.vo2max or ""
+        rows_values.append(values)
+    return rows_values
+
+
+def localized_csv_raw(
+    row: list[str | int | float | None],
+    formatter: NumberFormatter = DEFAULT_FORMATTER,
+) -> list[str]:
     """Convert fields to the Google Sheet locale specific string representation."""
-    return [f"{val:n}" if isinstance(val, float) else str(val) for val in row]
+    return [formatter.format(val) if isinstance(val, float) else str(val) for val in row]
 
 
 @cache
-def fitness_df(fitness: gspread.Worksheet) -> pd.DataFrame:
+def fitness_df(fitness: gspread.Worksheet) -> "pd.DataFrame":
     """Load the Google Sheet as Pandas DataFrame.
 
     Cached so we use it as lazy load - if we do not need it we do not load it.
     """
+    import pandas as pd  # noqa: PLC0415  # slow import, needed only in this rare fallback
+
     print("." * 20, " Reading full Google Sheet into memory for quick search ", "." * 20)
     return pd.DataFrame(fitness.get_all_records()).set_index("Date")
 
 
+def fitness_df_steps(fitness: gspread.Worksheet, days: Iterable[str]) -> dict[str, Any]:
+    """Get first positive steps for the dates from the full Google Sheet.
+
+    Fallback for sheets that we cannot binary search.
+    """
+    result = {}
+    for day in days:
+        steps = fitness_df(fitness)[(fitness_df(fitness).index == day)]["Steps"]
+        steps = steps[steps != ""]
+        steps = steps[steps > 0].values
+        if len(steps) > 0:
+            result[day] = steps[0]
+    return result
+
+
 def sheet_week_day(day: date) -> int:
     """Weekday number for Google Sheet.
 
@@ -265,8 +727,3 @@ def sheet_week_day(day: date) -> int:
     Sunday - 7
     """
     return day.weekday() + 1
-
-
-def week_num(day: date) -> int:
-    """Week number for the sheet (starting from some arbitrary date)."""
-    return int(round((day - date(2013, 1, 13)).days / 7))
@@ -0,0 +1,140 @@
+"""Fast queries over the local store days, see day_store.DayStore.
+
+For example 7 days mean steps for 2024:
+`GarminHistory.load().range(date(2024, 1, 1), date(2024, 12, 31)).rolling_mean("total_steps", 7)`
+"""
+
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from garmin_daily.columns_mapper import WEEKS_START
+from garmin_daily.day_store import DAY_FIELDS, store_path
+from garmin_daily.garmin_aggregations import WALKING_SPORT
+
+ACTIVITY_METRICS = {  # day metric: SQL aggregate over the day activities except daily walking
+    "activities_duration": "SUM(duration)",  # seconds
+    "activities_distance": "SUM(distance)",  # meters
+    "activities_calories": "SUM(calories)",
+}
+METRICS = (*DAY_FIELDS, *ACTIVITY_METRICS)
+
+
+class GarminHistory:
+    """Day metrics as NumPy arrays indexed by the day.
+
+    The arrays are contiguous from `first_day`, the day index is its ordinal minus the first day
+    ordinal, so day lookup and range slicing are O(1). Days missed in the store are NaN.
+    """
+
+    def __init__(self, first_day: date, metrics: dict[str, np.ndarray]) -> None:
+        """Init with the metrics arrays of the same length starting from `first_day`."""
+        self.first_day = first_day
+        self.first_ordinal = first_day.toordinal()
+        self.metrics = metrics
+        self.length = len(next(iter(metrics.values()))) if metrics else 0
+
+    @classmethod
+    def load(cls, account: str | None = None, path: Path | None = None) -> "GarminHistory":
+        """Load the days from the account store file, see day_store.store_path()."""
+        path = path or store_path(account)
+        if not path.exists():
+            raise ValueError(f"No local store '{path}'")
+        db = sqlite3.connect(path)
+        try:
+            days = db.execute(
+                f"SELECT day, {', '.join(DAY_FIELDS)} FROM days ORDER BY day",  # noqa: S608
+            ).fetchall()
+            activities = db.execute(
+                f"SELECT day, {', '.join(ACTIVITY_METRICS.values())} "  # noqa: S608
+                "FROM activities WHERE sport != ? GROUP BY day",
+                (WALKING_SPORT,),
+            ).fetchall()
+        finally:
+            db.close()
+        if not days:
+            return cls(date.today(), {metric: np.empty(0) for metric in METRICS})
+        first_day = date.fromisoformat(days[0][0])
+        length = date.fromisoformat(days[-1][0]).toordinal() - first_day.toordinal() + 1
+        metrics = {metric: np.full(length, np.nan) for metric in METRICS}
+        for rows, names in ((days, DAY_FIELDS), (activities, ACTIVITY_METRICS)):
+            if not rows:
+                continue
+            index = np.array(
+                [date.fromisoformat(row[0]).toordinal() - first_day.toordinal() for row in rows],
+            )
+            values = np.array([row[1:] for row in rows], dtype=float)  # None is NaN
+            for column, name in enumerate(names):
+                metrics[name][index] = values[:, column]
+        return cls(first_day, metrics)
+
+    def __len__(self) -> int:
+        """Days number."""
+        return self.length
+
+    @property
+    def last_day(self) -> date:
+        """The last day."""
+        return date.fromordinal(self.first_ordinal + self.length - 1)
+
+    def index(self, day: date) -> int:
+        """Index of the day in the arrays."""
+        idx = day.toordinal() - self.first_ordinal
+        if not 0 <= idx < self.length:
+            raise KeyError(f"{day} is not in the history")
+        return idx
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        """Metric values for all the days."""
+        return self.metrics[metric]
+
+    def get(self, day: date, metric: str) -> float:
+        """Metric value for the day, NaN if the day has no value."""
+        return float(self.metrics[metric][self.index(day)])
+
+    def range(self, first_day: date, last_day: date) -> "GarminHistory":
+        """The days from `first_day` till `last_day` (including), the arrays are views."""
+        start = max(first_day.toordinal() - self.first_ordinal, 0)
+        stop = min(last_day.toordinal() - self.first_ordinal + 1, self.length)
+        stop = max(stop, start)
+        return GarminHistory(
+            date.fromordinal(self.first_ordinal + start),
+            {metric: values[start:stop] for metric, values in self.metrics.items()},
+        )
+
+    def days(self) -> np.ndarray:
+        """Days ordinals."""
+        return np.arange(self.first_ordinal, self.first_ordinal + self.length)
+
+    def week_nums(self) -> np.ndarray:
+        """Week numbers of the days, as columns_mapper.week_num()."""
+        return np.rint((self.days() - WEEKS_START.toordinal()) / 7).astype(int)
+
+    def rolling_mean(self, metric: str, window: int) -> np.ndarray:
+        """Mean of the days with values in the `window` days ending with the day.
+
+        NaN if all the window days have no value.
+        """
+        values = self.metrics[metric]
+        present = ~np.isnan(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(present)))
+        ends = np.arange(1, self.length + 1)
+        starts = np.maximum(ends - window, 0)
+        window_counts = counts[ends] - counts[starts]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(
+                window_counts > 0,
+                (sums[ends] - sums[starts]) / window_counts,
+                np.nan,
+            )
+
+    def weekly_sum(self, metric: str) -> tuple[np.ndarray, np.ndarray]:
+        """Week numbers and the metric sums for the weeks, days without value are skipped."""
+        if not self.length:
+            return np.empty(0, dtype=int), np.empty(0)
+        weeks = self.week_nums()
+        starts = np.flatnonzero(np.diff(weeks, prepend=weeks[0] - 1))
+        return weeks[starts], np.add.reduceat(np.nan_to_num(self.metrics[metric]), starts)
@@ -0,0 +1,136 @@
+"""Intraday heart rates archive, memory-mapped file per year.
+
+File `heart-rates-<year>.bin` layout:
+- header: magic, format version, year
+- index: (first record, records number) for each day of the year (366 entries)
+- records: (seconds from the day UTC midnight, heart rate) pairs, 5 bytes each
+
+The day records are appended to the file end, so analyses over years read
+zero-copy NumPy views of the mapped files instead of loading JSON lists.
+"""
+
+import mmap
+import struct
+from collections.abc import Iterator
+from datetime import UTC, date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from garmin_daily.cache import cache_dir
+
+HR_ARCHIVE_DIR = "heart-rates"  # next to the day_store.DayStore file, or in cache_dir()
+MAGIC = b"GDHR"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, year
+DAYS_IN_INDEX = 366
+INDEX_DTYPE = np.dtype([("start", "<u4"), ("count", "<u4")])
+RECORD_DTYPE = np.dtype([("offset", "<i4"), ("hr", "u1")])  # offset could be < 0 for UTC+ zones
+RECORDS_OFFSET = HEADER.size + DAYS_IN_INDEX * INDEX_DTYPE.itemsize
+MAX_HR = 255
+
+
+def archive_file(folder: Path, year: int) -> Path:
+    """The year archive file."""
+    return folder / f"heart-rates-{year}.bin"
+
+
+def day_records(day: date, heart_rates: dict[str, Any]) -> np.ndarray:
+    """Records from the Garmin `get_heart_rates` response, samples without HR are skipped."""
+    midnight = int(datetime.combine(day, time(), tzinfo=UTC).timestamp())
+    return np.array(
+        [
+            (timestamp // 1000 - midnight, min(hr, MAX_HR))
+            for timestamp, hr in heart_rates.get("heartRateValues") or []
+            if hr
+        ],
+        dtype=RECORD_DTYPE,
+    )
+
+
+class HeartRateYear:
+    """Read-only memory-mapped archive file of the year."""
+
+    def __init__(self, path: Path) -> None:
+        """Map the file."""
+        with path.open("rb") as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mmap) < RECORDS_OFFSET:
+            raise ValueError(f"Truncated heart rates archive '{path}'")
+        magic, version, self.year = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{path}' is not a heart rates archive version {VERSION}")
+        self.index = np.frombuffer(
+            self.mmap,
+            INDEX_DTYPE,
+            count=DAYS_IN_INDEX,
+            offset=HEADER.size,
+        )
+        self.records = np.frombuffer(
+            self.mmap,
+            RECORD_DTYPE,
+            count=(len(self.mmap) - RECORDS_OFFSET) // RECORD_DTYPE.itemsize,
+            offset=RECORDS_OFFSET,
+        )
+
+    def day(self, day: date) -> np.ndarray:
+        """The day records, a view of the mapped file."""
+        start, count = self.index[day.timetuple().tm_yday - 1]
+        return self.records[start : start + count]
+
+    def days(self) -> list[date]:
+        """Days with records."""
+        first_day = date(self.year, 1, 1)
+        return [first_day + timedelta(days=int(idx)) for idx in np.flatnonzero(self.index["count"])]
+
+
+class HeartRateArchive:
+    """Intraday heart rates of the days in the year archive files."""
+
+    def __init__(self, folder: Path | None = None) -> None:
+        """Archive in the folder, by default in the cache folder."""
+        self.folder = folder or cache_dir() / HR_ARCHIVE_DIR
+
+    def put(self, day: date, heart_rates: dict[str, Any]) -> None:
+        """Store the day heart rates from the Garmin `get_heart_rates` response.
+
+        The day stored again replaces the previous records.
+        """
+        records = day_records(day, heart_rates)
+        path = archive_file(self.folder, day.year)
+        if not path.exists():
+            self.folder.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(
+                HEADER.pack(MAGIC, VERSION, day.year)
+                + np.zeros(DAYS_IN_INDEX, INDEX_DTYPE).tobytes(),
+            )
+        index_pos = HEADER.size + (day.timetuple().tm_yday - 1) * INDEX_DTYPE.itemsize
+        with path.open("r+b") as file:
+            file.seek(index_pos)
+            start, count = np.frombuffer(file.read(INDEX_DTYPE.itemsize), INDEX_DTYPE)[0]
+            if len(records) > count:  # else overwrite the old records in place
+                start = (file.seek(0, 2) - RECORDS_OFFSET) // RECORD_DTYPE.itemsize
+            file.seek(RECORDS_OFFSET + int(start) * RECORD_DTYPE.itemsize)
+            file.write(records.tobytes())
+            file.seek(index_pos)  # after the records for concurrent readers
+            file.write(np.array([(start, len(records))], INDEX_DTYPE).tobytes())
+
+    def year(self, year: int) -> HeartRateYear | None:
+        """Mapped archive of the year, None if there is no archive for the year."""
+        path = archive_file(self.folder, year)
+        return HeartRateYear(path) if path.exists() else None
+
+    def day(self, day: date) -> np.ndarray:
+        """The day records, empty if the day is not archived."""
+        year = self.year(day.year)
+        return np.empty(0, RECORD_DTYPE) if year is None else year.day(day)
+
+    def days(self, first_day: date, last_day: date) -> Iterator[tuple[date, np.ndarray]]:
+        """Archived days from `first_day` till `last_day` (including) with their records."""
+        for year_num in range(first_day.year, last_day.year + 1):
+            if (year := self.year(year_num)) is None:
+                continue
+            for day in year.days():
+                if first_day <= day <= last_day:
+                    yield day, year.day(day)
@@ -1,16 +1,36 @@
 """Export Garmin data to Google Sheet."""
 
+import os
 import sys
-from datetime import date
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
 from enum import IntEnum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import click.core as click_core
 import rich_click as click
 
-from garmin_daily.google_sheet import add_rows_from_garmin, detect_days_to_add, open_google_sheet
-from garmin_daily.mappers import ActivityMapper, LocationMapper
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper
+from garmin_daily.daemon import (
+    DEFAULT_SYNC_TIME,
+    CycleMetrics,
+    Daemon,
+    Schedule,
+    parse_sync_time,
+)
+from garmin_daily.mappers import MappingRules
+from garmin_daily.metrics import REGISTRY
+from garmin_daily.rate_limit import host_rate_limiter
+from garmin_daily.sinks import Sink, open_sink
 from garmin_daily.version import VERSION
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from garmin_daily import DayResponses
+    from garmin_daily.pipeline import StageStats
+
 SHEET_NAME_DEFAULT = "05 Fitness"
 
 
@@ -28,6 +48,18 @@ DAY_TO_ADD_WITHOUT_FORCE = 7  # proof against unknown bugs. to add more days use
 GYM_LOCATION_DEFAULT = "No Limit Gym"
 
 
+def print_rules(rules: MappingRules) -> None:
+    """Show the location and rename rules."""
+    if rules.locations:
+        print("Activity location mappings:")
+        for pattern, location in rules.locations:
+            print(f"  {pattern} -> {location}")
+    if rules.renames:
+        print("Activity rename mappings:")
+        for pattern, new_name in rules.renames:
+            print(f"  {pattern} -> {new_name}")
+
+
 @click.command()
 @click.option(
     "--sheet",
@@ -94,6 +126,17 @@ GYM_LOCATION_DEFAULT = "No Limit Gym"
     ),
     multiple=True,
 )
+@click.option(
+    "--rules",
+    "rules_file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help=(
+        "File with location and rename rules: `pattern = value` lines "
+        "in [locations] and [rename] sections, applied after --locations and --rename. "
+        "In daemon mode the file is reloaded when changed."
+    ),
+)
 @click.option(
     "--force",
     "-f",
@@ -104,6 +147,154 @@ GYM_LOCATION_DEFAULT = "No Limit Gym"
     help=f"Force to add more than {DAY_TO_ADD_WITHOUT_FORCE} days.",
     nargs=1,
 )
+@click.option(
+    "--mirror",
+    "mirror",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help=(
+        "Keep local copy of the Google Sheet to look up manually entered steps, "
+        "and read the sheet again only if it was changed by others."
+    ),
+    nargs=1,
+)
+@click.option(
+    "--store/--no-store",
+    "store",
+    default=True,
+    show_default=True,
+    help=(
+        "Keep the aggregated days and Garmin responses in the local store "
+        "(`days.sqlite` in the cache folder)."
+    ),
+)
+@click.option(
+    "--output",
+    "-o",
+    "output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help=(
+        "Write rows to the file instead of Google Sheet, "
+        "the file type is defined by the extension: .csv, .parquet, .sqlite or .db. "
+        "The rows are appended after the last date in the file."
+    ),
+    nargs=1,
+)
+@click.option(
+    "--accounts",
+    "accounts_file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help=(
+        "Add new days of several Garmin accounts at once, from the INI file "
+        "with a section per account: email, password (or password_env) and sheet or output."
+    ),
+    nargs=1,
+)
+@click.option(
+    "--since",
+    "since",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help=(
+        "Historical mode: add the days from the date (YYYY-MM-DD) till --until, "
+        "with Garmin dates range requests and bulk writes, the days with Garmin responses "
+        "in the local store (see --store) are not requested again. "
+        "Prints the requests and time estimate before start. Does not need --force."
+    ),
+    nargs=1,
+)
+@click.option(
+    "--until",
+    "until",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Last day (YYYY-MM-DD) to add in the historical mode, yesterday by default.",
+    nargs=1,
+)
+@click.option(
+    "--import-export",
+    "import_export",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help=(
+        "Add the days from Garmin Connect account export zip instead of Garmin requests, "
+        "from --since (the export first day by default) till --until (the export last day)."
+    ),
+    nargs=1,
+)
+@click.option(
+    "--workers",
+    "workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Processes to aggregate the days with --import-export, CPU number by default.",
+    nargs=1,
+)
+@click.option(
+    "--daemon",
+    "daemon",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help=(
+        "Keep running and add new days on schedule (see --sync-at), "
+        "keeping Garmin session and Google Sheet open between the syncs."
+    ),
+    nargs=1,
+)
+@click.option(
+    "--sync-at",
+    "sync_at",
+    default=[DEFAULT_SYNC_TIME],
+    show_default=True,
+    help="Local time HH:MM to sync in --daemon mode. Can be repeated.",
+    multiple=True,
+)
+@click.option(
+    "--profile",
+    "profile",
+    is_flag=True,
+    default=False,
+    show_default=True,
+    help=(
+        "Print time spent in Garmin login and requests, aggregation, steps lookup and sheet writes."
+    ),
+    nargs=1,
+)
+@click.option(
+    "--profile-output",
+    "profile_output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Save cProfile stats of all the threads to the file, implies --profile.",
+    nargs=1,
+)
+@click.option(
+    "--trace",
+    "trace",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help=(
+        "Append trace spans (run, day, Garmin requests, aggregation, writes) to the file "
+        "as OpenTelemetry JSON lines."
+    ),
+    nargs=1,
+)
+@click.option(
+    "--metrics-file",
+    "metrics_file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help=(
+        "Write Prometheus metrics (Garmin requests, 401 responses, rate limit pauses, "
+        "rows written, runs duration) to the file at the end of the run or each --daemon sync, "
+        "for node_exporter textfile collector use *.prom name in its directory."
+    ),
+    nargs=1,
+)
 @click.option(
     "--version",
     "version",
@@ -119,7 +310,22 @@ def main(  # noqa: C901,PLR0913,PLR0912,PLR0915
     gym_location: str,
     activity_locations: tuple[str, ...],
     activity_renames: tuple[str, ...],
+    rules_file: Path | None,
     force: bool,
+    mirror: bool,
+    store: bool,
+    output: Path | None,
+    accounts_file: Path | None,
+    since: datetime | None,
+    until: datetime | None,
+    import_export: Path | None,
+    workers: int | None,
+    daemon: bool,
+    sync_at: tuple[str, ...],
+    profile: bool,
+    profile_output: Path | None,
+    trace: Path | None,
+    metrics_file: Path | None,
     version: bool,
 ) -> None:
     """Fill Google sheet with data from Garmin.
@@ -131,6 +337,19 @@ def main(  # noqa: C901,PLR0913,PLR0912,PLR0915
         print(f"{VERSION}")
         sys.exit(0)
 
+    # Google Sheets, Garmin and pandas imports are slow, so import them only if we need them
+    from garmin_daily import GarminDaily  # noqa: PLC0415
+    from garmin_daily.day_store import DayStore  # noqa: PLC0415
+    from garmin_daily.google_sheet import (  # noqa: PLC0415
+        GoogleSheetSink,
+        add_rows_from_garmin,
+        days_to_add_after,
+        detect_days_to_add,
+        open_google_sheet,
+        read_top_rows,
+    )
+    from garmin_daily.sheet_mirror import SheetMirror  # noqa: PLC0415
+
     # Parse activity-location mappings
     location_mappings = []
     if activity_locations:
@@ -152,28 +371,47 @@ def main(  # noqa: C901,PLR0913,PLR0912,PLR0915
             print("Invalid rename format. Use: pattern1=newname1,pattern2=newname2")
             sys.exit(1)
 
+    if accounts_file and (daemon or since or until or import_export or output):
+        print("--accounts cannot be used with --daemon, historical mode or --output.")
+        sys.exit(1)
+
+    if daemon and (since or until or import_export):
+        print("Historical mode (--since, --until, --import-export) cannot be used with --daemon.")
+        sys.exit(1)
+
+    try:
+        schedule = Schedule(tuple(parse_sync_time(value) for value in sync_at))
+        host_rate_limiter()  # the env value error once on start, not on each Garmin request
+    except ValueError as exc:
+        print(exc)
+        sys.exit(1)
+
     gym_location_param = ctx.get_parameter_source("gym_location") if ctx else None
     is_default_gym_location = gym_location_param is click_core.ParameterSource.DEFAULT
     try:
-        location_mapper = LocationMapper(location_mappings, gym_location, is_default_gym_location)
-        activity_mapper = ActivityMapper(activity_rename_mappings)
+        rules = MappingRules(
+            location_mappings,
+            activity_rename_mappings,
+            rules_file,
+            gym_location,
+            is_default_gym_location,
+        )
     except ValueError as exc:
         print(exc)
         sys.exit(1)
 
-    print(f"garmin-daily {VERSION} is going to add Garmin activities to Google Sheet '{sheet}'")
-    if location_mappings:
-        print("Activity location mappings:")
-        for pattern, location in location_mappings:
-            print(f"  {pattern} -> {location}")
-    if activity_rename_mappings:
-        print("Activity rename mappings:")
-        for pattern, new_name in activity_rename_mappings:
-            print(f"  {pattern} -> {new_name}")
+    if accounts_file:
+        target = f"accounts from '{accounts_file}'"
+    elif output:
+        target = f"file '{output}'"
+    else:
+        target = f"Google Sheet '{sheet}'"
+    print(f"garmin-daily {VERSION} is going to add Garmin activities to {target}")
+    print_rules(rules)
 
     filtered_gym_weekdays = [day for day in gym_weekdays if day]
     if (
-        gym_location := location_mapper.get_gym_location()  # type: ignore
+        gym_location := rules.location_mapper.get_gym_location()  # type: ignore
         and filtered_gym_weekdays
     ):
         print(
@@ -181,38 +419,293 @@ def main(  # noqa: C901,PLR0913,PLR0912,PLR0915
             f"on {filtered_gym_weekdays}",
         )
 
-    try:
-        fitness, columns = open_google_sheet(sheet)
-        start_date, days_to_add = detect_days_to_add(fitness, columns)
-    except ValueError as exc:
-        print(f"\nError reading Google Sheet '{sheet}':")
-        print(f"{exc}")
-        print("\nPlease check that your spreadsheet has the required column headers.")
-        print(
-            "Expected headers include: date, distance, steps, location, sport, "
-            "duration, comment, etc.",
-        )
-        sys.exit(1)
-    if days_to_add > DAY_TO_ADD_WITHOUT_FORCE and not force:
-        print(f"\nToo many days to add ({days_to_add}).\nUse --force to confirm.")
-        sys.exit(1)
+    fitness = None
+    first_row: list[Any] = []
+    sheet_mirror = None
+    sink: Sink | None = None
+    day_store: DayStore | None = None
+
+    def days_to_fill(first_row: list[Any]) -> tuple[date, int]:
+        """Start date and days number to add.
+
+        Raise ValueError if the sheet has no columns or date we need.
+        """
+        if sink is not None:
+            last_date = sink.last_date()
+            if last_date is None:  # new file
+                last_date = datetime.now().date() - timedelta(days=DAY_TO_ADD_WITHOUT_FORCE + 1)
+            return days_to_add_after(last_date)
+        return detect_days_to_add(fitness, columns, first_row=first_row)  # type: ignore
 
-    if days_to_add:
-        add_rows_from_garmin(
+    def days_to_fill_or_exit(first_row: list[Any]) -> tuple[date, int]:
+        """Start date and days number to add, exit on the sheet error."""
+        try:
+            return days_to_fill(first_row)
+        except ValueError as exc:
+            print(f"\nError reading Google Sheet '{sheet}':")
+            print(f"{exc}")
+            print("\nPlease check that your spreadsheet has the required column headers.")
+            print(
+                "Expected headers include: date, distance, steps, location, sport, "
+                "duration, comment, etc.",
+            )
+            sys.exit(1)
+
+    def add_days(  # noqa: PLR0913
+        start_date: date,
+        days_to_add: int,
+        days_sink: Sink | None,
+        daily: "GarminDaily | None" = None,
+        *,
+        fetch: "Callable[[date], DayResponses] | None" = None,
+        bulk_days: int = 1,
+        days_workers: int = 1,
+    ) -> "list[StageStats]":
+        """Add the days from Garmin."""
+        if not days_to_add:
+            print(
+                f"Last filled day {start_date}. Nothing to add. "
+                "Add only full days - up to yesterday.",
+            )
+            return []
+        return add_rows_from_garmin(
             fitness=fitness,
             columns=columns,
             start_date=start_date,
             days_to_add=days_to_add,
             gym_days=[PCWeekdays.index(weekday) for weekday in filtered_gym_weekdays],
             gym_duration=gym_duration,
-            location_mapper=location_mapper,
-            activity_mapper=activity_mapper,
+            location_mapper=rules.location_mapper,
+            activity_mapper=rules.activity_mapper,
+            steps_lookup=sheet_mirror,
+            sink=days_sink,
+            daily=daily,
+            fetch=fetch,
+            bulk_days=bulk_days,
+            store=day_store,
+            workers=days_workers,
         )
-    else:
+
+    def backfill(first_row: list[Any]) -> None:  # noqa: C901,PLR0912,PLR0915
+        """Historical mode: add the days from --since till --until."""
+        from garmin_daily.backfill import (  # noqa: PLC0415
+            RANGE_DAYS,
+            RangeFetcher,
+            estimate_backfill,
+        )
+        from garmin_daily.garmin_export import GarminExport  # noqa: PLC0415
+
+        export = None
+        if import_export:
+            try:
+                export = GarminExport(import_export)
+            except ValueError as exc:
+                print(exc)
+                sys.exit(1)
+
+        if sink is not None:
+            last_date = sink.last_date()
+        elif first_row:
+            last_date = days_to_fill_or_exit(first_row)[0] - timedelta(days=1)
+        else:
+            last_date = None  # new sheet
+        if since:
+            first_day = since.date()
+        elif last_date is not None:
+            first_day = last_date + timedelta(days=1)
+            if export is not None:
+                first_day = max(first_day, export.first_day)
+        elif export is not None:
+            first_day = export.first_day
+        else:
+            print("Nothing is added yet, please set the first day to add with --since.")
+            sys.exit(1)
+        yesterday = datetime.now().date() - timedelta(days=1)
+        if until:
+            last_day = until.date()
+        elif export is not None:
+            last_day = min(export.last_day, yesterday)
+        else:
+            last_day = yesterday
+        if last_date is not None and first_day <= last_date:
+            print(
+                f"Days till {last_date} are already added, "
+                f"--since should be after it to keep the dates order.",
+            )
+            sys.exit(1)
+        if last_day > yesterday:
+            print(f"--until should be {yesterday} or earlier, we add only full days.")
+            sys.exit(1)
+        if first_day > last_day:
+            print(f"Nothing to add from {first_day} till {last_day}.")
+            sys.exit(1)
+        days_to_add = (last_day - first_day).days + 1
+        if export is not None:
+            print(
+                f"Import Garmin export '{import_export}' from {first_day} till {last_day}, "
+                f"{days_to_add} days",
+            )
+            add_days(
+                first_day,
+                days_to_add,
+                sink,
+                GarminDaily(),
+                fetch=export,
+                bulk_days=RANGE_DAYS,
+                days_workers=workers or os.cpu_count() or 1,
+            )
+            return
+        daily = GarminDaily()
+        fetcher = RangeFetcher(daily, last_day, day_store)
         print(
-            f"Last filled day {start_date}. Nothing to add. Add only full days - up to yesterday.",
+            f"Historical mode from {first_day} till {last_day}, "
+            f"{estimate_backfill(first_day, days_to_add, day_store, fetcher.limiter)}",
+        )
+        daily.login()
+        add_days(
+            first_day,
+            days_to_add,
+            sink,
+            daily,
+            fetch=fetcher,
+            bulk_days=RANGE_DAYS,
         )
 
+    def sync_accounts() -> None:
+        """Add new days of the accounts from --accounts file."""
+        from garmin_daily import accounts  # noqa: PLC0415
+
+        try:
+            accounts_list = accounts.load_accounts(accounts_file)  # type: ignore[arg-type]
+        except ValueError as exc:
+            print(exc)
+            sys.exit(1)
+        errors = accounts.sync_accounts(
+            accounts_list,
+            accounts.SyncOptions(
+                gym_days=[PCWeekdays.index(weekday) for weekday in filtered_gym_weekdays],
+                gym_duration=gym_duration,
+                rules=rules,
+                max_days=DAY_TO_ADD_WITHOUT_FORCE,
+                force=force,
+                store=store,
+            ),
+        )
+        for name, error in errors.items():
+            print(f"Account '{name}': {'synced' if error is None else f'error: {error}'}")
+        if any(errors.values()):
+            sys.exit(1)
+
+    def write_metrics() -> None:
+        """Write the metrics file if asked."""
+        if metrics_file is None:
+            return
+        try:
+            REGISTRY.write(metrics_file)
+        except OSError as exc:
+            print(f"Cannot write metrics to '{metrics_file}': {exc}")
+
+    with ExitStack() as resources:  # close the output on any exit
+        resources.callback(write_metrics)  # after the output closed
+        if profile or profile_output:
+            from garmin_daily.profiling import Profiler  # noqa: PLC0415
+
+            resources.enter_context(Profiler(profile_output))  # report after the output closed
+        if trace:
+            from garmin_daily import tracing  # noqa: PLC0415
+
+            resources.enter_context(tracing.configure(trace))
+        if accounts_file:
+            sync_accounts()
+            return
+        if store:
+            day_store = resources.enter_context(DayStore())
+        if output:
+            columns = ColumnsMapper(DEFAULT_HEADER)
+            try:
+                sink = resources.enter_context(open_sink(output, columns, DEFAULT_HEADER))
+            except ValueError as exc:
+                print(exc)
+                sys.exit(1)
+        else:
+            try:
+                fitness, columns, first_row = open_google_sheet(sheet)
+            except ValueError as exc:
+                print(f"\n{exc}")
+                sys.exit(1)
+            if mirror:
+                sheet_mirror = SheetMirror(fitness, columns)  # synced on the first lookup
+
+        if since or until or import_export:
+            backfill(first_row)
+            return
+
+        if not daemon:
+            start_date, days_to_add = days_to_fill_or_exit(first_row)
+            if days_to_add > DAY_TO_ADD_WITHOUT_FORCE and not force:
+                print(f"\nToo many days to add ({days_to_add}).\nUse --force to confirm.")
+                sys.exit(1)
+            add_days(start_date, days_to_add, sink)
+            return
+
+        daily = GarminDaily()
+        resources.callback(daily.close)  # the activities index of all the cycles
+        daily.login()
+
+        def reload_rules() -> None:
+            """Apply the rules file changes, keep the previous rules if the file is broken."""
+            try:
+                if rules.reload():
+                    print(f"Rules file '{rules_file}' reloaded.")
+                    print_rules(rules)
+            except ValueError as exc:
+                print(f"{exc}\nKeep the previous rules.")
+
+        def remap_columns(header: list[Any]) -> None:
+            """Rebuild the columns mapper if the sheet columns were changed since the start."""
+            nonlocal columns
+            header_columns = ColumnsMapper(header)
+            if header_columns.row_columns == columns.row_columns:
+                return
+            print("Google Sheet header changed, columns are mapped again.")
+            columns = header_columns
+            if sheet_mirror is not None:
+                sheet_mirror.columns = columns  # the header change reloads the mirror on sync
+
+        def sync(metrics: CycleMetrics) -> None:
+            """Add new days with the open Garmin session and sheet."""
+            try:
+                reload_rules()
+                top_row = first_row
+                if fitness is not None:
+                    header, top_row = read_top_rows(fitness)
+                    remap_columns(header)
+                if sheet_mirror is not None:
+                    sheet_mirror.synced = False  # the sheet could be edited since the last cycle
+                start_date, days_to_add = days_to_fill(top_row)
+                if days_to_add > DAY_TO_ADD_WITHOUT_FORCE and not force:
+                    raise ValueError(
+                        f"Too many days to add ({days_to_add}), use --force to confirm",
+                    )
+                # new sheet sink for each cycle, so its lookup does not keep stale sheet rows
+                days_sink = sink or GoogleSheetSink(fitness, columns, sheet_mirror)  # type: ignore
+                rows_before = days_sink.rows_written
+                stages = add_days(start_date, days_to_add, days_sink, daily)
+                metrics.days_added = stages[-1].items if stages else 0
+                metrics.rows_written = days_sink.rows_written - rows_before
+                metrics.stages = [str(stage) for stage in stages]
+            finally:
+                write_metrics()
+
+        print(f"Daemon mode, sync at {', '.join(sync_at)}. Press Ctrl+C to stop.")
+        runner = Daemon(sync, schedule, refresh=daily.refresh_session)
+        try:
+            runner.run_cycle()  # catch up on start
+            runner.run()
+        except KeyboardInterrupt:
+            runner.stop()
+            print("Stopped.")
+
 
 if __name__ == "__main__":  # pragma: no cover
     main()
@@ -1,8 +1,61 @@
 """Maps activities to locations based on pattern matching."""
 
+import configparser
 import re
+from functools import lru_cache
+from pathlib import Path
 
 GYM_PATTERN = "gym"
+MEMO_SIZE = 1024  # matched names to remember, there are only a few distinct sports
+RULE_GROUP = "_rule"  # named group prefix of the rule in the combined regex
+BACKREFERENCE = re.compile(r"\\[1-9]")  # group numbers change in the combined regex
+LOCATIONS_SECTION = "locations"
+RENAME_SECTION = "rename"
+
+
+class RulesMatcher:
+    """Find the first of the case insensitive regex rules that matches the text.
+
+    The rules are compiled into one regex with the alternative per rule: the rule lookahead
+    and the empty rule group. Alternatives are tried in order at the text start,
+    so the first matching rule wins as if we search the rules one by one.
+    The results are memoized.
+    """
+
+    def __init__(self, patterns: list[str]) -> None:
+        """Compile the patterns."""
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        self.combined = self.combine(patterns)
+        self.match = lru_cache(maxsize=MEMO_SIZE)(self.find_rule)
+
+    @staticmethod
+    def combine(patterns: list[str]) -> re.Pattern[str] | None:
+        """One regex for all the patterns.
+
+        None if we cannot combine them, like patterns with backreferences or inline flags.
+        """
+        if not patterns or any(BACKREFERENCE.search(pattern) for pattern in patterns):
+            return None
+        try:
+            return re.compile(
+                "|".join(
+                    rf"(?=[\s\S]*?(?:{pattern}))(?P<{RULE_GROUP}{idx}>)"
+                    for idx, pattern in enumerate(patterns)
+                ),
+                re.IGNORECASE,
+            )
+        except re.error:
+            return None
+
+    def find_rule(self, text: str) -> int | None:
+        """Index of the first rule that matches the text, None if no one matches."""
+        if self.combined is None:
+            return next(
+                (idx for idx, pattern in enumerate(self.patterns) if pattern.search(text)),
+                None,
+            )
+        match = self.combined.match(text)
+        return None if match is None else int(match.lastgroup[len(RULE_GROUP) :])  # type: ignore[index]
 
 
 class LocationMapper:
@@ -37,16 +90,16 @@ class LocationMapper:
         self.gym_location = gym_locations[0][1] if gym_locations else gym_location
 
         # Now compile patterns
+        self.matcher = RulesMatcher([pattern for pattern, _ in mappings])
         self.mappings = [
-            (re.compile(pattern, re.IGNORECASE), location) for pattern, location in mappings
+            (compiled, location)
+            for compiled, (_, location) in zip(self.matcher.patterns, mappings, strict=True)
         ]
 
     def get_location(self, activity_name: str, default_location: str) -> str:
         """Get location for activity based on matching rules."""
-        for pattern, location in self.mappings:
-            if pattern.search(activity_name):
-                return location
-        return default_location
+        rule = self.matcher.match(activity_name)
+        return default_location if rule is None else self.mappings[rule][1]
 
     def get_gym_location(self) -> str | None:
         """Return configured gym location."""
@@ -58,14 +111,104 @@ class ActivityMapper:
 
     def __init__(self, activity_mappings: list[tuple[str, str]]):
         """Initialize with list of (pattern, new_name) tuples."""
+        self.matcher = RulesMatcher([pattern for pattern, _ in activity_mappings])
         self.mappings = [
-            (re.compile(pattern, re.IGNORECASE), new_name)
-            for pattern, new_name in activity_mappings
+            (compiled, new_name)
+            for compiled, (_, new_name) in zip(
+                self.matcher.patterns,
+                activity_mappings,
+                strict=True,
+            )
         ]
 
     def get_activity_name(self, activity: str | None) -> str | None:
         """Return mapped activity name if pattern matches, otherwise return original."""
-        for pattern, new_name in self.mappings:
-            if isinstance(activity, str) and pattern.search(activity):
-                return new_name
-        return activity
+        if not isinstance(activity, str):
+            return activity
+        rule = self.matcher.match(activity)
+        return activity if rule is None else self.mappings[rule][1]
+
+
+def load_rules(path: Path) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """Location and rename rules from the file, in the file order.
+
+    INI file with `[locations]` and `[rename]` sections of `pattern = value` lines.
+    """
+    parser = configparser.ConfigParser(delimiters=("=",), interpolation=None)
+    parser.optionxform = str  # type: ignore[assignment,method-assign]  # keep patterns case
+    try:
+        with path.open(encoding="utf8") as rules_file:
+            parser.read_file(rules_file)
+    except (OSError, configparser.Error) as exc:
+        raise ValueError(f"Cannot read rules file '{path}': {exc}") from exc
+    if unknown := set(parser.sections()) - {LOCATIONS_SECTION, RENAME_SECTION}:
+        raise ValueError(
+            f"Unknown sections {sorted(unknown)} in rules file '{path}', "
+            f"use [{LOCATIONS_SECTION}] and [{RENAME_SECTION}]",
+        )
+    return (
+        list(parser.items(LOCATIONS_SECTION)) if parser.has_section(LOCATIONS_SECTION) else [],
+        list(parser.items(RENAME_SECTION)) if parser.has_section(RENAME_SECTION) else [],
+    )
+
+
+class MappingRules:
+    """Location and rename mappers from the CLI rules and the rules file.
+
+    The file rules go after the CLI rules.
+    Mappers are compiled on load, `reload()` recompiles them only if the file was changed.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        locations: list[tuple[str, str]],
+        renames: list[tuple[str, str]],
+        path: Path | None = None,
+        gym_location: str | None = None,
+        is_default_gym_location: bool = False,
+    ) -> None:
+        """Load the rules."""
+        self.cli_locations = locations
+        self.cli_renames = renames
+        self.path = path
+        self.gym_location = gym_location
+        self.is_default_gym_location = is_default_gym_location
+        self.mtime: float | None = None
+        self.load()
+
+    def file_mtime(self) -> float | None:
+        """Rules file modification time."""
+        if self.path is None:
+            return None
+        try:
+            return self.path.stat().st_mtime
+        except OSError as exc:
+            raise ValueError(f"Cannot read rules file '{self.path}': {exc}") from exc
+
+    def load(self) -> None:
+        """Load the file and compile the mappers, on error keep the current mappers."""
+        locations, renames = list(self.cli_locations), list(self.cli_renames)
+        mtime = self.file_mtime()
+        if self.path is not None:
+            file_locations, file_renames = load_rules(self.path)
+            locations += file_locations
+            renames += file_renames
+        try:
+            location_mapper = LocationMapper(
+                locations,
+                self.gym_location,
+                self.is_default_gym_location,
+            )
+            activity_mapper = ActivityMapper(renames)
+        except re.error as exc:
+            raise ValueError(f"Wrong rule pattern '{exc.pattern}': {exc}") from exc
+        self.location_mapper, self.activity_mapper = location_mapper, activity_mapper
+        self.locations, self.renames = locations, renames
+        self.mtime = mtime
+
+    def reload(self) -> bool:
+        """Load the rules if the file was changed, True if loaded."""
+        if self.path is None or self.file_mtime() == self.mtime:
+            return False
+        self.load()
+        return True
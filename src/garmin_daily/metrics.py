@@ -0,0 +1,236 @@
+"""Run metrics in Prometheus text format, see `--metrics-file` option.
+
+The file is for node_exporter textfile collector, so we write it atomically.
+Counters are for the process lifetime, Prometheus handles the resets after restarts.
+"""
+
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from garmin_daily.pipeline import StageStats
+
+RUN_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)  # seconds
+
+MetricType = TypeVar("MetricType", bound="Metric")
+
+
+def escape_label(value: str) -> str:
+    """Escape label value for the text format."""
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_value(value: float) -> str:
+    """Sample value in the text format."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric(ABC):
+    """Metric with labeled samples."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        """Init."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+
+    def key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        """Label values in the metric labels order."""
+        if set(labels) != set(self.labels):
+            raise ValueError(f"Metric {self.name} labels are {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def sample(self, suffix: str, key: tuple[str, ...], value: float, **extra: str) -> str:
+        """Sample line."""
+        labels = dict(zip(self.labels, key, strict=True)) | extra
+        labels_text = ",".join(f'{name}="{escape_label(val)}"' for name, val in labels.items())
+        if labels_text:
+            labels_text = f"{{{labels_text}}}"
+        return f"{self.name}{suffix}{labels_text} {format_value(value)}"
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """Sample lines."""
+
+    def render(self) -> str:
+        """Metric in the text format."""
+        with self.lock:
+            samples = self.samples()
+        return "\n".join(
+            [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+            + samples,
+        )
+
+
+class Counter(Metric):
+    """Value that only goes up."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        """Init."""
+        super().__init__(name, documentation, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increase."""
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        """Sample lines."""
+        return [self.sample("", key, value) for key, value in sorted(self.values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the value."""
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    """Observed values counts by buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = RUN_DURATION_BUCKETS,
+    ) -> None:
+        """Init."""
+        super().__init__(name, documentation, labels)
+        self.buckets = (*sorted(buckets), math.inf)
+        self.counts: dict[tuple[str, ...], list[int]] = {}  # per bucket, not cumulative
+        self.sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Add the value."""
+        key = self.key(labels)
+        with self.lock:
+            counts = self.counts.setdefault(key, [0] * len(self.buckets))
+            counts[next(idx for idx, bound in enumerate(self.buckets) if value <= bound)] += 1
+            self.sums[key] = self.sums.get(key, 0) + value
+
+    def samples(self) -> list[str]:
+        """Sample lines."""
+        result = []
+        for key, counts in sorted(self.counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                result.append(self.sample("_bucket", key, cumulative, le=format_value(bound)))
+            result.append(self.sample("_sum", key, self.sums[key]))
+            result.append(self.sample("_count", key, cumulative))
+        return result
+
+
+class Registry:
+    """Metrics to write together."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: MetricType) -> MetricType:
+        """Add the metric."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All the metrics in the text format."""
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Write the metrics file atomically, so the collector never reads half of it."""
+        tmp_path = path.with_name(f"{path.name}.tmp")  # the collector reads only *.prom files
+        tmp_path.write_text(self.render(), encoding="utf8")
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+GARMIN_REQUESTS = REGISTRY.register(
+    Counter(
+        "garmin_daily_garmin_requests_total",
+        "Garmin Connect API responses by endpoint and HTTP status.",
+        ("endpoint", "status"),
+    ),
+)
+GARMIN_UNAUTHORIZED = REGISTRY.register(
+    Counter(
+        "garmin_daily_garmin_unauthorized_total",
+        "Garmin Connect API 401 responses, garminconnect refreshes the session and repeats them.",
+        ("endpoint",),
+    ),
+)
+RATE_LIMIT_SLEEP = REGISTRY.register(
+    Counter(
+        "garmin_daily_rate_limit_sleep_seconds_total",
+        "Time spent in pauses to prevent Garmin Connect API robot protection.",
+    ),
+)
+ROWS_WRITTEN = REGISTRY.register(
+    Counter("garmin_daily_rows_written_total", "Rows written to the output.", ("sink",)),
+)
+DAYS_ADDED = REGISTRY.register(
+    Counter("garmin_daily_days_added_total", "Days added to the output."),
+)
+RUNS = REGISTRY.register(
+    Counter("garmin_daily_runs_total", "Sync runs by result.", ("result",)),
+)
+RUN_DURATION = REGISTRY.register(
+    Histogram("garmin_daily_run_duration_seconds", "Sync run duration."),
+)
+STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "garmin_daily_stage_duration_seconds",
+        "Time the run pipeline stage was busy.",
+        ("stage",),
+    ),
+)
+LAST_RUN = REGISTRY.register(
+    Gauge(
+        "garmin_daily_last_run_timestamp_seconds",
+        "Unix time of the last sync run end by result.",
+        ("result",),
+    ),
+)
+
+
+@contextmanager
+def run_metrics(stages: "list[StageStats]") -> Iterator[None]:
+    """Record the run duration, result, and the `stages` timing after the run."""
+    started = time.perf_counter()
+    result = "error"
+    try:
+        yield
+        result = "success"
+    finally:
+        RUN_DURATION.observe(time.perf_counter() - started)
+        for stage in stages:
+            STAGE_DURATION.observe(stage.busy, stage=stage.name)
+        if stages:
+            DAYS_ADDED.inc(stages[-1].items)
+        RUNS.inc(result=result)
+        LAST_RUN.set(time.time(), result=result)
@@ -0,0 +1,77 @@
+"""Locale specific numbers formatting without the process-wide `locale` state."""
+
+from dataclasses import dataclass
+from functools import cache
+
+# (decimal point, thousands separator) by the locale language
+LANGUAGE_SEPARATORS = {
+    **dict.fromkeys(["en", "zh", "ja", "ko", "he", "hi", "th", "ms", "fil"], (".", ",")),
+    **dict.fromkeys(
+        ["de", "es", "it", "nl", "pt", "id", "tr", "da", "el", "ro", "sr", "hr", "sl", "vi"],
+        (",", "."),
+    ),
+    **dict.fromkeys(
+        ["ru", "uk", "be", "pl", "cs", "sk", "sv", "fi", "nb", "no", "hu", "bg", "lt", "lv"],
+        (",", "\xa0"),
+    ),
+    **dict.fromkeys(["fr", "et", "kk"], (",", " ")),
+}
+# locales that differ from their language
+LOCALE_SEPARATORS = {
+    "de_CH": (".", "’"),
+    "fr_CH": (".", " "),
+    "it_CH": (".", "’"),
+    "es_MX": (".", ","),
+    "es_US": (".", ","),
+    "pt_PT": (",", "\xa0"),
+    "en_ZA": (",", "\xa0"),
+}
+GROUPING = 3
+
+
+@dataclass(frozen=True)
+class NumberFormatter:
+    """Format floats as `f"{val:n}"` does for the locale, but without `locale.setlocale`.
+
+    Immutable so one formatter can be used from many threads.
+    """
+
+    decimal_point: str = "."
+    thousands_sep: str = ""
+
+    @staticmethod
+    @cache
+    def from_locale(locale_name: str) -> "NumberFormatter":
+        """Formatter for the locale like `en_US` or `ru_RU.UTF-8`.
+
+        For unknown locales use "." without thousands separator, as the `C` locale.
+        """
+        name = locale_name.split(".", maxsplit=1)[0].replace("-", "_")
+        separators = LOCALE_SEPARATORS.get(name) or LANGUAGE_SEPARATORS.get(name.split("_")[0])
+        if separators is None:
+            print(f"Unknown spreadsheet locale '{locale_name}', use '.' as decimal point")
+            return NumberFormatter()
+        return NumberFormatter(*separators)
+
+    def format(self, val: float, precision: int | None = None) -> str:
+        """Format like `f"{val:n}"` or `f"{val:.{precision}n}"`."""
+        text = format(val, "g" if precision is None else f".{precision}g")
+        if self.decimal_point == "." and (not self.thousands_sep or -1000 < val < 1000):  # noqa: PLR2004
+            return text  # fast path
+        mantissa, exp_mark, exponent = text.partition("e")
+        integer, point, fraction = mantissa.partition(".")
+        if self.thousands_sep:
+            integer = self.group(integer)
+        return f"{integer}{self.decimal_point if point else ''}{fraction}{exp_mark}{exponent}"
+
+    def group(self, integer: str) -> str:
+        """Insert thousands separators."""
+        sign = integer[0] if integer[0] in "+-" else ""
+        digits = integer[len(sign) :]
+        if len(digits) <= GROUPING or not digits.isdigit():
+            return integer
+        head = len(digits) % GROUPING or GROUPING
+        groups = [digits[:head]] + [
+            digits[idx : idx + GROUPING] for idx in range(head, len(digits), GROUPING)
+        ]
+        return sign + self.thousands_sep.join(groups)
@@ -0,0 +1,75 @@
+"""Aggregate days in worker processes, see `--workers` option.
+
+With local days sources (the export archive, the cache) there are no Garmin requests
+to wait for, and pure Python aggregation becomes the bottleneck of the pipeline.
+"""
+
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from types import TracebackType
+
+from garmin_daily.garmin_aggregations import DayResponses, GarminDaily, GarminDay
+
+CHUNK_DAYS = 28  # days sent to a worker at once, so the processes overhead is small
+CHUNKS_PER_WORKER = 2  # chunks in flight, so memory is bounded whatever the days number
+
+
+def aggregate_chunk(chunk: list[DayResponses]) -> list[GarminDay]:
+    """Worker: aggregate the days."""
+    result = []
+    for responses in chunk:
+        garmin_day = GarminDaily.aggregate(responses)
+        garmin_day.api = None  # type: ignore[assignment]  # do not send the responses back
+        result.append(garmin_day)
+    return result
+
+
+class ParallelAggregator:
+    """Aggregate days in a process pool.
+
+    The days are sent to the workers in chunks of `chunk_days` and the results
+    come in the days order, so the days are written in order as without the pool.
+    Use as context manager, so the workers stop even if the days are not all consumed.
+    """
+
+    def __init__(self, workers: int | None = None, chunk_days: int = CHUNK_DAYS) -> None:
+        """Init, by default a worker per CPU."""
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_days = chunk_days
+        self.pool = ProcessPoolExecutor(self.workers)
+
+    def map(
+        self,
+        days_responses: Iterable[DayResponses],
+    ) -> Iterator[tuple[DayResponses, GarminDay]]:
+        """Aggregated days with their responses."""
+        days_iter = iter(days_responses)
+        in_flight: deque[tuple[list[DayResponses], Future[list[GarminDay]]]] = deque()
+        while chunk := list(islice(days_iter, self.chunk_days)):
+            in_flight.append((chunk, self.pool.submit(aggregate_chunk, chunk)))
+            if len(in_flight) >= self.workers * CHUNKS_PER_WORKER:
+                chunk, future = in_flight.popleft()
+                yield from zip(chunk, future.result(), strict=True)
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            yield from zip(chunk, future.result(), strict=True)
+
+    def close(self) -> None:
+        """Stop the workers, the days not aggregated yet are cancelled."""
+        self.pool.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ParallelAggregator":
+        """Context manager to stop the workers."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop the workers."""
+        self.close()
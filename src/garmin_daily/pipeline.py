@@ -0,0 +1,153 @@
+"""Run processing stages in threads connected with bounded queues."""
+
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+QUEUE_SIZE = 2  # items waiting between stages, so memory is bounded whatever the days number
+POLL_INTERVAL = 0.1  # seconds to check if other stage failed while waiting for a queue
+
+_DONE = object()  # end of items marker
+
+
+@dataclass
+class StageStats:
+    """Stage timing."""
+
+    name: str
+    items: int = 0
+    busy: float = 0.0  # seconds spent processing items
+    idle: float = 0.0  # seconds spent waiting for input or for the next stage (backpressure)
+
+    def __str__(self) -> str:
+        """Show timing."""
+        return f"{self.name} {self.busy:.1f}s ({self.items} items, idle {self.idle:.1f}s)"
+
+
+class Pipeline:
+    """Run stages in threads connected with bounded queues.
+
+    Each stage is a function that gets the result of the previous stage.
+    So the next day fetch from Garmin overlaps writing of the previous days.
+    Items keep the order because each stage has one thread.
+
+    If a stage fails, the stages before it stop, and the stages after it finish
+    the items already passed to them, so the days fetched before the failure are written.
+    Then `run` raises the stage exception.
+    """
+
+    def __init__(
+        self,
+        *stages: tuple[str, Callable[[Any], Any]],
+        queue_size: int = QUEUE_SIZE,
+    ) -> None:
+        """Init."""
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = [StageStats(name) for name, _ in stages]
+        self._error: BaseException | None = None
+        self._failed_stage: int | None = None  # the last failed stage index
+        self._lock = threading.Lock()
+        self._stop = threading.Event()  # stop all the stages
+
+    def run(self, items: Iterable[Any]) -> list[StageStats]:
+        """Pass the items through the stages.
+
+        Returns stages timing.
+        """
+        queues: list[queue.Queue[Any]] = [
+            queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages))
+        ]
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(
+                    idx,
+                    func,
+                    stats,
+                    queues[idx],
+                    queues[idx + 1] if idx + 1 < len(queues) else None,
+                ),
+                name=f"pipeline-{name}",
+                daemon=True,
+            )
+            for idx, ((name, func), stats) in enumerate(zip(self.stages, self.stats, strict=True))
+        ]
+        for thread in threads:
+            thread.start()
+        feeder = -1  # the items source is before the first stage
+        try:
+            for item in items:
+                if not self._put(queues[0], item, feeder):
+                    break
+            self._put(queues[0], _DONE, feeder)
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def _stopped(self, stage: int) -> bool:
+        """The stage should stop: all stopped or a stage after it failed."""
+        return self._stop.is_set() or (
+            self._failed_stage is not None and self._failed_stage > stage
+        )
+
+    def _put(self, to_queue: "queue.Queue[Any]", item: Any, stage: int) -> bool:
+        """Put waiting for the free place, False if the stage should stop."""
+        while not self._stopped(stage):
+            try:
+                to_queue.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, from_queue: "queue.Queue[Any]", stage: int) -> Any:
+        """Get waiting for the item, _DONE if the stage should stop."""
+        while not self._stopped(stage):
+            try:
+                return from_queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_stage(  # noqa: PLR0913
+        self,
+        stage: int,
+        func: Callable[[Any], Any],
+        stats: StageStats,
+        inbox: "queue.Queue[Any]",
+        outbox: "queue.Queue[Any] | None",
+    ) -> None:
+        """Stage thread."""
+        try:
+            while True:
+                started = time.perf_counter()
+                item = self._get(inbox, stage)
+                stats.idle += time.perf_counter() - started
+                if item is _DONE:
+                    break
+                started = time.perf_counter()
+                result = func(item)
+                stats.busy += time.perf_counter() - started
+                stats.items += 1
+                if outbox is not None:
+                    started = time.perf_counter()
+                    self._put(outbox, result, stage)
+                    stats.idle += time.perf_counter() - started
+        except BaseException as exc:  # noqa: BLE001
+            with self._lock:
+                if self._error is None:
+                    self._error = exc
+                self._failed_stage = max(stage, self._failed_stage or 0)
+        finally:
+            if outbox is not None:
+                self._put(outbox, _DONE, stage)
@@ -0,0 +1,212 @@
+"""Per-phase timing of the run, see `--profile` option."""
+
+import cProfile
+import functools
+import inspect
+import json
+import math
+import pstats
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+GARMIN_ENDPOINTS = (
+    "get_steps_data",
+    "get_heart_rates",
+    "get_sleep_data",
+    "get_training_status",
+    "get_activities_by_date",
+)
+# Python 3.12+ cProfile uses sys.monitoring: one profiler sees all the threads,
+# and other profilers cannot be enabled while it is active
+SHARED_CPROFILE = sys.version_info >= (3, 12)
+
+
+def json_size(value: Any) -> int:
+    """Size of the value as JSON, like in the API response."""
+    return len(json.dumps(value, default=str))
+
+
+def sink_classes(base: type) -> list[type]:
+    """Subclasses of the sink base with own `write()`."""
+    return [
+        subclass
+        for cls in base.__subclasses__()
+        for subclass in [cls, *sink_classes(cls)]
+        if "write" in vars(subclass)
+    ]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of not empty values."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+@dataclass
+class Phase:
+    """Calls of one phase."""
+
+    name: str
+    durations: list[float] = field(default_factory=list)  # seconds
+    size: int = 0  # bytes received or sent
+
+    def row(self) -> tuple[str, ...]:
+        """Report table row."""
+        return (
+            self.name,
+            str(len(self.durations)),
+            f"{sum(self.durations):.3f}",
+            f"{percentile(self.durations, 0.5) * 1000:.1f}",
+            f"{percentile(self.durations, 0.95) * 1000:.1f}",
+            str(self.size),
+        )
+
+
+class Profiler:
+    """Time the run phases by wrapping the functions we are interested in.
+
+    Use as context manager: the functions are wrapped on enter and restored on exit.
+    With `cprofile_path` all the threads are profiled with cProfile and the stats
+    are saved to the file on exit, to open with `pstats` or `snakeviz`.
+    Before Python 3.12 each thread gets own cProfile.Profile, see SHARED_CPROFILE.
+    """
+
+    HEADER = ("phase", "count", "total s", "p50 ms", "p95 ms", "bytes")
+
+    def __init__(self, cprofile_path: Path | None = None) -> None:
+        """Init."""
+        self.cprofile_path = cprofile_path
+        self.phases: dict[str, Phase] = {}
+        self.lock = threading.Lock()
+        self.patched: list[tuple[Any, str, Any]] = []  # (owner, name, original)
+        self.profiles: list[cProfile.Profile] = []
+
+    def record(self, name: str, duration: float, size: int = 0) -> None:
+        """Add the phase call."""
+        with self.lock:
+            phase = self.phases.setdefault(name, Phase(name))
+            phase.durations.append(duration)
+            phase.size += size
+
+    def patch(
+        self,
+        owner: Any,
+        name: str,
+        phase: str,
+        size: Callable[[tuple[Any, ...], Any], int] | None = None,
+    ) -> None:
+        """Replace `owner.name` with timed version.
+
+        `size(args, result)` is the phase bytes for the call.
+        Static and class methods stay static and class methods.
+        """
+        attribute = inspect.getattr_static(owner, name)
+        descriptor = type(attribute) if isinstance(attribute, staticmethod | classmethod) else None
+        original = attribute.__func__ if descriptor else attribute
+
+        @functools.wraps(original)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - started
+            self.record(phase, duration, size(args, result) if size else 0)
+            return result
+
+        self.patched.append((owner, name, attribute))
+        setattr(owner, name, descriptor(timed) if descriptor else timed)
+
+    def instrument(self) -> None:
+        """Wrap login, Garmin endpoints, aggregation, steps lookup and the sinks writes."""
+        import garminconnect  # noqa: PLC0415
+
+        from garmin_daily import (  # noqa: PLC0415
+            GarminDaily,
+            GarminDay,
+            google_sheet,  # noqa: PLC0415
+            sinks,
+        )
+
+        self.patch(GarminDaily, "login", "login")
+        for endpoint in GARMIN_ENDPOINTS:
+            self.patch(
+                garminconnect.Garmin,
+                endpoint,
+                f"garmin.{endpoint}",
+                size=lambda _, result: json_size(result),
+            )
+        # GarminDay reads the fetched responses, so only the aggregation takes time
+        self.patch(GarminDaily, "aggregate", "aggregate")
+        self.patch(GarminDay, "aggregate_activities", "aggregate.activities")
+        self.patch(google_sheet, "search_missed_steps_in_sheet", "search_missed_steps_in_sheet")
+        for sink in sink_classes(sinks.Sink):
+            self.patch(
+                sink,
+                "write",
+                f"write.{sink.__name__}",
+                size=lambda args, _: json_size(args[1]),  # (self, rows)
+            )
+
+    def restore(self) -> None:
+        """Restore the wrapped functions."""
+        for owner, name, original in reversed(self.patched):
+            setattr(owner, name, original)
+        self.patched = []
+
+    def _profile_thread(self, *args: Any) -> None:  # noqa: ARG002
+        """Start cProfile in the new thread, see threading.setprofile()."""
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        profile.enable()
+        with self.lock:
+            self.profiles.append(profile)
+
+    def report(self) -> str:
+        """Phases table."""
+        rows = [self.HEADER] + [
+            phase.row() for phase in sorted(self.phases.values(), key=lambda phase: phase.name)
+        ]
+        widths = [max(len(row[col]) for row in rows) for col in range(len(self.HEADER))]
+        return "\n".join(
+            "  ".join(
+                cell.ljust(width) if col == 0 else cell.rjust(width)
+                for col, (cell, width) in enumerate(zip(row, widths, strict=True))
+            )
+            for row in rows
+        )
+
+    def __enter__(self) -> "Profiler":
+        """Start profiling."""
+        self.instrument()
+        if self.cprofile_path is not None:
+            if not SHARED_CPROFILE:
+                threading.setprofile(self._profile_thread)
+            profile = cProfile.Profile()
+            profile.enable()
+            self.profiles.append(profile)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop profiling and print the report."""
+        self.restore()
+        if self.cprofile_path is not None:
+            if not SHARED_CPROFILE:
+                threading.setprofile(None)  # type: ignore[arg-type]
+            self.profiles[0].disable()  # main thread, or all the threads with SHARED_CPROFILE
+            pstats.Stats(*self.profiles).dump_stats(self.cprofile_path)
+        print("Profile:")
+        print(self.report())
+        if self.cprofile_path is not None:
+            print(f"cProfile stats saved to '{self.cprofile_path}'")
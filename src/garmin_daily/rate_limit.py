@@ -0,0 +1,122 @@
+"""Garmin requests budget shared by all garmin-daily processes of the host.
+
+Each run pauses between its own request batches, but several cron jobs or accounts
+together could still trip Garmin robot protection. So with `GARMIN_DAILY_RATE_LIMIT`
+each Garmin request takes a slot from the host budget kept in the file in the cache folder.
+"""
+
+import math
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from struct import Struct
+from typing import BinaryIO
+
+from garmin_daily import metrics
+from garmin_daily.cache import cache_dir
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover  # Windows, the budget is per process
+    fcntl = None  # type: ignore[assignment]
+
+RATE_LIMIT_FILE = "garmin-rate-limit"  # in cache_dir()
+RATE_LIMIT_ENV = "GARMIN_DAILY_RATE_LIMIT"  # requests per minute, not set or 0 to disable
+REQUESTS_PER_MINUTE = 60  # suggested budget
+BURST = 30  # requests without pauses after idle time
+MAX_AHEAD = 24 * 60 * 60  # seconds, budget state further in the future is broken
+STATE = Struct("<d")  # the time the budget is fully spent till (theoretical arrival time)
+
+
+class HostRateLimiter:
+    """Generic cell rate algorithm over the file shared by the processes.
+
+    A request reserves its slot under the `fcntl` lock of the file and waits for
+    the slot after the lock is released. So the processes wait only if together
+    they spent the budget, not for each other's requests.
+    The file is opened on the first request and kept open till close().
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        requests_per_minute: float = REQUESTS_PER_MINUTE,
+        burst: int = BURST,
+    ) -> None:
+        """Init with the budget."""
+        if requests_per_minute <= 0 or burst < 1:
+            raise ValueError(f"Wrong rate limit {requests_per_minute} requests/min, {burst} burst")
+        self.path = path or cache_dir() / RATE_LIMIT_FILE
+        self.interval = 60 / requests_per_minute  # seconds between requests
+        self.burst = burst
+        self.tolerance = (burst - 1) * self.interval
+        self.lock = threading.Lock()  # for the threads, and the only lock if there is no fcntl
+        self.file: BinaryIO | None = None
+
+    def reserve(self, now: float | None = None) -> float:
+        """Reserve the request slot, return seconds to wait for it."""
+        now = time.time() if now is None else now  # wall clock is the same in all processes
+        with self.lock:
+            if self.file is None:
+                self.file = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), "r+b", 0)
+            file = self.file
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                data = file.read(STATE.size)
+                arrival = STATE.unpack(data)[0] if len(data) == STATE.size else now
+                if not math.isfinite(arrival) or arrival > now + MAX_AHEAD:
+                    arrival = now
+                arrival = max(arrival, now)
+                file.seek(0)
+                file.write(STATE.pack(arrival + self.interval))
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+        return max(arrival - self.tolerance - now, 0.0)
+
+    def close(self) -> None:
+        """Close the budget file."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def acquire(self) -> None:
+        """Wait for the request slot."""
+        if wait := self.reserve():
+            time.sleep(wait)
+            metrics.RATE_LIMIT_SLEEP.inc(wait)
+
+
+@lru_cache(maxsize=4)
+def _limiter(requests_per_minute: float, folder: Path) -> HostRateLimiter:
+    """One limiter of the process for the cache folder."""
+    return HostRateLimiter(folder / RATE_LIMIT_FILE, requests_per_minute)
+
+
+def host_rate_limiter(default: float = 0) -> HostRateLimiter | None:
+    """Limiter with the budget from `GARMIN_DAILY_RATE_LIMIT`, None if it is 0.
+
+    If the env var is not set the budget is `default` requests per minute.
+    The process has one limiter for the budget, GarminDaily gets it on init.
+    Raise ValueError if the value is not a number of requests per minute,
+    the CLI checks it on start.
+    """
+    value = os.getenv(RATE_LIMIT_ENV)
+    if not value:
+        return _limiter(default, cache_dir()) if default else None
+    try:
+        requests_per_minute = float(value)
+    except ValueError:
+        requests_per_minute = math.nan
+    if not math.isfinite(requests_per_minute) or requests_per_minute < 0:
+        raise ValueError(
+            f"{RATE_LIMIT_ENV} should be requests per minute (0 to disable), got '{value}'",
+        )
+    if not requests_per_minute:
+        return None
+    return _limiter(requests_per_minute, cache_dir())
@@ -0,0 +1,218 @@
+"""Local SQLite mirror of the fitness Google Sheet for the missed steps lookup."""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import gspread
+from gspread.utils import DateTimeOption, ValueRenderOption
+
+from garmin_daily.cache import cache_dir
+from garmin_daily.columns_mapper import ColumnsMapper, GarminCol, column_letter
+from garmin_daily.google_sheet import FIRST_DATA_ROW
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS rows (
+    seq INTEGER PRIMARY KEY,  -- 1 for the bottom sheet row, so inserts at the top do not shift it
+    date TEXT,
+    steps REAL,
+    cells TEXT  -- JSON list with all the row values
+);
+CREATE INDEX IF NOT EXISTS rows_date ON rows (date);
+"""
+CLOCK_SKEW = 5  # seconds, tolerated difference of the local clock and Google modified times
+
+Row = list[str | int | float]
+
+
+def modified_timestamp(modified: str) -> float:
+    """Seconds since epoch of the Drive modified time like '2024-05-01T10:20:30.123Z'.
+
+    Unknown format is in the future, so the mirror is not stamped with it.
+    """
+    try:
+        return datetime.fromisoformat(modified).timestamp()
+    except ValueError:
+        return float("inf")
+
+
+class SheetMirror:
+    """Local SQLite copy of the worksheet, to look up manually entered steps.
+
+    Rows are numbered from the sheet bottom (`seq`) because we always insert at the top.
+    The rows we insert are read back as values and written through to the mirror
+    (see `rows_inserted`) with the spreadsheet modified time after the insert.
+    So if the modified time did not change since then, the mirror is up to date
+    and we read nothing from the sheet.
+
+    Google does not tell which cells were changed, so any other change (edit anywhere
+    in the sheet, rows added by another app instance) changes the modified time
+    and we reload the whole sheet in one request.
+    The mirror is synced lazily on the first lookup, so runs without lookups do not read the sheet.
+    """
+
+    def __init__(
+        self,
+        fitness: gspread.Worksheet,
+        columns: ColumnsMapper,
+        path: Path | None = None,
+    ) -> None:
+        """Open (create if not exists) the mirror for the worksheet."""
+        self.fitness = fitness
+        self.columns = columns
+        if path is None:
+            path = cache_dir() / f"sheet-{fitness.spreadsheet.id}-{fitness.id}.sqlite"
+        self.path = path
+        self.requests = 0  # number of Google API reads, to see the sync cost
+        self.synced = False  # the mirror was checked to be the same as the sheet
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.executescript(SCHEMA)
+
+    def meta(self, key: str) -> str | None:
+        """Get stored meta value."""
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store meta value."""
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def modified(self) -> str:
+        """Spreadsheet modified time."""
+        self.requests += 1
+        return str(self.fitness.spreadsheet.get_lastUpdateTime())
+
+    def sync(self) -> None:
+        """Reload the mirror if the spreadsheet was modified since the last sync or our insert."""
+        modified = self.modified()
+        if modified != self.meta("modified"):
+            header, rows = self.read_all()
+            self.replace(header, rows)
+            self.set_meta("modified", modified)
+        self.synced = True
+
+    def before_insert(self) -> None:
+        """Check that nobody changed the sheet since the sync, before we insert our rows.
+
+        Otherwise we cannot write our rows through, and the next sync reloads the mirror.
+        """
+        if self.synced and self.modified() != self.meta("modified"):
+            self.synced = False
+
+    def rows_inserted(self, rows: list[Row]) -> None:
+        """Write through the rows we inserted at the sheet top, called right after the insert.
+
+        The rows are read back from the sheet, so the mirror keeps the values
+        as the reload does, and not the locale strings and formulas we inserted.
+        If the mirror was not synced in this run we do not know if it is up to date,
+        so we leave it as is, and the next sync reloads it.
+        The same if the modified time is later than our insert: somebody changed
+        the sheet after it, and the edit should not be stamped as seen.
+        The modified time is read before the rows, so later edits change it.
+        """
+        if not self.synced:
+            return
+        inserted = time.time()
+        modified = self.modified()
+        if modified_timestamp(modified) > inserted + CLOCK_SKEW:
+            self.synced = False
+            return
+        self.prepend(self.read_top(len(rows)))
+        self.set_meta("modified", modified)
+
+    def read_all(self) -> tuple[Row, list[Row]]:
+        """Read header and all data rows in one request."""
+        self.requests += 1
+        width = len(self.columns.row_columns)
+        last_column = column_letter(width - 1)
+        header, rows = self.fitness.batch_get(
+            [f"A1:{last_column}1", f"A{FIRST_DATA_ROW}:{last_column}"],
+            value_render_option=ValueRenderOption.unformatted,
+            date_time_render_option=DateTimeOption.formatted_string,
+        )
+        return (
+            self.pad(header[0] if header else [], width),
+            [self.pad(row, width) for row in rows],
+        )
+
+    def read_top(self, rows_num: int) -> list[Row]:
+        """Read top data rows in one request, as values like read_all()."""
+        self.requests += 1
+        width = len(self.columns.row_columns)
+        last_row = FIRST_DATA_ROW + rows_num - 1
+        (rows,) = self.fitness.batch_get(
+            [f"A{FIRST_DATA_ROW}:{column_letter(width - 1)}{last_row}"],
+            value_render_option=ValueRenderOption.unformatted,
+            date_time_render_option=DateTimeOption.formatted_string,
+        )
+        return [self.pad(row, width) for row in rows]
+
+    @staticmethod
+    def pad(row: list[Any], width: int) -> Row:
+        """Sheets API does not return trailing empty cells."""
+        return list(row) + [""] * (width - len(row))
+
+    def records(self, rows: list[Row], first_seq: int) -> list[tuple[Any, ...]]:
+        """DB records for the rows, the first row gets the biggest seq."""
+        date_idx = self.columns.column_idxs.get(GarminCol.DATE)
+        steps_idx = self.columns.column_idxs.get(GarminCol.STEPS)
+        result = []
+        for row_num, row in enumerate(reversed(rows)):
+            steps = row[steps_idx] if steps_idx is not None else None
+            result.append(
+                (
+                    first_seq + row_num,
+                    str(row[date_idx]) if date_idx is not None else None,
+                    steps if isinstance(steps, (int, float)) else None,
+                    json.dumps(row),
+                ),
+            )
+        return result
+
+    def prepend(self, rows: list[Row]) -> None:
+        """Add rows at the sheet top."""
+        with self.lock, self.db:
+            (max_seq,) = self.db.execute("SELECT COALESCE(MAX(seq), 0) FROM rows").fetchone()
+            self.db.executemany(
+                "INSERT INTO rows (seq, date, steps, cells) VALUES (?, ?, ?, ?)",
+                self.records(rows, max_seq + 1),
+            )
+
+    def replace(self, header: Row, rows: list[Row]) -> None:
+        """Replace all mirrored rows."""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM rows")
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('header', ?)",
+                (json.dumps(header),),
+            )
+        self.prepend(rows)
+
+    def steps(self, days: Iterable[str]) -> dict[str, int]:
+        """Get first positive steps for each of the dates like '2022-02-16'.
+
+        The same as SheetDateLookup.steps but without reading the sheet if it was not modified.
+        """
+        if not self.synced:
+            self.sync()
+        days = list(set(days))
+        result: dict[str, int] = {}
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT date, steps FROM rows WHERE date IN ({', '.join('?' * len(days))}) "  # noqa: S608
+                "AND steps > 0 ORDER BY seq DESC",
+                days,
+            ).fetchall()
+        for day, steps in rows:
+            result.setdefault(day, int(steps))
+        return result
@@ -0,0 +1,268 @@
+"""Outputs for the rows created from Garmin data."""
+
+import csv
+import sqlite3
+from abc import ABC, abstractmethod
+from datetime import date
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from garmin_daily import metrics
+from garmin_daily.columns_mapper import ColumnsMapper, GarminCol
+from garmin_daily.number_formatter import NumberFormatter
+
+SheetRow = list[Any]
+
+# typed outputs columns types, other columns are strings
+COLUMN_TYPES: dict[Any, str] = {
+    GarminCol.DISTANCE: "float64",
+    GarminCol.STEPS: "int64",
+    GarminCol.DURATION: "int64",
+    GarminCol.WEEK: "int64",
+    GarminCol.HOURS: "float64",
+    GarminCol.WEEKDAY: "int64",
+    GarminCol.HR_REST: "float64",
+    GarminCol.SLEEP_TIME: "float64",
+    GarminCol.VO2_MAX: "float64",
+}
+
+
+class Sink(ABC):
+    """Output for the rows created from Garmin data.
+
+    Google Sheet (see google_sheet.GoogleSheetSink) gets locale specific strings and formulas,
+    other sinks get typed values (`typed` is True): numbers, and None for empty cells.
+    """
+
+    typed = True
+
+    def __init__(self, columns: ColumnsMapper) -> None:
+        """Init."""
+        self.columns = columns
+        self.formatter = NumberFormatter()  # for the values we have to format as strings
+        self.rows_written = 0
+        self.bulk_days = 1  # days to collect before writing, see flush()
+        self.pending: list[list[SheetRow]] = []  # prepared rows of the days not written yet
+
+    def write_rows(self, rows: list[SheetRow]) -> None:
+        """Write rows for one day, or collect them till `bulk_days` days."""
+        rows = self.prepare(rows)
+        for row in rows:
+            print("; ".join("" if val is None else str(val) for val in row))
+        self.pending.append(rows)
+        if len(self.pending) >= self.bulk_days:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the collected days with one write."""
+        if not self.pending:
+            return
+        rows = self.merge(self.pending)
+        self.pending = []
+        self.write(rows)
+        self.rows_written += len(rows)
+        metrics.ROWS_WRITTEN.inc(len(rows), sink=type(self).__name__)
+
+    def merge(self, days_rows: list[list[SheetRow]]) -> list[SheetRow]:
+        """Rows of the days (oldest first) in the order to write them at once."""
+        return [row for rows in days_rows for row in rows]
+
+    def prepare(self, rows: list[SheetRow]) -> list[SheetRow]:
+        """Convert rows to the sink format."""
+        return [[None if val == "" else val for val in row] for row in rows]
+
+    @abstractmethod
+    def write(self, rows: list[SheetRow]) -> None:
+        """Write prepared rows."""
+
+    def last_date(self) -> date | None:
+        """Last date in the output, None if empty."""
+        return None
+
+    def close(self) -> None:  # noqa: B027
+        """Flush buffered rows and free resources."""
+
+    def __enter__(self) -> "Sink":
+        """Context manager to close the sink."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Write the collected days and close the sink."""
+        try:
+            self.flush()
+        finally:
+            self.close()
+
+    @property
+    def date_idx(self) -> int:
+        """Index of the date column."""
+        return self.columns.idx(GarminCol.DATE)
+
+
+class CsvSink(Sink):
+    """Append rows to CSV file, with header row if the file is new."""
+
+    def __init__(self, path: Path, columns: ColumnsMapper, header: list[str]) -> None:
+        """Init."""
+        super().__init__(columns)
+        self.path = path
+        self.header = header
+
+    def write(self, rows: list[SheetRow]) -> None:
+        """Append rows."""
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        with self.path.open("a", newline="", encoding="utf8") as csv_file:
+            writer = csv.writer(csv_file)
+            if new_file:
+                writer.writerow(self.header)
+            writer.writerows(rows)
+
+    def last_date(self) -> date | None:
+        """Last date in the file."""
+        if not self.path.exists():
+            return None
+        with self.path.open(newline="", encoding="utf8") as csv_file:
+            reader = csv.reader(csv_file)
+            next(reader, None)  # header
+            dates = [row[self.date_idx] for row in reader if len(row) > self.date_idx]
+        return date.fromisoformat(max(dates)) if dates else None
+
+
+class ParquetSink(Sink):
+    """Collect rows and write them to Parquet file in bulk on close.
+
+    Rows from the existing file are kept.
+    Needs `pyarrow` installed (the `parquet` extra).
+    """
+
+    def __init__(self, path: Path, columns: ColumnsMapper, header: list[str]) -> None:
+        """Init."""
+        try:
+            import pyarrow  # noqa: F401, PLC0415
+        except ImportError as exc:
+            raise ValueError(
+                "Parquet output needs pyarrow: `pip install 'garmin-daily[parquet]'`.",
+            ) from exc
+        super().__init__(columns)
+        self.path = path
+        self.header = header
+        self.rows: list[SheetRow] = []
+
+    def write(self, rows: list[SheetRow]) -> None:
+        """Buffer rows."""
+        self.rows.extend(rows)
+
+    def last_date(self) -> date | None:
+        """Last date in the file and in the buffered rows."""
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        dates = [row[self.date_idx] for row in self.rows]
+        if self.path.exists():
+            table = pq.read_table(self.path, columns=[self.header[self.date_idx]])
+            last = max(table.column(0).to_pylist(), default=None)
+            if last is not None:
+                dates.append(last)
+        return date.fromisoformat(max(dates)) if dates else None
+
+    def schema(self) -> Any:
+        """Arrow schema from the columns types, so it does not depend on the rows values."""
+        import pyarrow as pa  # noqa: PLC0415
+
+        return pa.schema(
+            [
+                (name, pa.type_for_alias(COLUMN_TYPES.get(column, "string")))
+                for name, column in zip(self.header, self.columns.row_columns, strict=True)
+            ],
+        )
+
+    def close(self) -> None:
+        """Write buffered rows with the rows already in the file."""
+        import pyarrow as pa  # noqa: PLC0415
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        if not self.rows:
+            return
+        schema = self.schema()
+        table = pa.Table.from_pylist(
+            [dict(zip(self.header, row, strict=True)) for row in self.rows],
+            schema=schema,
+        )
+        if self.path.exists():
+            table = pa.concat_tables([pq.read_table(self.path).cast(schema), table])
+        pq.write_table(table, self.path)
+        self.rows = []
+
+
+class SqliteSink(Sink):
+    """Insert rows into SQLite table with the header names as columns."""
+
+    def __init__(
+        self,
+        path: Path,
+        columns: ColumnsMapper,
+        header: list[str],
+        table: str = "fitness",
+    ) -> None:
+        """Create the table if not exists."""
+        super().__init__(columns)
+        self.header = header
+        self.table = table
+        self.db = sqlite3.connect(path)
+        columns_sql = ", ".join(self.quote(name) for name in header)
+        with self.db:
+            self.db.execute(f"CREATE TABLE IF NOT EXISTS {self.quote(table)} ({columns_sql})")
+            self.db.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.quote(table + '_date')} "
+                f"ON {self.quote(table)} ({self.quote(header[self.date_idx])})",
+            )
+
+    @staticmethod
+    def quote(name: str) -> str:
+        """Quote SQL identifier."""
+        return '"' + name.replace('"', '""') + '"'
+
+    def write(self, rows: list[SheetRow]) -> None:
+        """Insert rows."""
+        with self.db:
+            self.db.executemany(
+                f"INSERT INTO {self.quote(self.table)} "  # noqa: S608
+                f"VALUES ({', '.join('?' * len(self.header))})",
+                rows,
+            )
+
+    def last_date(self) -> date | None:
+        """Last date in the table."""
+        (last,) = self.db.execute(
+            f"SELECT MAX({self.quote(self.header[self.date_idx])}) "  # noqa: S608
+            f"FROM {self.quote(self.table)}",
+        ).fetchone()
+        return date.fromisoformat(last) if last else None
+
+    def close(self) -> None:
+        """Close DB."""
+        self.db.close()
+
+
+FILE_SINKS: dict[str, type[CsvSink | ParquetSink | SqliteSink]] = {
+    ".csv": CsvSink,
+    ".parquet": ParquetSink,
+    ".sqlite": SqliteSink,
+    ".db": SqliteSink,
+}
+
+
+def open_sink(path: Path, columns: ColumnsMapper, header: list[str]) -> Sink:
+    """Create file sink according to the file extension."""
+    suffix = path.suffix.lower()
+    if suffix not in FILE_SINKS:
+        raise ValueError(
+            f"Unknown output file type '{path.name}', "
+            f"expected one of {', '.join(FILE_SINKS)} extensions.",
+        )
+    return FILE_SINKS[suffix](path, columns, header)
@@ -0,0 +1,442 @@
+"""Seeded synthetic Garmin Connect responses for scale testing.
+
+The days are DayResponses shaped like the real Garmin data: activities, intraday heart rates,
+sleep DTO and 15 minutes steps buckets.
+Each day has own random generator seeded with the dataset seed and the date,
+so any dates range is reproducible without generating the days before it.
+
+    python -m garmin_daily.synthetic days/ --since 2015-01-01 --days 3650
+
+writes the days to the local store `days/days.sqlite` (day_store.DayStore), to replay them
+with ReplayApi.
+"""
+
+import math
+import random
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any
+
+import rich_click as click
+
+from garmin_daily.garmin_aggregations import DayResponses, GarminDaily
+
+UTC_OFFSET = timedelta(hours=1)  # local time of the synthetic user
+HR_INTERVAL = timedelta(minutes=2)
+STEPS_INTERVAL = timedelta(minutes=15)
+WAKE_UP = time(7)
+GO_TO_BED = time(23)
+FIRST_ACTIVITY_ID = 10_000_000_000
+OWNER_ID = 1_000_000
+
+
+@dataclass(frozen=True)
+class SportProfile:
+    """How the sport activities look like."""
+
+    type_id: int
+    name: str  # activity name
+    minutes: tuple[int, int]  # duration range
+    speed: tuple[float, float]  # m/s, zero for the sports without distance
+    cadence: int  # steps per minute, zero for the sports without steps
+    hr: tuple[int, int]  # average heart rate range
+
+
+SPORTS = {
+    "cycling": SportProfile(2, "Bike", (10, 120), (3.5, 8.0), 0, (110, 150)),
+    "running": SportProfile(1, "Run", (20, 90), (2.5, 4.0), 165, (135, 170)),
+    "walking": SportProfile(9, "Walk", (15, 120), (1.1, 1.7), 110, (85, 110)),
+    "lap_swimming": SportProfile(27, "Pool Swim", (20, 60), (0.6, 1.0), 0, (110, 140)),
+    "skate_skiing_ws": SportProfile(171, "Roller Ski", (30, 150), (3.0, 5.5), 0, (120, 155)),
+    "elliptical": SportProfile(25, "Elliptical", (15, 45), (0, 0), 120, (110, 140)),
+    "yoga": SportProfile(43, "Yoga", (20, 75), (0, 0), 0, (70, 100)),
+}
+DEFAULT_SPORT_MIX = {
+    "cycling": 4,
+    "running": 2,
+    "walking": 2,
+    "lap_swimming": 1,
+    "skate_skiing_ws": 1,
+    "yoga": 1,
+}
+
+
+def parse_sport_mix(pairs: tuple[str, ...] | list[str]) -> dict[str, float]:
+    """Sport mix from `sport=weight` pairs."""
+    sport_mix = {}
+    for pair in pairs:
+        sport, _, weight = pair.partition("=")
+        try:
+            sport_mix[sport] = float(weight or 1)
+        except ValueError:
+            raise ValueError(f"Invalid sport weight '{pair}', use sport=weight") from None
+    return sport_mix
+
+
+def poisson(rng: random.Random, mean: float) -> int:
+    """Random number of events with the `mean`, Knuth algorithm."""
+    limit = math.exp(-mean)
+    count = 0
+    product = rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def gmt(moment: datetime) -> datetime:
+    """GMT time for the local `moment`."""
+    return moment - UTC_OFFSET
+
+
+def timestamp_ms(moment: datetime) -> int:
+    """Unix time in ms for the local `moment`."""
+    return int(gmt(moment).replace(tzinfo=UTC).timestamp() * 1000)
+
+
+class DatasetGenerator:
+    """Generate synthetic Garmin days.
+
+    `sport_mix` is sport weights by Garmin activity type key, see SPORTS.
+    `activities_per_day` is the average activities number.
+    `missing_rate` is the probability of each missing part of the day:
+    heart rates, sleep, steps, VO2 max and every intraday heart rate sample.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        sport_mix: dict[str, float] | None = None,
+        activities_per_day: float = 1.0,
+        missing_rate: float = 0.05,
+    ) -> None:
+        """Init."""
+        self.seed = seed
+        self.sport_mix = DEFAULT_SPORT_MIX if sport_mix is None else sport_mix
+        if unknown := set(self.sport_mix) - set(SPORTS):
+            raise ValueError(f"Unknown sports {sorted(unknown)}, known are {sorted(SPORTS)}")
+        weights = self.sport_mix.values()
+        if any(weight < 0 for weight in weights) or sum(weights) <= 0:
+            raise ValueError("Sport weights should be non negative with positive sum")
+        if activities_per_day < 0:
+            raise ValueError("Activities per day cannot be negative")
+        if not 0 <= missing_rate <= 1:
+            raise ValueError("Missing data rate should be from 0 to 1")
+        self.activities_per_day = activities_per_day
+        self.missing_rate = missing_rate
+
+    def rng(self, day: date) -> random.Random:
+        """Random generator of the day."""
+        return random.Random(f"{self.seed}/{day.isoformat()}")  # noqa: S311
+
+    def missing(self, rng: random.Random) -> bool:
+        """The data is missing."""
+        return rng.random() < self.missing_rate
+
+    def days(self, first_day: date, count: int) -> Iterator[DayResponses]:
+        """Days from `first_day`."""
+        for day_num in range(count):
+            yield self.day(first_day + timedelta(days=day_num))
+
+    def day(self, day: date) -> DayResponses:
+        """Garmin responses for the day."""
+        rng = self.rng(day)
+        activities = self.activities(rng, day)
+        return DayResponses(
+            day=day,
+            steps=[] if self.missing(rng) else self.steps(rng, day, activities),
+            heart_rates=self.heart_rates(rng, day, activities),
+            sleep=self.sleep(rng, day),
+            training_status=None if self.missing(rng) else self.training_status(day),
+            activities=activities,
+        )
+
+    def activities(self, rng: random.Random, day: date) -> list[dict[str, Any]]:
+        """Activities of the day, Garmin returns the newest first."""
+        sports = rng.choices(
+            list(self.sport_mix),
+            weights=list(self.sport_mix.values()),
+            k=poisson(rng, self.activities_per_day),
+        )
+        wake_up = datetime.combine(day, WAKE_UP)
+        day_minutes = (GO_TO_BED.hour - WAKE_UP.hour) * 60
+        starts = sorted(
+            wake_up + timedelta(minutes=rng.randrange(day_minutes), seconds=rng.randrange(60))
+            for _ in sports
+        )
+        activities = [
+            self.activity(rng, day, idx, sport, start)
+            for idx, (sport, start) in enumerate(zip(sports, starts, strict=True))
+        ]
+        return activities[::-1]
+
+    @staticmethod
+    def activity(
+        rng: random.Random,
+        day: date,
+        idx: int,
+        sport: str,
+        start: datetime,
+    ) -> dict[str, Any]:
+        """Garmin activity."""
+        profile = SPORTS[sport]
+        duration = rng.uniform(*profile.minutes) * 60
+        moving_duration = duration * rng.uniform(0.85, 1)
+        speed = rng.uniform(*profile.speed)
+        average_hr = rng.randint(*profile.hr)
+        distance = speed * moving_duration if speed else None
+        elevation_gain = rng.uniform(0, distance / 100) if distance else None
+        return {
+            "activityId": FIRST_ACTIVITY_ID + day.toordinal() * 100 + idx,
+            "activityName": profile.name,
+            "activityType": {
+                "isHidden": False,
+                "parentTypeId": 17,
+                "restricted": False,
+                "sortOrder": None,
+                "trimmable": True,
+                "typeId": profile.type_id,
+                "typeKey": sport,
+            },
+            "averageHR": float(average_hr),
+            "averageSpeed": speed or None,
+            "beginTimestamp": timestamp_ms(start),
+            "calories": round(duration / 60 * average_hr / 15),
+            "distance": distance,
+            "duration": duration,
+            "elapsedDuration": duration,
+            "elevationGain": elevation_gain,
+            "elevationLoss": elevation_gain,
+            "locationName": None if distance is None else "Novi Sad",
+            "manufacturer": "GARMIN",
+            "maxHR": float(average_hr + rng.randint(5, 25)),
+            "maxSpeed": speed * rng.uniform(1.1, 1.6) if speed else None,
+            "movingDuration": moving_duration,
+            "ownerId": OWNER_ID,
+            "sportTypeId": profile.type_id,
+            "startTimeGMT": gmt(start).strftime("%Y-%m-%d %H:%M:%S"),
+            "startTimeLocal": start.strftime("%Y-%m-%d %H:%M:%S"),
+            "steps": round(profile.cadence * moving_duration / 60) if profile.cadence else None,
+        }
+
+    @staticmethod
+    def activity_intervals(activities: list[dict[str, Any]]) -> list[tuple[datetime, datetime]]:
+        """Local start and end time of the activities."""
+        intervals = []
+        for activity in activities:
+            start = datetime.strptime(activity["startTimeLocal"], "%Y-%m-%d %H:%M:%S")
+            intervals.append((start, start + timedelta(seconds=activity["duration"])))
+        return intervals
+
+    @staticmethod
+    def resting_hr(day: date) -> int:
+        """Resting heart rate slowly changing with the season."""
+        return round(52 + 4 * math.sin(day.toordinal() * 2 * math.pi / 365))
+
+    def heart_rates(
+        self,
+        rng: random.Random,
+        day: date,
+        activities: list[dict[str, Any]],
+    ) -> dict[str, Any]:
+        """Intraday heart rates."""
+        if self.missing(rng):
+            return {
+                "calendarDate": day.isoformat(),
+                "maxHeartRate": None,
+                "minHeartRate": None,
+                "restingHeartRate": None,
+                "heartRateValues": None,
+            }
+        resting_hr = self.resting_hr(day)
+        intervals = list(zip(self.activity_intervals(activities), activities, strict=True))
+        midnight = datetime.combine(day, time())
+        values: list[list[int | None]] = []
+        moment = midnight
+        while moment < midnight + timedelta(days=1):
+            hr = next(
+                (
+                    int(activity["averageHR"]) + rng.randint(-10, 10)
+                    for (start, end), activity in intervals
+                    if start <= moment < end
+                ),
+                None,
+            )
+            if hr is None:
+                awake = WAKE_UP <= moment.time() < GO_TO_BED
+                hr = resting_hr + (rng.randint(8, 35) if awake else rng.randint(-4, 6))
+            values.append([timestamp_ms(moment), None if self.missing(rng) else hr])
+            moment += HR_INTERVAL
+        measured = [hr for _, hr in values if hr is not None]
+        return {
+            "calendarDate": day.isoformat(),
+            "startTimestampGMT": gmt(midnight).isoformat(),
+            "endTimestampGMT": gmt(moment).isoformat(),
+            "startTimestampLocal": midnight.isoformat(),
+            "endTimestampLocal": moment.isoformat(),
+            "maxHeartRate": max(measured, default=None),
+            "minHeartRate": min(measured, default=None),
+            "restingHeartRate": resting_hr,
+            "heartRateValues": values,
+        }
+
+    def sleep(self, rng: random.Random, day: date) -> dict[str, Any]:
+        """Sleep DTO of the night before the day."""
+        seconds_fields = ("deepSleepSeconds", "lightSleepSeconds", "remSleepSeconds")
+        if self.missing(rng):
+            return {
+                "dailySleepDTO": {
+                    "calendarDate": day.isoformat(),
+                    "sleepTimeSeconds": None,
+                    **dict.fromkeys(seconds_fields),
+                },
+            }
+        sleep_start = datetime.combine(day, GO_TO_BED) - timedelta(
+            days=1,
+            minutes=rng.randint(-60, 60),
+        )
+        sleep_seconds = rng.randint(5 * 60, 9 * 60) * 60
+        awake_seconds = rng.randint(5, 60) * 60
+        deep_seconds = round(sleep_seconds * rng.uniform(0.1, 0.25))
+        rem_seconds = round(sleep_seconds * rng.uniform(0.15, 0.25))
+        sleep_end = sleep_start + timedelta(seconds=sleep_seconds + awake_seconds)
+        return {
+            "dailySleepDTO": {
+                "calendarDate": day.isoformat(),
+                "userProfilePK": OWNER_ID,
+                "sleepTimeSeconds": sleep_seconds,
+                "napTimeSeconds": 0,
+                "sleepStartTimestampGMT": timestamp_ms(sleep_start),
+                "sleepEndTimestampGMT": timestamp_ms(sleep_end),
+                "sleepStartTimestampLocal": timestamp_ms(sleep_start + UTC_OFFSET),
+                "sleepEndTimestampLocal": timestamp_ms(sleep_end + UTC_OFFSET),
+                "unmeasurableSleepSeconds": 0,
+                "deepSleepSeconds": deep_seconds,
+                "lightSleepSeconds": sleep_seconds - deep_seconds - rem_seconds,
+                "remSleepSeconds": rem_seconds,
+                "awakeSleepSeconds": awake_seconds,
+            },
+        }
+
+    def steps(
+        self,
+        rng: random.Random,
+        day: date,
+        activities: list[dict[str, Any]],
+    ) -> list[dict[str, Any]]:
+        """Steps in 15 minutes buckets, activities steps are in the buckets of their start."""
+        activity_steps: dict[datetime, int] = {}
+        for (start, _), activity in zip(
+            self.activity_intervals(activities),
+            activities,
+            strict=True,
+        ):
+            bucket = start.replace(minute=start.minute - start.minute % 15, second=0)
+            activity_steps[bucket] = activity_steps.get(bucket, 0) + (activity["steps"] or 0)
+        buckets = []
+        moment = datetime.combine(day, time())
+        while moment.date() == day:
+            awake = WAKE_UP <= moment.time() < GO_TO_BED
+            steps = (rng.randint(0, 300) if awake else 0) + activity_steps.get(moment, 0)
+            if not awake:
+                level = "sleeping"
+            elif steps > 1000:  # noqa: PLR2004
+                level = "highlyActive"
+            else:
+                level = "active" if steps > 200 else "sedentary"  # noqa: PLR2004
+            buckets.append(
+                {
+                    "startGMT": f"{gmt(moment):%Y-%m-%dT%H:%M:%S}.0",
+                    "endGMT": f"{gmt(moment + STEPS_INTERVAL):%Y-%m-%dT%H:%M:%S}.0",
+                    "steps": steps,
+                    "primaryActivityLevel": level,
+                    "activityLevelConstant": not awake,
+                },
+            )
+            moment += STEPS_INTERVAL
+        return buckets
+
+    @staticmethod
+    def training_status(day: date) -> dict[str, Any]:
+        """Training status with VO2 max slowly changing with the season."""
+        vo2max = round(46 + 2 * math.cos(day.toordinal() * 2 * math.pi / 365), 1)
+        return {
+            "mostRecentVO2Max": {
+                "generic": {"calendarDate": day.isoformat(), "vo2MaxValue": vo2max},
+            },
+        }
+
+
+@click.command()
+@click.argument("output", type=click.Path(file_okay=False, path_type=Path))
+@click.option(
+    "--since",
+    type=click.DateTime(["%Y-%m-%d"]),
+    default="2020-01-01",
+    show_default=True,
+    help="First day.",
+)
+@click.option(
+    "--days",
+    type=click.IntRange(min=1),
+    default=365,
+    show_default=True,
+    help="Number of days.",
+)
+@click.option("--seed", type=int, default=0, show_default=True, help="Random seed.")
+@click.option(
+    "--sport",
+    "sports",
+    multiple=True,
+    help=(
+        "Sport weight in the activities mix as sport=weight, like 'cycling=3'. "
+        f"Known sports: {', '.join(SPORTS)}."
+    ),
+)
+@click.option(
+    "--activities-per-day",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    show_default=True,
+    help="Average number of activities a day.",
+)
+@click.option(
+    "--missing-rate",
+    type=click.FloatRange(0, 1),
+    default=0.05,
+    show_default=True,
+    help="Probability of missing heart rates, sleep, steps or VO2 max.",
+)
+def main(  # noqa: PLR0913
+    output: Path,
+    since: datetime,
+    days: int,
+    seed: int,
+    sports: tuple[str, ...],
+    activities_per_day: float,
+    missing_rate: float,
+) -> None:
+    """Write synthetic Garmin days to the local store file in OUTPUT folder."""
+    from garmin_daily.day_store import STORE_FILE, DayStore  # noqa: PLC0415
+
+    try:
+        generator = DatasetGenerator(
+            seed=seed,
+            sport_mix=parse_sport_mix(sports) if sports else None,
+            activities_per_day=activities_per_day,
+            missing_rate=missing_rate,
+        )
+    except ValueError as exc:
+        print(exc)
+        sys.exit(1)
+    with DayStore(path=output / STORE_FILE) as store:
+        for responses in generator.days(since.date(), days):
+            store.put(GarminDaily.aggregate(responses), responses)
+    print(f"{days} days from {since.date()} are in {output}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,257 @@
+"""Trace spans of the run as OpenTelemetry JSON lines, see `--trace` option.
+
+Each line is OTLP JSON `ExportTraceServiceRequest` with one span, like OpenTelemetry Collector
+file exporter writes, so it can be loaded with `otlpjsonfile` receiver into any trace viewer.
+Tracer is disabled till `configure()`, so the code can always create spans.
+"""
+
+import json
+import secrets
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any
+
+from garmin_daily.version import VERSION
+
+SERVICE_NAME = "garmin-daily"
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_ERROR = 2
+
+
+def otlp_value(value: Any) -> dict[str, Any]:
+    """OTLP JSON attribute value."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # int64 is string in proto3 JSON
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+@dataclass
+class Span:
+    """Timed operation of the run."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start: int  # unix time, ns
+    end: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes."""
+        self.attributes.update(attributes)
+
+    def to_otlp(self) -> dict[str, Any]:
+        """OTLP JSON span."""
+        result: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [
+                {"key": key, "value": otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            "status": {},
+        }
+        if self.parent_id:
+            result["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            result["status"] = {"code": STATUS_CODE_ERROR, "message": self.error}
+        return result
+
+
+class Tracer:
+    """Write finished spans to JSON lines file, does nothing without the file.
+
+    Span without parent starts new trace.
+    `span()` children get the current span of the thread as parent, for the spans that live
+    in several pipeline stages (threads) see ItemSpans.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        """Init."""
+        self.path = path
+        self.file: IO[str] | None = None if path is None else path.open("a", encoding="utf8")
+        self.lock = threading.Lock()
+        self.local = threading.local()  # `stack` of the current spans in the thread
+
+    @property
+    def enabled(self) -> bool:
+        """We write the spans."""
+        return self.file is not None
+
+    def current(self) -> Span | None:
+        """Current span of the thread."""
+        stack = getattr(self.local, "stack", None)
+        return stack[-1] if stack else None
+
+    def start(self, name: str, parent: Span | None = None, **attributes: Any) -> Span | None:
+        """Start span, None if tracing is disabled."""
+        if not self.enabled:
+            return None
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start=time.time_ns(),
+            attributes=attributes,
+        )
+
+    def end(self, span: Span | None, error: BaseException | None = None) -> None:
+        """Finish the span and write it."""
+        if span is None or self.file is None:
+            return
+        span.end = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        line = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [
+                                {"key": "service.name", "value": otlp_value(SERVICE_NAME)},
+                                {"key": "service.version", "value": otlp_value(VERSION)},
+                            ],
+                        },
+                        "scopeSpans": [
+                            {"scope": {"name": SERVICE_NAME}, "spans": [span.to_otlp()]},
+                        ],
+                    },
+                ],
+            },
+        )
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()  # keep the spans if the run is killed
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        parent: Span | None = None,
+        **attributes: Any,
+    ) -> Iterator[Span | None]:
+        """Span for the block, by default child of the current span of the thread."""
+        span = self.start(name, parent or self.current(), **attributes)
+        if span is None:
+            yield None
+            return
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        self.local.stack.append(span)
+        try:
+            yield span
+        except BaseException as exc:
+            self.end(span, exc)
+            raise
+        else:
+            self.end(span)
+        finally:
+            self.local.stack.pop()
+
+    def close(self) -> None:
+        """Close the file."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> "Tracer":
+        """Context manager to close the tracer."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close and disable tracing."""
+        configure(None)
+
+
+class ItemSpans:
+    """Spans of the items (like days) passing pipeline stages in different threads.
+
+    Item span is started with `begin()` in the first stage and ended by the `last` stage
+    or on the stage error, `stage()` spans are its children.
+    Use as context manager in the span that should be the items parent,
+    on exit the items that did not pass all the stages are ended.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Init."""
+        self.name = name
+        self.parent: Span | None = None
+        self.spans: dict[Any, Span | None] = {}
+
+    def begin(self, key: Any, **attributes: Any) -> None:
+        """Start the item span."""
+        self.spans[key] = start(self.name, self.parent, **attributes)
+
+    @contextmanager
+    def stage(self, name: str, key: Any, last: bool = False) -> Iterator[None]:
+        """Stage span for the item."""
+        try:
+            with span(name, parent=self.spans.get(key)):
+                yield
+        except BaseException as exc:
+            end(self.spans.pop(key, None), exc)
+            raise
+        if last:
+            end(self.spans.pop(key, None))
+
+    def __enter__(self) -> "ItemSpans":
+        """The current span is the items parent."""
+        self.parent = tracer.current()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """End the items that did not pass all the stages."""
+        for item_span in self.spans.values():
+            end(item_span, exc)
+        self.spans = {}
+
+
+tracer = Tracer()
+
+
+def configure(path: Path | None) -> Tracer:
+    """Write spans to the file, or disable tracing if `path` is None."""
+    global tracer  # noqa: PLW0603
+    tracer.close()
+    tracer = Tracer(path)
+    return tracer
+
+
+def start(name: str, parent: Span | None = None, **attributes: Any) -> Span | None:
+    """Start span with the configured tracer, see Tracer.start()."""
+    return tracer.start(name, parent, **attributes)
+
+
+def end(span: Span | None, error: BaseException | None = None) -> None:
+    """Finish span with the configured tracer, see Tracer.end()."""
+    tracer.end(span, error)
+
+
+def span(name: str, parent: Span | None = None, **attributes: Any) -> Any:
+    """Span for the block with the configured tracer, see Tracer.span()."""
+    return tracer.span(name, parent, **attributes)
@@ -4,7 +4,9 @@ from pathlib import Path
 
 import pytest
 
+from garmin_daily.cache import CACHE_DIR_ENV, cache_dir
 from garmin_daily.columns_mapper import GarminCol
+from garmin_daily.rate_limit import RATE_LIMIT_ENV
 
 
 def _get_repo_root_dir() -> str:
@@ -82,6 +84,19 @@ garmin_ativities_marked_data = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def local_cache_dir(tmp_path, monkeypatch):
+    """Do not touch the user cache."""
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "cache"))
+    return cache_dir()
+
+
+@pytest.fixture(autouse=True)
+def no_host_rate_limit(monkeypatch):
+    """Mocked Garmin API does not need the host requests budget, see test_rate_limit."""
+    monkeypatch.setenv(RATE_LIMIT_ENV, "0")
+
+
 @pytest.fixture(scope="module", params=garmin_ativities_marked_data)
 def garmin_activity_marked(request):
     return request.param["api_responce"], request.param["test_metadata"]
@@ -0,0 +1,150 @@
+import csv
+import datetime
+from unittest import mock
+
+import gspread
+import pytest
+from click.testing import CliRunner
+
+from garmin_daily import GarminDaily
+from garmin_daily.accounts import Account, SyncOptions, load_accounts, sync_accounts
+from garmin_daily.columns_mapper import DEFAULT_HEADER
+from garmin_daily.day_store import store_path
+from garmin_daily.main import main
+from garmin_daily.mappers import MappingRules
+from garmin_daily.synthetic import DatasetGenerator
+
+ACCOUNTS = """
+[alice]
+email = alice@example.com
+password = alice-password
+sheet = Alice Fitness
+
+[bob]
+email = bob@example.com
+password_env = BOB_GARMIN_PASSWORD
+output = ~/bob.csv
+"""
+
+
+def test_garmin_daily_credentials(monkeypatch):
+    monkeypatch.setenv("GARMIN_EMAIL", "env@example.com")
+    monkeypatch.setenv("GARMIN_PASSWORD", "env-password")
+    alice = GarminDaily("alice@example.com", "alice-password")
+    from_env = GarminDaily()
+    assert (alice.api.username, alice.api.password) == ("alice@example.com", "alice-password")
+    assert (from_env.api.username, from_env.api.password) == ("env@example.com", "env-password")
+    assert alice.api.client is not from_env.api.client
+
+
+def test_load_accounts(tmp_path, monkeypatch):
+    monkeypatch.setenv("BOB_GARMIN_PASSWORD", "bob-password")
+    monkeypatch.setenv("HOME", str(tmp_path))
+    path = tmp_path / "accounts.ini"
+    path.write_text(ACCOUNTS, encoding="utf8")
+    assert load_accounts(path) == [
+        Account("alice", "alice@example.com", "alice-password", sheet="Alice Fitness"),
+        Account("bob", "bob@example.com", "bob-password", output=tmp_path / "bob.csv"),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("accounts", "error"),
+    [
+        (ACCOUNTS, "env var `BOB_GARMIN_PASSWORD` is not set"),
+        ("[alice]\npassword = secret\nsheet = Fitness\n", "needs email and password"),
+        ("[alice]\nemail = a@b.c\npassword = secret\n", "needs sheet or output"),
+        ("[alice]\nemail = a@b.c\npassword = x\nsheet = A\noutput = a.csv\n", "needs sheet or"),
+        ("", "No accounts"),
+        ("email = a@b.c\n", "Cannot read accounts file"),
+    ],
+)
+def test_load_accounts_errors(tmp_path, monkeypatch, accounts, error):
+    monkeypatch.delenv("BOB_GARMIN_PASSWORD", raising=False)
+    path = tmp_path / "accounts.ini"
+    path.write_text(accounts, encoding="utf8")
+    with pytest.raises(ValueError, match=error):
+        load_accounts(path)
+
+
+def fake_garmin_daily(email, password):
+    daily = mock.Mock(aggregate=GarminDaily.aggregate)
+    daily.fetch = DatasetGenerator(seed=len(email)).day
+    daily.sync_activities.return_value = set()
+    if password == "wrong":
+        daily.login.side_effect = ValueError(f"Wrong Garmin Connect login or password for {email}")
+    return daily
+
+
+def test_sync_accounts(tmp_path):
+    accounts = [
+        Account(name, f"{name}@example.com", password, output=tmp_path / f"{name}.csv")
+        for name, password in [("alice", "secret"), ("bob", "wrong"), ("carol", "secret")]
+    ]
+    options = SyncOptions(
+        gym_days=[],
+        gym_duration=30,
+        rules=MappingRules([], []),
+        max_days=3,
+    )
+    with mock.patch("garmin_daily.accounts.GarminDaily", side_effect=fake_garmin_daily) as daily:
+        errors = sync_accounts(accounts, options)
+    assert sorted(call.args for call in daily.call_args_list) == [
+        ("alice@example.com", "secret"),
+        ("bob@example.com", "wrong"),
+        ("carol@example.com", "secret"),
+    ]
+    assert errors["alice"] is None
+    assert errors["carol"] is None
+    assert "bob@example.com" in str(errors["bob"])
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    for name in ("alice", "carol"):
+        with (tmp_path / f"{name}.csv").open(encoding="utf8") as file:
+            assert max(row["date"] for row in csv.DictReader(file)) == yesterday.isoformat()
+        assert store_path(f"{name}@example.com").exists()
+    assert not (tmp_path / "bob.csv").exists()
+
+
+def test_main_accounts(tmp_path):
+    path = tmp_path / "accounts.ini"
+    path.write_text("[alice]\nemail = a@b.c\npassword = x\noutput = alice.csv\n", encoding="utf8")
+    with mock.patch(
+        "garmin_daily.accounts.sync_accounts",
+        return_value={"alice": None, "bob": ValueError("Too many days to add (10)")},
+    ) as mocked_sync:
+        result = CliRunner().invoke(main, ["--accounts", str(path), "--force"])
+    assert result.exit_code == 1
+    assert "Account 'alice': synced" in result.output
+    assert "Account 'bob': error: Too many days to add (10)" in result.output
+    options = mocked_sync.call_args.args[1]
+    assert options.force
+    assert options.store
+
+    result = CliRunner().invoke(main, ["--accounts", str(path), "--daemon"])
+    assert result.exit_code == 1
+    assert "--accounts cannot be used with --daemon" in result.output
+
+
+def test_sync_accounts_sheet_errors():
+    accounts = [
+        Account("alice", "alice@example.com", "secret", sheet="Alice Fitness"),
+        Account("bob", "bob@example.com", "secret", sheet="Bob Fitness"),
+    ]
+    options = SyncOptions(gym_days=[], gym_duration=30, rules=MappingRules([], []), max_days=3)
+
+    def open_spreadsheet(client, title):
+        if title == "Bob Fitness":
+            raise gspread.exceptions.SpreadsheetNotFound(title)
+        return mock.MagicMock()
+
+    with (
+        mock.patch("garmin_daily.accounts.GarminDaily"),
+        mock.patch("garmin_daily.accounts.gspread.service_account"),
+        mock.patch("garmin_daily.google_sheet.open_spreadsheet", side_effect=open_spreadsheet),
+        mock.patch("garmin_daily.google_sheet.read_top_rows", return_value=(DEFAULT_HEADER, [])),
+    ):
+        errors = sync_accounts(accounts, options)
+    assert isinstance(errors["alice"], ValueError)
+    assert "Cannot find last filled date in Google Sheet" in str(errors["alice"])
+    assert isinstance(errors["bob"], ValueError)
+    assert str(errors["bob"]) == "Google sheet 'Bob Fitness' not found."
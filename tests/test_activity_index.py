@@ -0,0 +1,160 @@
+import datetime
+import sqlite3
+from unittest import mock
+
+import pytest
+
+from garmin_daily import GarminDaily
+from garmin_daily.activity_index import PAGE_SIZE, ActivityIndex, activity_day
+from garmin_daily.day_store import DayStore
+from garmin_daily.google_sheet import sync_activities
+from garmin_daily.synthetic import DatasetGenerator
+
+FIRST_DAY = datetime.date(2023, 1, 1)
+DAYS = 30
+
+
+class FakeActivitiesList:
+    """Garmin account activities, newest first as `get_activities` returns them."""
+
+    def __init__(self) -> None:
+        generator = DatasetGenerator(activities_per_day=2, missing_rate=0)
+        self.activities = [
+            activity
+            for responses in generator.days(FIRST_DAY, DAYS)
+            for activity in responses.activities
+        ]
+        self.activities.sort(key=lambda activity: activity["startTimeLocal"], reverse=True)
+        self.requests = 0
+
+    def __call__(self, start: int, limit: int) -> list[dict]:
+        self.requests += 1
+        return self.activities[start : start + limit]
+
+
+def test_sync_pages_till_first_day(tmp_path):
+    account = FakeActivitiesList()
+    index = ActivityIndex("alice", tmp_path / "activities.sqlite")
+    first_day = FIRST_DAY + datetime.timedelta(days=10)
+    synced = [
+        activity
+        for activity in account.activities
+        if activity["startTimeLocal"] >= first_day.isoformat()
+    ]
+    changed = index.sync(account, first_day)
+    assert changed == {activity_day(activity) for activity in synced}
+    assert account.requests == len(synced) // PAGE_SIZE + 1  # with the page before first_day
+    assert index.synced_from() == first_day
+    assert index.covers(first_day)
+    assert not index.covers(first_day - datetime.timedelta(days=1))
+    expected = [
+        activity
+        for activity in account.activities
+        if activity["startTimeLocal"].startswith(first_day.isoformat())
+    ]
+    assert index.activities(first_day) == sorted(
+        expected,
+        key=lambda activity: activity["startTimeLocal"],
+    )
+
+
+def test_sync_stops_on_known_activity(tmp_path):
+    account = FakeActivitiesList()
+    index = ActivityIndex("alice", tmp_path / "activities.sqlite")
+    index.sync(account, FIRST_DAY)
+    account.requests = 0
+    assert index.sync(account, FIRST_DAY + datetime.timedelta(days=DAYS - 3)) == set()
+    assert account.requests == 1
+
+    edited = account.activities[0]
+    edited["activityName"] = "Renamed"
+    new_activity = dict(edited, activityId=edited["activityId"] + 50)
+    account.activities.insert(0, new_activity)
+    account.requests = 0
+    last_day = FIRST_DAY + datetime.timedelta(days=DAYS - 1)
+    assert index.sync(account, FIRST_DAY + datetime.timedelta(days=DAYS - 3)) == {last_day}
+    assert account.requests == 1
+    assert new_activity in index.activities(last_day)
+    assert edited in index.activities(last_day)
+
+
+def test_sync_drops_deleted_activities(tmp_path):
+    account = FakeActivitiesList()
+    index = ActivityIndex("alice", tmp_path / "activities.sqlite")
+    index.sync(account, FIRST_DAY)
+    last_day = FIRST_DAY + datetime.timedelta(days=DAYS - 1)
+    older_day = FIRST_DAY + datetime.timedelta(days=DAYS - 2)
+    older_activities = index.activities(older_day)
+    deleted = [*index.activities(last_day), older_activities[-1]]  # the newest of the older day
+    account.activities = [activity for activity in account.activities if activity not in deleted]
+
+    # the days from complete_from are paged completely, older days still stop on known
+    changed = index.sync(account, FIRST_DAY + datetime.timedelta(days=DAYS - 5), last_day)
+    assert changed == {last_day}
+    assert index.activities(last_day) == []
+    assert index.activities(older_day) == older_activities
+
+    changed = index.sync(account, FIRST_DAY + datetime.timedelta(days=DAYS - 5), older_day)
+    assert changed == {older_day}
+    assert index.activities(older_day) == older_activities[:-1]
+
+
+def test_sync_earlier_than_synced_pages_back(tmp_path):
+    account = FakeActivitiesList()
+    index = ActivityIndex("alice", tmp_path / "activities.sqlite")
+    index.sync(account, FIRST_DAY + datetime.timedelta(days=DAYS - 3))
+    changed = index.sync(account, FIRST_DAY)  # no stop on the known activities
+    assert min(changed) == FIRST_DAY
+    assert index.synced_from() == FIRST_DAY
+
+
+def test_accounts_separated(tmp_path):
+    path = tmp_path / "activities.sqlite"
+    alice = ActivityIndex("alice", path)
+    alice.sync(FakeActivitiesList(), FIRST_DAY)
+    bob = ActivityIndex("bob", path)
+    assert bob.synced_from() is None
+    assert bob.activities(FIRST_DAY) == []
+    assert bob.sync(FakeActivitiesList(), FIRST_DAY)  # the same activities are new for bob
+    alice.close()
+    bob.close()
+
+
+def test_fetch_uses_index(tmp_path):
+    account = FakeActivitiesList()
+    daily = GarminDaily("alice@example.com", "secret")
+    daily.activity_index = ActivityIndex(daily.email, tmp_path / "activities.sqlite")
+    daily.api = mock.MagicMock()
+    daily.api.get_activities.side_effect = account
+    day = FIRST_DAY + datetime.timedelta(days=DAYS - 1)
+    daily.sync_activities(day)
+    responses = daily.fetch(day)
+    daily.api.get_activities_by_date.assert_not_called()
+    assert responses.activities == daily.activity_index.activities(day)
+    daily.fetch(day - datetime.timedelta(days=1))  # before the synced days
+    daily.api.get_activities_by_date.assert_called_once()
+
+
+def test_garmin_daily_closes_index(tmp_path):
+    with GarminDaily("alice@example.com", "secret") as daily:
+        daily.activity_index = index = ActivityIndex(daily.email, tmp_path / "activities.sqlite")
+    assert daily.activity_index is None
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        index.activities(FIRST_DAY)
+
+
+def test_sync_activities_updates_stored_days(tmp_path):
+    account = FakeActivitiesList()
+    daily = GarminDaily("alice@example.com", "secret")
+    daily.activity_index = ActivityIndex(daily.email, tmp_path / "activities.sqlite")
+    daily.api = mock.MagicMock()
+    daily.api.get_activities.side_effect = account
+    last_day = FIRST_DAY + datetime.timedelta(days=DAYS - 1)
+    with DayStore(path=tmp_path / "days.sqlite") as store:
+        responses = DatasetGenerator(activities_per_day=0).day(last_day)
+        store.put(GarminDaily.aggregate(responses), responses)
+        sync_activities(daily, store, last_day + datetime.timedelta(days=1))
+        (stored,) = store.responses(last_day, last_day)
+        assert stored.activities == daily.activity_index.activities(last_day)
+        assert store.activities(last_day) == GarminDaily.aggregate(stored).activities
+        assert store.activities(last_day)
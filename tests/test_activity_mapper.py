@@ -1,4 +1,14 @@
-from garmin_daily.mappers import ActivityMapper
+import os
+import re
+
+import pytest
+
+from garmin_daily.mappers import (
+    ActivityMapper,
+    LocationMapper,
+    MappingRules,
+    load_rules,
+)
 
 
 def test_activity_mapper():
@@ -32,3 +42,82 @@ def test_activity_mapper_pattern_matching():
     assert mapper.get_activity_name("bike ride") == "Cycling"
     assert mapper.get_activity_name("swimming in pool") == "Pool Swimming"
     assert mapper.get_activity_name("just swimming") == "just swimming"
+
+
+def test_activity_mapper_first_rule_wins():
+    # the second rule matches earlier in the text, but the first rule is the first
+    mapper = ActivityMapper(
+        [("bike", "Cycling"), ("road", "Road"), (r"(morning|evening) \w+", "Daily")]
+    )
+    assert mapper.matcher.combined is not None
+    assert mapper.get_activity_name("Road bike") == "Cycling"
+    assert mapper.get_activity_name("Road run") == "Road"
+    assert mapper.get_activity_name("Evening swim") == "Daily"
+    assert mapper.get_activity_name(None) is None
+
+
+@pytest.mark.parametrize("pattern", [r"(ski)\1", "(?i)ski.?ski", "ski[ski"])
+def test_activity_mapper_not_combined(pattern):
+    try:
+        mapper = ActivityMapper([("run", "Running"), (pattern, "Skiing")])
+    except re.error:  # wrong pattern as without the combined regex
+        return
+    assert mapper.matcher.combined is None
+    assert mapper.get_activity_name("skiski") == "Skiing"
+    assert mapper.get_activity_name("run") == "Running"
+
+
+def test_mapper_memoized():
+    mapper = LocationMapper([("swim", "Pool"), ("ski", "Mountains")])
+    for _ in range(3):
+        assert mapper.get_location("Skiing", "Home") == "Mountains"
+        assert mapper.get_location("Walking", "Home") == "Home"
+    assert mapper.matcher.match.cache_info().misses == 2
+
+
+RULES = """
+[locations]
+Running = Park
+(?:roller|skate) ski = Skating track
+
+[rename]
+trail = Roller skiing
+"""
+
+
+def test_load_rules(tmp_path):
+    path = tmp_path / "rules.ini"
+    path.write_text(RULES, encoding="utf8")
+    assert load_rules(path) == (
+        [("Running", "Park"), ("(?:roller|skate) ski", "Skating track")],
+        [("trail", "Roller skiing")],
+    )
+    path.write_text("[location]\nrunning = Park\n", encoding="utf8")
+    with pytest.raises(ValueError, match="Unknown sections"):
+        load_rules(path)
+    with pytest.raises(ValueError, match="Cannot read rules file"):
+        load_rules(tmp_path / "missing.ini")
+
+
+def test_mapping_rules_reload(tmp_path):
+    path = tmp_path / "rules.ini"
+    path.write_text(RULES, encoding="utf8")
+    rules = MappingRules([("swim", "Pool")], [], path)
+    assert rules.locations[0] == ("swim", "Pool")  # CLI rules first
+    assert rules.location_mapper.get_location("Skate skiing", "") == "Skating track"
+    assert rules.activity_mapper.get_activity_name("Trail run") == "Roller skiing"
+    mapper = rules.location_mapper
+    assert not rules.reload()
+    assert rules.location_mapper is mapper
+
+    path.write_text("[locations]\nski = Mountains\n", encoding="utf8")
+    os.utime(path, (rules.mtime + 1, rules.mtime + 1))
+    assert rules.reload()
+    assert rules.location_mapper.get_location("Skate skiing", "") == "Mountains"
+    assert rules.activity_mapper.get_activity_name("Trail run") == "Trail run"
+
+    path.write_text("[locations]\nski[ = Mountains\n", encoding="utf8")
+    os.utime(path, (rules.mtime + 1, rules.mtime + 1))
+    with pytest.raises(ValueError, match="Wrong rule pattern"):
+        rules.reload()
+    assert rules.location_mapper.get_location("Skate skiing", "") == "Mountains"
@@ -0,0 +1,184 @@
+import datetime
+from unittest import mock
+
+from click.testing import CliRunner
+from freezegun import freeze_time
+
+from garmin_daily import DayResponses, GarminDaily
+from garmin_daily.backfill import (
+    DAY_REQUESTS,
+    RANGE_DAYS,
+    REQUEST_TIME,
+    WRITE_TIME,
+    RangeFetcher,
+    estimate_backfill,
+    settled_days,
+)
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper, GarminCol
+from garmin_daily.day_store import DayStore
+from garmin_daily.google_sheet import GoogleSheetSink
+from garmin_daily.main import main
+from garmin_daily.rate_limit import RATE_LIMIT_ENV, REQUESTS_PER_MINUTE, HostRateLimiter
+from garmin_daily.sinks import open_sink
+from garmin_daily.synthetic import DatasetGenerator
+
+
+def day_responses(day):
+    return DayResponses(
+        day=day, steps=[], heart_rates={}, sleep={}, training_status=None, activities=[]
+    )
+
+
+def garmin_api(activities_days):
+    api = mock.MagicMock()
+    api.get_steps_data.return_value = []
+    api.get_heart_rates.return_value = {}
+    api.get_sleep_data.return_value = {}
+    api.get_training_status.return_value = None
+    api.get_activities_by_date.side_effect = lambda start, end, activity_type: [
+        {"startTimeLocal": f"{day} 09:00:00", "activityType": {"typeKey": "running"}}
+        for day in activities_days
+        if start <= day <= end
+    ]
+    return api
+
+
+def store_days(store, *days):
+    for day in days:
+        responses = DatasetGenerator().day(day)
+        store.put(GarminDaily.aggregate(responses), responses)
+
+
+@freeze_time("2023-03-01")
+def test_settled_days(tmp_path):
+    old_day, recent_day = datetime.date(2023, 1, 1), datetime.date(2023, 2, 27)
+    with DayStore(path=tmp_path / "days.sqlite") as store:
+        store_days(store, old_day, recent_day)
+        # Garmin could get more data for the recent day later
+        assert settled_days(store, old_day, recent_day) == {old_day}
+    assert settled_days(None, old_day, recent_day) == set()
+
+
+@freeze_time("2023-03-01")  # and the rate limiter clock
+def test_range_fetcher(local_cache_dir, monkeypatch):
+    monkeypatch.delenv(RATE_LIMIT_ENV)  # the default budget
+    first_day = datetime.date(2023, 1, 1)
+    days = [first_day + datetime.timedelta(days=day_num) for day_num in range(RANGE_DAYS + 2)]
+    daily = mock.MagicMock()
+    daily.api = garmin_api(["2023-01-02", "2023-01-02", "2023-01-30"])
+    store = DayStore(path=local_cache_dir / "days.sqlite")
+    store_days(store, days[0])
+    fetcher = RangeFetcher(daily, days[-1], store)
+    with mock.patch("garmin_daily.rate_limit.time.sleep") as mocked_sleep:
+        responses = [fetcher(day) for day in days]
+    store.close()
+    assert [day_responses.day for day_responses in responses] == days
+    assert responses[0] == DatasetGenerator().day(days[0])  # from the store
+    assert len(responses[1].activities) == 2
+    assert len(responses[29].activities) == 1
+    assert daily.api.get_steps_data.call_count == len(days) - 1
+    assert [call.args[:2] for call in daily.api.get_activities_by_date.call_args_list] == [
+        ("2023-01-02", "2023-01-29"),
+        ("2023-01-30", "2023-01-30"),
+    ]
+    assert fetcher.requests == (len(days) - 1) * DAY_REQUESTS + 2
+    assert fetcher.limiter.interval == 60 / REQUESTS_PER_MINUTE
+    # the clock is frozen, so each request after the burst waits
+    assert mocked_sleep.call_count == fetcher.requests - fetcher.limiter.burst
+
+
+def test_range_fetcher_no_budget(local_cache_dir):
+    assert RangeFetcher(mock.MagicMock(), datetime.date(2023, 1, 1)).limiter is None  # env is 0
+
+
+@freeze_time("2023-03-01")
+def test_estimate_backfill(local_cache_dir):
+    first_day = datetime.date(2022, 1, 1)
+    with DayStore(path=local_cache_dir / "days.sqlite") as store:
+        store_days(store, first_day)
+        estimate = estimate_backfill(first_day, 365, store, HostRateLimiter(burst=30))
+    assert estimate.cached == 1
+    assert estimate.requests == 364 * DAY_REQUESTS + 13
+    assert estimate.writes == 14
+    # one request per second after the burst
+    assert estimate.seconds == estimate.requests - 30 + 14 * WRITE_TIME
+    assert "365 days (1 cached)" in str(estimate)
+    unlimited = estimate_backfill(first_day, 365)
+    assert unlimited.seconds == unlimited.requests * REQUEST_TIME + 14 * WRITE_TIME
+
+
+def test_bulk_write_google_sheet_order():
+    fitness = mock.MagicMock()
+    fitness.spreadsheet.locale = "en_US"
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    sink = GoogleSheetSink(fitness, columns, steps_lookup=mock.MagicMock())
+    sink.bulk_days = 2
+    day1, day2 = ([f"2023-01-0{day}"] + [""] * (len(DEFAULT_HEADER) - 1) for day in (1, 2))
+    with mock.patch("garmin_daily.google_sheet.search_missed_steps_in_sheet"):
+        sink.write_rows([day1])
+        fitness.insert_rows.assert_not_called()
+        sink.write_rows([day2])
+    (rows,), _ = fitness.insert_rows.call_args
+    assert [row[0] for row in rows] == ["2023-01-02", "2023-01-01"]  # newest at the top
+    assert sink.rows_written == 2
+
+
+def test_bulk_write_flushed_on_close(tmp_path):
+    path = tmp_path / "fitness.csv"
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    with open_sink(path, columns, DEFAULT_HEADER) as sink:
+        sink.bulk_days = RANGE_DAYS
+        sink.write_rows([columns.row(["" for _ in GarminCol])])
+        assert not path.exists()
+    assert sink.rows_written == 1
+    assert len(path.read_text(encoding="utf8").splitlines()) == 2
+
+
+@freeze_time("2023-03-01")
+def test_main_since(local_cache_dir):
+    fitness = mock.MagicMock()
+    columns = mock.MagicMock()
+    with (
+        mock.patch("garmin_daily.GarminDaily") as mocked_garmin_daily,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+    ):
+        result = CliRunner().invoke(main, ["--since", "2022-03-01"], catch_exceptions=False)
+    assert result.exit_code == 0, result.output
+    assert "365 days (0 cached)" in result.output
+    kwargs = mocked_add_rows_from_garmin.call_args.kwargs
+    assert kwargs["start_date"] == datetime.date(2022, 3, 1)
+    assert kwargs["days_to_add"] == 365
+    assert kwargs["daily"] is mocked_garmin_daily.return_value
+    assert isinstance(kwargs["fetch"], RangeFetcher)
+    assert kwargs["bulk_days"] == RANGE_DAYS
+
+
+@freeze_time("2023-03-01")
+def test_main_since_wrong_range():
+    with (
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), ["2023-01-10"]),
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            return_value=(datetime.date(2023, 1, 11), 49),
+        ),
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+    ):
+        before_last = CliRunner().invoke(main, ["--since", "2023-01-01"])
+        till_today = CliRunner().invoke(main, ["--until", "2023-03-01"])
+    mocked_add_rows_from_garmin.assert_not_called()
+    assert before_last.exit_code == 1
+    assert "already added" in before_last.output
+    assert till_today.exit_code == 1
+    assert "only full days" in till_today.output
+
+
+def test_main_since_with_daemon():
+    result = CliRunner().invoke(main, ["--daemon", "--since", "2023-01-01"])
+    assert result.exit_code == 1
+    assert "cannot be used with --daemon" in result.output
@@ -1,5 +1,6 @@
 import pytest
-from garmin_daily.columns_mapper import ColumnsMapper, GarminCol
+
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper, GarminCol, column_letter
 
 
 def test_columns_mapper_row_columns(header_row):
@@ -7,13 +8,31 @@ def test_columns_mapper_row_columns(header_row):
     assert mapper.row_columns == header_row[1]["row_columns"]
 
 
-def test_columns_mapper_map(header_row):
-    fields = {
-        GarminCol.DATE: "-date-",
-        GarminCol.DURATION: "-duration-",
-    }
+def test_columns_mapper_row(header_row):
+    values = ["" for _ in GarminCol]
+    values[GarminCol.DATE] = "-date-"
+    values[GarminCol.DURATION] = "-duration-"
     mapper = ColumnsMapper(header_row[0])
-    assert mapper.map(fields) == header_row[1]["row"]
+    assert mapper.row(values) == header_row[1]["row"]
+
+
+@pytest.mark.parametrize(
+    "idx,letter",
+    [(0, "A"), (12, "M"), (25, "Z"), (26, "AA"), (51, "AZ"), (52, "BA"), (701, "ZZ"), (702, "AAA")],
+)
+def test_column_letter(idx, letter):
+    assert column_letter(idx) == letter
+
+
+def test_columns_mapper_wide_sheet():
+    header = [f"extra {idx}" for idx in range(30)] + ["Steps", "Date"]
+    mapper = ColumnsMapper(header)
+    assert mapper[GarminCol.STEPS] == "AE"
+    assert mapper[GarminCol.DATE] == "AF"
+    values = [column.name for column in GarminCol]
+    assert mapper.row(values) == [""] * 30 + ["STEPS", "DATE"]
+    assert ColumnsMapper(["date"]).row(values) == ["DATE"]
+    assert ColumnsMapper(DEFAULT_HEADER).row(values) == values
 
 
 def test_columns_mapper_idx(header_row):
@@ -0,0 +1,214 @@
+import datetime
+import os
+from unittest import mock
+
+import pytest
+from click.testing import CliRunner
+
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper, GarminCol
+from garmin_daily.daemon import CycleMetrics, Daemon, Schedule, parse_sync_time
+from garmin_daily.main import main
+from garmin_daily.pipeline import StageStats
+
+
+def test_schedule_next_run():
+    schedule = Schedule((parse_sync_time("00:30"), parse_sync_time("12:00")))
+    day = datetime.date(2023, 1, 10)
+    assert schedule.next_run(datetime.datetime(2023, 1, 10, 0, 10)) == datetime.datetime.combine(
+        day, datetime.time(0, 30)
+    )
+    assert schedule.next_run(datetime.datetime(2023, 1, 10, 0, 30)) == datetime.datetime.combine(
+        day, datetime.time(12, 0)
+    )
+    assert schedule.next_run(datetime.datetime(2023, 1, 10, 13, 0)) == datetime.datetime(
+        2023, 1, 11, 0, 30
+    )
+
+
+def test_parse_sync_time_error():
+    with pytest.raises(ValueError, match="Wrong sync time"):
+        parse_sync_time("25:00")
+
+
+def test_daemon_cycles_and_refresh():
+    calls = []
+    refreshes = []
+
+    def sync(metrics):
+        calls.append(metrics)
+        if len(calls) == 1:
+            raise RuntimeError("-fail-")
+        metrics.days_added = 1
+
+    # always just before the scheduled time
+    clock = mock.MagicMock(return_value=datetime.datetime(2023, 1, 10, 0, 29, 59, 990000))
+    daemon = Daemon(
+        sync,
+        Schedule((datetime.time(0, 30),)),
+        refresh=lambda: refreshes.append(1),
+        refresh_interval=0.001,
+        clock=clock,
+    )
+    daemon.run(max_cycles=3)
+    assert [cycle.error for cycle in daemon.cycles] == ["-fail-", None, None]
+    assert daemon.cycles[1].days_added == 1
+    assert refreshes
+    assert "1 days" in str(daemon.cycles[1])
+
+
+def test_daemon_stop():
+    daemon = Daemon(lambda metrics: None, Schedule((datetime.time(0, 30),)))
+    daemon.stop()
+    daemon.run()
+    assert daemon.cycles == []
+
+
+def test_main_daemon():
+    fitness = mock.MagicMock()
+    fitness.spreadsheet.locale = "en_US"
+    columns = mock.MagicMock()
+    with (
+        mock.patch("garmin_daily.GarminDaily") as mocked_garmin_daily,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
+        mock.patch("garmin_daily.google_sheet.read_top_rows", return_value=([], [])),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            return_value=(datetime.date(2023, 1, 1), 2),
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.add_rows_from_garmin",
+            return_value=[StageStats("write", items=2)],
+        ) as mocked_add_rows_from_garmin,
+        mock.patch.object(Daemon, "run") as mocked_run,
+    ):
+        result = CliRunner().invoke(
+            main, ["--daemon", "--sync-at", "01:15"], catch_exceptions=False
+        )
+    assert result.exit_code == 0, result.output
+    mocked_garmin_daily.return_value.login.assert_called_once()
+    kwargs = mocked_add_rows_from_garmin.call_args.kwargs
+    assert kwargs["daily"] is mocked_garmin_daily.return_value
+    assert kwargs["sink"] is not None
+    mocked_run.assert_called_once()
+    assert "2 days" in result.output
+
+
+def test_main_daemon_wrong_time():
+    result = CliRunner().invoke(main, ["--daemon", "--sync-at", "1am"])
+    assert result.exit_code == 1
+    assert "Wrong sync time" in result.output
+
+
+def test_cycle_metrics_str():
+    metrics = CycleMetrics(started=datetime.datetime(2023, 1, 1), error="-err-")
+    assert "error: -err-" in str(metrics)
+
+
+def test_main_daemon_reloads_rules(tmp_path):
+    rules_path = tmp_path / "rules.ini"
+    rules_path.write_text("[locations]\nrunning = Park\n", encoding="utf8")
+    locations = []
+
+    def add_rows_from_garmin(**kwargs):
+        locations.append(kwargs["location_mapper"].get_location("running", "Home"))
+        return []
+
+    def run(daemon):
+        daemon.sync(CycleMetrics(datetime.datetime.now()))
+        mtime = rules_path.stat().st_mtime
+        rules_path.write_text("[locations]\nrunning = Stadium\n", encoding="utf8")
+        os.utime(rules_path, (mtime + 1, mtime + 1))
+        daemon.sync(CycleMetrics(datetime.datetime.now()))
+        rules_path.write_text("[locations]\nrunning[ = Track\n", encoding="utf8")
+        os.utime(rules_path, (mtime + 2, mtime + 2))
+        daemon.sync(CycleMetrics(datetime.datetime.now()))
+
+    with (
+        mock.patch("garmin_daily.GarminDaily"),
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), []),
+        ),
+        mock.patch("garmin_daily.google_sheet.read_top_rows", return_value=([], [])),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            return_value=(datetime.date(2023, 1, 1), 1),
+        ),
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin", add_rows_from_garmin),
+        mock.patch.object(Daemon, "run", autospec=True, side_effect=run),
+    ):
+        result = CliRunner().invoke(
+            main, ["--daemon", "--rules", str(rules_path)], catch_exceptions=False
+        )
+    assert result.exit_code == 0, result.output
+    assert locations == ["Park", "Park", "Stadium", "Stadium"]  # the first is catch up on start
+    assert "reloaded" in result.output
+    assert "Keep the previous rules" in result.output
+
+
+def test_main_daemon_sheet_error_does_not_stop():
+    def run(daemon):
+        daemon.run_cycle()
+
+    with (
+        mock.patch("garmin_daily.GarminDaily"),
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), []),
+        ),
+        mock.patch("garmin_daily.google_sheet.read_top_rows", return_value=([], [])),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            side_effect=[
+                ValueError("Cannot find last filled date"),
+                (datetime.date(2023, 1, 1), 1),
+            ],
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.add_rows_from_garmin",
+            return_value=[StageStats("write", items=1)],
+        ),
+        mock.patch.object(Daemon, "run", autospec=True, side_effect=run),
+    ):
+        result = CliRunner().invoke(main, ["--daemon"], catch_exceptions=False)
+    assert result.exit_code == 0, result.output
+    assert "error: Cannot find last filled date" in result.output
+    assert "1 days" in result.output
+
+
+def test_main_daemon_header_changed():
+    header = list(DEFAULT_HEADER)
+    moved_header = header[1:] + header[:1]
+    columns = []
+
+    def add_rows_from_garmin(**kwargs):
+        columns.append(kwargs["columns"])
+        return []
+
+    def run(daemon):
+        daemon.sync(CycleMetrics(datetime.datetime.now()))
+
+    with (
+        mock.patch("garmin_daily.GarminDaily"),
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), ColumnsMapper(header), []),
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.read_top_rows",
+            side_effect=[(header, []), (moved_header, [])],
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            return_value=(datetime.date(2023, 1, 1), 1),
+        ),
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin", add_rows_from_garmin),
+        mock.patch.object(Daemon, "run", autospec=True, side_effect=run),
+    ):
+        result = CliRunner().invoke(main, ["--daemon"], catch_exceptions=False)
+    assert result.exit_code == 0, result.output
+    assert "header changed" in result.output
+    assert columns[0].idx(GarminCol.DATE) == header.index("date")
+    assert columns[1].idx(GarminCol.DATE) == moved_header.index("date")
@@ -0,0 +1,110 @@
+import datetime
+import sqlite3
+from unittest import mock
+
+from click.testing import CliRunner
+
+from garmin_daily import GarminDaily
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper
+from garmin_daily.day_store import DayStore, store_path
+from garmin_daily.google_sheet import add_rows_from_garmin
+from garmin_daily.main import main
+from garmin_daily.mappers import ActivityMapper, LocationMapper
+from garmin_daily.sinks import CsvSink
+from garmin_daily.synthetic import DatasetGenerator
+
+FIRST_DAY = datetime.date(2023, 1, 1)
+
+
+def test_store_day(tmp_path):
+    responses = DatasetGenerator(activities_per_day=3, missing_rate=0).day(FIRST_DAY)
+    garmin_day = GarminDaily.aggregate(responses)
+    with DayStore(path=tmp_path / "days.sqlite") as store:
+        store.put(garmin_day, responses)
+        store.put(garmin_day, responses)  # replaces the day
+        assert store.day(FIRST_DAY) == {
+            "total_steps": garmin_day.total_steps,
+            "hr_min": garmin_day.hr_min,
+            "hr_max": garmin_day.hr_max,
+            "hr_average": garmin_day.hr_average,
+            "hr_rest": garmin_day.hr_rest,
+            "sleep_time": garmin_day.sleep_time,
+            "sleep_deep_time": garmin_day.sleep_deep_time,
+            "sleep_light_time": garmin_day.sleep_light_time,
+            "sleep_rem_time": garmin_day.sleep_rem_time,
+            "vo2max": garmin_day.vo2max,
+        }
+        assert store.activities(FIRST_DAY) == garmin_day.activities
+        assert store.day(FIRST_DAY + datetime.timedelta(days=1)) is None
+        assert list(store.responses(FIRST_DAY, FIRST_DAY)) == [responses]
+        (replayed,) = store.replay(FIRST_DAY - datetime.timedelta(days=7), FIRST_DAY)
+        assert replayed.activities == garmin_day.activities
+
+
+def test_store_per_account(monkeypatch):
+    monkeypatch.setenv("GARMIN_EMAIL", "alice@example.com")
+    assert store_path() == store_path("alice@example.com")
+    assert store_path("bob@example.com") != store_path()
+    assert store_path("../bob").parent.parent == store_path().parent.parent
+    responses = DatasetGenerator().day(FIRST_DAY)
+    with DayStore() as alice, DayStore("bob@example.com") as bob:
+        alice.put(GarminDaily.aggregate(responses), responses)
+        assert alice.day(FIRST_DAY) is not None
+        assert bob.day(FIRST_DAY) is None
+        assert alice.heart_rates.folder != bob.heart_rates.folder
+
+
+def test_store_adds_new_columns(tmp_path):
+    path = tmp_path / "days.sqlite"
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE days (day TEXT PRIMARY KEY, total_steps INTEGER)")
+    with DayStore(path=path) as store:
+        responses = DatasetGenerator().day(FIRST_DAY)
+        store.put(GarminDaily.aggregate(responses))
+        assert store.day(FIRST_DAY)["vo2max"] == GarminDaily.aggregate(responses).vo2max
+        assert list(store.responses(FIRST_DAY, FIRST_DAY)) == []
+
+
+def test_add_rows_from_garmin_stores_days(tmp_path):
+    generator = DatasetGenerator(activities_per_day=2)
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    with DayStore(path=tmp_path / "days.sqlite") as store:
+        add_rows_from_garmin(
+            fitness=None,
+            columns=columns,
+            start_date=FIRST_DAY,
+            days_to_add=3,
+            gym_days=[FIRST_DAY.weekday()],
+            gym_duration=30,
+            location_mapper=LocationMapper([], "Gym"),
+            activity_mapper=ActivityMapper([]),
+            sink=CsvSink(tmp_path / "fitness.csv", columns, DEFAULT_HEADER),
+            daily=mock.Mock(aggregate=GarminDaily.aggregate),
+            fetch=generator.day,
+            store=store,
+        )
+        last_day = FIRST_DAY + datetime.timedelta(days=2)
+        assert [responses.day for responses in store.responses(FIRST_DAY, last_day)] == [
+            FIRST_DAY + datetime.timedelta(days=day_num) for day_num in range(3)
+        ]
+        # the gym activity is from the options, not from Garmin
+        assert "Gym" not in [activity.sport for activity in store.activities(FIRST_DAY)]
+
+
+def test_main_no_store():
+    with (
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), []),
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            return_value=(FIRST_DAY, 1),
+        ),
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows,
+    ):
+        result = CliRunner().invoke(main, ["--no-store"], catch_exceptions=False)
+        assert result.exit_code == 0, result.output
+        assert mocked_add_rows.call_args.kwargs["store"] is None
+        result = CliRunner().invoke(main, [], catch_exceptions=False)
+        assert isinstance(mocked_add_rows.call_args.kwargs["store"], DayStore)
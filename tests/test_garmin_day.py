@@ -1,8 +1,17 @@
+import json
 import os
 from datetime import date
 from unittest.mock import MagicMock, patch
 
-from garmin_daily import Activity, ActivityField, AggFunc, GarminDaily, GarminDay
+from garmin_daily import (
+    Activity,
+    ActivityField,
+    AggFunc,
+    DayResponses,
+    GarminDaily,
+    GarminDay,
+    ReplayApi,
+)
 
 
 def test_get_hr():
@@ -233,3 +242,56 @@ def test_garmin_day_init():
         garmin_day = GarminDaily()
         garmin_mock.assert_called_with("fake-email", "fake-password")
         assert garmin_day.api.client.cs.retry is not None
+
+
+def test_aggregate_fetched_day(garmin_activities_data, garmin_step_data, garmin_sleep_data):
+    day = date(2023, 1, 3)
+    api = MagicMock()
+    api.get_steps_data = MagicMock(return_value=garmin_step_data)
+    api.get_sleep_data = MagicMock(return_value=garmin_sleep_data)
+    api.get_heart_rates = MagicMock(
+        return_value={
+            "maxHeartRate": 136,
+            "minHeartRate": 42,
+            "restingHeartRate": 68,
+            "heartRateValues": [[1, 60], [2, 76]],
+        }
+    )
+    api.get_training_status = MagicMock(side_effect=Exception("-no status-"))
+    api.get_activities_by_date = MagicMock(return_value=garmin_activities_data)
+
+    responses = DayResponses.fetch(api, day)
+    assert responses.training_status is None
+    responses = DayResponses.from_dict(json.loads(json.dumps(responses.to_dict())))
+
+    garmin_day = GarminDaily.aggregate(responses)
+    expected = GarminDay(api, day)
+    assert isinstance(garmin_day.api, ReplayApi)
+    assert garmin_day.total_steps == expected.total_steps == 6969
+    assert garmin_day.sleep_time == expected.sleep_time
+    assert garmin_day.hr_average == expected.hr_average == 68
+    assert garmin_day.vo2max == expected.vo2max == 0.0
+    assert garmin_day.activities == expected.activities
+
+
+def test_replay_api_dates_range():
+    def responses(day, activity_type):
+        return DayResponses(
+            day=day,
+            steps=[],
+            heart_rates={},
+            sleep={},
+            training_status=None,
+            activities=[{"activityType": {"typeKey": activity_type}}],
+        )
+
+    api = ReplayApi(
+        responses(date(2023, 1, 2), "cycling"),
+        responses(date(2023, 1, 1), "running"),
+        responses(date(2023, 1, 3), "walking"),
+    )
+    activities = api.get_activities_by_date("2023-01-01", "2023-01-02")
+    assert [activity["activityType"]["typeKey"] for activity in activities] == [
+        "running",
+        "cycling",
+    ]
@@ -0,0 +1,161 @@
+import csv
+import datetime
+import json
+import zipfile
+
+import pytest
+from click.testing import CliRunner
+from freezegun import freeze_time
+
+from garmin_daily import GarminDaily
+from garmin_daily.garmin_export import GarminExport
+from garmin_daily.main import main
+
+EXPORT_FILES = {
+    "DI_CONNECT/DI-Connect-Aggregator/UDSFile_2023-01-01_2023-04-10.json": [
+        {
+            "calendarDate": "2023-01-01",
+            "totalSteps": 9000,
+            "minHeartRate": 45,
+            "maxHeartRate": 160,
+            "restingHeartRate": 50,
+            "totalKilocalories": 2500.0,
+        },
+        {"calendarDate": {"date": "2023-01-03"}, "totalSteps": 4000},
+    ],
+    "DI_CONNECT/DI-Connect-Wellness/12345_sleepData.json": [
+        {
+            "calendarDate": "2023-01-01",
+            "deepSleepSeconds": 3600,
+            "lightSleepSeconds": 14400,
+            "remSleepSeconds": 7200,
+            "awakeSleepSeconds": 600,
+        },
+    ],
+    "DI_CONNECT/DI-Connect-Metrics/MetricsMaxMetData_20230101_20230510.json": [
+        {"calendarDate": "2023-01-01", "vo2MaxValue": 48.0},
+    ],
+    "DI_CONNECT/DI-Connect-Fitness/user@example.com_0_summarizedActivities.json": [
+        {
+            "summarizedActivitiesExport": [
+                {
+                    "activityId": 2,
+                    "name": "Evening Ride",
+                    "activityType": "cycling",
+                    "startTimeLocal": 1672596000000.0,  # 2023-01-01 18:00
+                    "duration": 1_800_000.0,
+                    "distance": 1_200_000.0,
+                    "avgSpeed": 0.6666,
+                    "avgHr": 120.0,
+                    "calories": 1255.2,
+                },
+                {
+                    "activityId": 1,
+                    "name": "Morning Run",
+                    "activityType": "running",
+                    "locationName": "Park",
+                    "startTimeLocal": 1672567200000.0,  # 2023-01-01 10:00
+                    "duration": 3_600_000.0,
+                    "movingDuration": 3_500_000.0,
+                    "distance": 1_000_000.0,
+                    "elevationGain": 5000.0,
+                    "avgSpeed": 0.2777,
+                    "maxSpeed": 0.4,
+                    "avgHr": 150.0,
+                    "maxHr": 175.0,
+                    "calories": 2510.4,
+                    "steps": 9000,
+                },
+            ],
+        },
+    ],
+    "DI_CONNECT/DI-Connect-Fitness/user@example.com_0_workout.json": [{"ignored": True}],
+}
+
+
+@pytest.fixture
+def export_path(tmp_path):
+    path = tmp_path / "export.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, records in EXPORT_FILES.items():
+            archive.writestr(name, json.dumps(records))
+    return path
+
+
+def test_export_day(export_path):
+    export = GarminExport(export_path)
+    assert export.first_day == datetime.date(2023, 1, 1)
+    assert export.last_day == datetime.date(2023, 1, 3)
+
+    responses = export(datetime.date(2023, 1, 1))
+    assert [activity["activityId"] for activity in responses.activities] == [1, 2]
+    garmin_day = GarminDaily.aggregate(responses)
+    assert garmin_day.total_steps == 9000
+    assert (garmin_day.hr_min, garmin_day.hr_max, garmin_day.hr_rest) == (45, 160, 50)
+    assert garmin_day.hr_average is None
+    assert (garmin_day.sleep_time, garmin_day.sleep_deep_time) == (7.0, 1.0)
+    assert garmin_day.vo2max == 48.0
+    activities = {activity.sport: activity for activity in garmin_day.activities}
+    run = activities["Running"]
+    assert run.start_time == "2023-01-01 10:00:00"
+    assert (run.duration, run.moving_duration) == (3600, 3500)
+    assert (run.distance, run.elevation_gain) == (10_000, 50)
+    assert run.average_speed == pytest.approx(2.777)
+    assert run.calories == pytest.approx(600)
+    assert run.location_name == "Park"
+    assert activities["Bicycle"].distance == 12_000
+
+    empty_day = GarminDaily.aggregate(export(datetime.date(2023, 1, 2)))
+    assert empty_day.total_steps == 0
+    assert empty_day.sleep_time is None
+    assert empty_day.vo2max == 0.0
+    assert GarminDaily.aggregate(export(datetime.date(2023, 1, 3))).total_steps == 4000
+
+
+def test_wrong_export(tmp_path):
+    not_zip = tmp_path / "export.zip"
+    not_zip.write_text("not a zip")
+    with pytest.raises(ValueError, match="Cannot open Garmin export"):
+        GarminExport(not_zip)
+    with zipfile.ZipFile(not_zip, "w") as archive:
+        archive.writestr("readme.txt", "no data")
+    with pytest.raises(ValueError, match="No Garmin data"):
+        GarminExport(not_zip)
+    with zipfile.ZipFile(not_zip, "w") as archive:
+        archive.writestr("DI-Connect-Wellness/1_sleepData.json", json.dumps({"not": "list"}))
+    with pytest.raises(ValueError, match="Wrong Garmin export file"):
+        GarminExport(not_zip)
+
+
+@freeze_time("2023-03-01")
+def test_main_import_export(export_path, tmp_path):
+    output = tmp_path / "fitness.csv"
+    result = CliRunner().invoke(
+        main,
+        ["--import-export", str(export_path), "--output", str(output), "--gym-day", ""],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0, result.output
+    assert "from 2023-01-01 till 2023-01-03, 3 days" in result.output
+    with output.open(encoding="utf8") as file:
+        rows = list(csv.DictReader(file))
+    assert {row["date"] for row in rows} == {"2023-01-01", "2023-01-02", "2023-01-03"}
+    assert {row["sport"] for row in rows if row["date"] == "2023-01-01"} == {
+        "Running",
+        "Bicycle",
+        "Walking",
+    }
+
+    # next import continues after the last added day
+    result = CliRunner().invoke(
+        main,
+        ["--import-export", str(export_path), "--output", str(output)],
+    )
+    assert result.exit_code == 1
+    assert "Nothing to add from 2023-01-04 till 2023-01-03" in result.output
+
+
+def test_main_import_export_with_daemon(export_path):
+    result = CliRunner().invoke(main, ["--daemon", "--import-export", str(export_path)])
+    assert result.exit_code == 1
+    assert "cannot be used with --daemon" in result.output
@@ -0,0 +1,87 @@
+import datetime
+import math
+
+import numpy as np
+import pytest
+
+from garmin_daily import GarminDaily
+from garmin_daily.columns_mapper import week_num
+from garmin_daily.day_store import DayStore
+from garmin_daily.history import GarminHistory
+from garmin_daily.synthetic import DatasetGenerator
+
+FIRST_DAY = datetime.date(2023, 1, 1)
+DAYS = 40
+SKIPPED_DAY = FIRST_DAY + datetime.timedelta(days=10)
+
+
+@pytest.fixture
+def history(tmp_path):
+    path = tmp_path / "days.sqlite"
+    with DayStore(path=path) as store:
+        for responses in DatasetGenerator(activities_per_day=2).days(FIRST_DAY, DAYS):
+            if responses.day != SKIPPED_DAY:
+                store.put(GarminDaily.aggregate(responses))
+    return GarminHistory.load(path=path)
+
+
+def test_history_day_lookup(history):
+    assert len(history) == DAYS
+    assert history.last_day == FIRST_DAY + datetime.timedelta(days=DAYS - 1)
+    day = FIRST_DAY + datetime.timedelta(days=5)
+    garmin_day = GarminDaily.aggregate(DatasetGenerator(activities_per_day=2).day(day))
+    assert history.get(day, "total_steps") == garmin_day.total_steps
+    assert history["hr_rest"][5] == garmin_day.hr_rest
+    durations = [
+        activity.duration for activity in garmin_day.activities if activity.sport != "Walking"
+    ]
+    if durations:
+        assert history.get(day, "activities_duration") == pytest.approx(sum(durations))
+    else:
+        assert math.isnan(history.get(day, "activities_duration"))
+    assert math.isnan(history.get(SKIPPED_DAY, "total_steps"))
+    with pytest.raises(KeyError):
+        history.get(FIRST_DAY - datetime.timedelta(days=1), "total_steps")
+
+
+def test_history_range(history):
+    first = FIRST_DAY + datetime.timedelta(days=7)
+    week = history.range(first, first + datetime.timedelta(days=6))
+    assert len(week) == 7
+    assert week.first_day == first
+    assert np.shares_memory(week["total_steps"], history["total_steps"])
+    assert len(history.range(FIRST_DAY - datetime.timedelta(days=5), FIRST_DAY)) == 1
+    assert len(history.range(history.last_day + datetime.timedelta(days=1), history.last_day)) == 0
+
+
+def test_history_rolling_mean(history):
+    steps = history["total_steps"]
+    means = history.rolling_mean("total_steps", 3)
+    assert means[0] == steps[0]
+    assert means[2] == pytest.approx(steps[:3].mean())
+    skipped = history.index(SKIPPED_DAY)
+    assert means[skipped + 1] == pytest.approx((steps[skipped - 1] + steps[skipped + 1]) / 2)
+    assert math.isnan(history.rolling_mean("total_steps", 1)[skipped])
+
+
+def test_history_weekly_sum(history):
+    weeks, sums = history.weekly_sum("total_steps")
+    days = [FIRST_DAY + datetime.timedelta(days=day_num) for day_num in range(DAYS)]
+    expected: dict[int, float] = {}
+    for day in days:
+        steps = history.get(day, "total_steps")
+        expected[week_num(day)] = expected.get(week_num(day), 0) + (
+            0 if math.isnan(steps) else steps
+        )
+    assert list(weeks) == list(expected)
+    assert list(sums) == pytest.approx(list(expected.values()))
+    assert list(history.week_nums()) == [week_num(day) for day in days]
+
+
+def test_history_empty(tmp_path):
+    DayStore(path=tmp_path / "days.sqlite").close()
+    history = GarminHistory.load(path=tmp_path / "days.sqlite")
+    assert len(history) == 0
+    assert len(history.weekly_sum("total_steps")[0]) == 0
+    with pytest.raises(ValueError, match="No local store"):
+        GarminHistory.load(path=tmp_path / "missing.sqlite")
@@ -0,0 +1,102 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from garmin_daily import GarminDaily
+from garmin_daily.day_store import DayStore
+from garmin_daily.hr_archive import (
+    RECORDS_OFFSET,
+    HeartRateArchive,
+    HeartRateYear,
+    archive_file,
+    day_records,
+)
+from garmin_daily.synthetic import UTC_OFFSET, DatasetGenerator
+
+FIRST_DAY = datetime.date(2023, 12, 30)
+
+
+def samples(heart_rates):
+    return [hr for _, hr in heart_rates["heartRateValues"] or [] if hr]
+
+
+def test_archive_days(tmp_path):
+    archive = HeartRateArchive(tmp_path)
+    days = list(DatasetGenerator(missing_rate=0).days(FIRST_DAY, 4))  # over the year end
+    for responses in days:
+        archive.put(responses.day, responses.heart_rates)
+    assert archive_file(tmp_path, 2023).exists()
+    assert archive_file(tmp_path, 2024).exists()
+
+    records = archive.day(days[1].day)
+    assert list(records["hr"]) == samples(days[1].heart_rates)
+    # synthetic samples start at the local midnight
+    assert records["offset"][0] == -UTC_OFFSET.total_seconds()
+    assert records["offset"][-1] < 24 * 3600 - UTC_OFFSET.total_seconds()
+    assert not records.flags.owndata
+    assert not records.flags.writeable  # the file is mapped read-only
+
+    archived = list(archive.days(FIRST_DAY, FIRST_DAY + datetime.timedelta(days=10)))
+    assert [day for day, _ in archived] == [responses.day for responses in days]
+    assert [int(day_hr["hr"].mean()) for _, day_hr in archived] == [
+        GarminDaily.aggregate(responses).hr_average for responses in days
+    ]
+    assert [day for day, _ in archive.days(days[1].day, days[2].day)] == [
+        days[1].day,
+        days[2].day,
+    ]
+    assert len(archive.day(datetime.date(2024, 6, 1))) == 0
+    assert len(archive.day(datetime.date(2020, 6, 1))) == 0
+
+
+def test_archive_replaces_day(tmp_path):
+    archive = HeartRateArchive(tmp_path)
+    day = datetime.date(2024, 2, 29)
+    path = archive_file(tmp_path, day.year)
+    heart_rates = DatasetGenerator(missing_rate=0).day(day).heart_rates
+    archive.put(day, heart_rates)
+    size = path.stat().st_size
+    assert size == RECORDS_OFFSET + 5 * len(samples(heart_rates))
+
+    archive.put(day, heart_rates)  # the same size is overwritten in place
+    assert path.stat().st_size == size
+    archive.put(day, {"heartRateValues": [[1709164800000 + 60_000, 300], [1709164800000, None]]})
+    assert path.stat().st_size == size
+    assert archive.day(day).tolist() == [(60, 255)]
+
+    archive.put(day, heart_rates)  # more records are appended
+    assert path.stat().st_size == size + 5 * len(samples(heart_rates))
+    assert list(archive.day(day)["hr"]) == samples(heart_rates)
+    assert HeartRateYear(path).days() == [day]
+
+
+def test_day_records_offsets():
+    day = datetime.date(2024, 1, 1)
+    utc_midnight = int(datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC).timestamp() * 1000)
+    records = day_records(day, {"heartRateValues": [[utc_midnight - 3_600_000, 60]]})
+    assert records.tolist() == [(-3600, 60)]
+    assert len(day_records(day, {"heartRateValues": None})) == 0
+
+
+def test_wrong_archive_file(tmp_path):
+    path = tmp_path / "heart-rates-2024.bin"
+    path.write_bytes(b"x" * RECORDS_OFFSET)
+    with pytest.raises(ValueError, match="is not a heart rates archive"):
+        HeartRateYear(path)
+    path.write_bytes(b"GDHR")
+    with pytest.raises(ValueError, match="Truncated"):
+        HeartRateYear(path)
+
+
+def test_store_archives_heart_rates(tmp_path):
+    responses = DatasetGenerator(missing_rate=0).day(FIRST_DAY)
+    with DayStore(path=tmp_path / "days.sqlite") as store:
+        store.put(GarminDaily.aggregate(responses))
+        assert len(store.heart_rates.day(FIRST_DAY)) == 0  # no responses
+        store.put(GarminDaily.aggregate(responses), responses)
+        assert list(store.heart_rates.day(FIRST_DAY)["hr"]) == samples(responses.heart_rates)
+    assert np.array_equal(
+        HeartRateArchive(tmp_path / "heart-rates").day(FIRST_DAY)["hr"],
+        samples(responses.heart_rates),
+    )
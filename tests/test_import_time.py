@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["pandas", "gspread", "garminconnect", "curl_cffi", "pyarrow"]
+IMPORT_BUDGET_US = 500_000  # CLI module import time, generous for slow CI machines
+
+
+def import_times(*args):
+    """Run python with `-X importtime`, return cumulative import time by module, us."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:"):
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return result, times
+
+
+@pytest.mark.parametrize("option", ["--version", "--help"])
+def test_cli_fast_path_imports(option):
+    result, times = import_times("-c", "from garmin_daily.main import main; main()", option)
+    assert result.returncode == 0, result.stderr
+    assert not [module for module in HEAVY_MODULES if module in times]
+    assert times["garmin_daily.main"] < IMPORT_BUDGET_US
+
+
+def test_package_import_is_lazy():
+    _, times = import_times("-c", "import garmin_daily")
+    assert "garmin_daily.garmin_aggregations" not in times
+    from garmin_daily import GarminDaily
+    from garmin_daily.garmin_aggregations import GarminDaily as GarminDailyOrigin
+
+    assert GarminDaily is GarminDailyOrigin
+
+
+def test_history_does_not_import_sheets():
+    result, times = import_times("-c", "import garmin_daily.history")
+    assert result.returncode == 0, result.stderr
+    assert "gspread" not in times
+    assert "garmin_daily.google_sheet" not in times
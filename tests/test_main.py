@@ -3,8 +3,15 @@ from unittest import mock
 
 from click.testing import CliRunner
 
-from garmin_daily.main import DAY_TO_ADD_WITHOUT_FORCE, SHEET_NAME_DEFAULT, Weekdays, main
-from garmin_daily.mappers import LocationMapper, ActivityMapper
+from garmin_daily.main import (
+    DAY_TO_ADD_WITHOUT_FORCE,
+    GYM_LOCATION_DEFAULT,
+    SHEET_NAME_DEFAULT,
+    Weekdays,
+    main,
+)
+from garmin_daily.mappers import ActivityMapper, LocationMapper
+from garmin_daily.rate_limit import RATE_LIMIT_ENV
 from garmin_daily.version import VERSION
 
 
@@ -59,11 +66,11 @@ def test_main_version():
 def test_too_many_days_to_add():
     runner = CliRunner()
     with (
-        mock.patch("garmin_daily.main.detect_days_to_add") as mocked_detect_days_to_add,
-        mock.patch("garmin_daily.main.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch("garmin_daily.google_sheet.detect_days_to_add") as mocked_detect_days_to_add,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
         mock.patch(
-            "garmin_daily.main.open_google_sheet",
-            return_value=(mock.MagicMock(), mock.MagicMock()),
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), []),
         ) as mocked_open_google_sheet,
     ):
         mocked_detect_days_to_add.return_value = (
@@ -85,9 +92,11 @@ def test_gym_training_added():
     days_to_add = DAY_TO_ADD_WITHOUT_FORCE
 
     with (
-        mock.patch("garmin_daily.main.detect_days_to_add") as mocked_detect_days_to_add,
-        mock.patch("garmin_daily.main.add_rows_from_garmin") as mocked_add_rows_from_garmin,
-        mock.patch("garmin_daily.main.open_google_sheet", return_value=(fitness, columns)),
+        mock.patch("garmin_daily.google_sheet.detect_days_to_add") as mocked_detect_days_to_add,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
     ):
         mocked_detect_days_to_add.return_value = (start_date, days_to_add)
         result = runner.invoke(
@@ -114,6 +123,13 @@ def test_gym_training_added():
             gym_duration=60,
             location_mapper=expected_mapper,
             activity_mapper=activity_mapper,
+            steps_lookup=None,
+            sink=None,
+            daily=None,
+            fetch=None,
+            bulk_days=1,
+            store=mock.ANY,
+            workers=1,
         )
         assert result.exit_code == 0
         assert f"gym {duration} minutes training on ['Mon'," in result.output
@@ -127,9 +143,11 @@ def test_locations_parameter():
     days_to_add = DAY_TO_ADD_WITHOUT_FORCE
 
     with (
-        mock.patch("garmin_daily.main.detect_days_to_add") as mocked_detect_days_to_add,
-        mock.patch("garmin_daily.main.add_rows_from_garmin") as mocked_add_rows_from_garmin,
-        mock.patch("garmin_daily.main.open_google_sheet", return_value=(fitness, columns)),
+        mock.patch("garmin_daily.google_sheet.detect_days_to_add") as mocked_detect_days_to_add,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
     ):
         mocked_detect_days_to_add.return_value = (start_date, days_to_add)
 
@@ -164,6 +182,13 @@ def test_locations_parameter():
             gym_duration=30,  # Default duration
             location_mapper=expected_mapper,
             activity_mapper=activity_mapper,
+            steps_lookup=None,
+            sink=None,
+            daily=None,
+            fetch=None,
+            bulk_days=1,
+            store=mock.ANY,
+            workers=1,
         )
 
 
@@ -176,9 +201,11 @@ def test_locations_with_default_gym_days():
     days_to_add = DAY_TO_ADD_WITHOUT_FORCE
 
     with (
-        mock.patch("garmin_daily.main.detect_days_to_add") as mocked_detect_days_to_add,
-        mock.patch("garmin_daily.main.add_rows_from_garmin") as mocked_add_rows_from_garmin,
-        mock.patch("garmin_daily.main.open_google_sheet", return_value=(fitness, columns)),
+        mock.patch("garmin_daily.google_sheet.detect_days_to_add") as mocked_detect_days_to_add,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
     ):
         mocked_detect_days_to_add.return_value = (start_date, days_to_add)
 
@@ -212,6 +239,13 @@ def test_locations_with_default_gym_days():
             gym_duration=30,  # Default duration
             location_mapper=expected_mapper,
             activity_mapper=activity_mapper,
+            steps_lookup=None,
+            sink=None,
+            daily=None,
+            fetch=None,
+            bulk_days=1,
+            store=mock.ANY,
+            workers=1,
         )
 
 
@@ -223,9 +257,11 @@ def test_locations_with_gym():
     days_to_add = DAY_TO_ADD_WITHOUT_FORCE
 
     with (
-        mock.patch("garmin_daily.main.detect_days_to_add") as mocked_detect_days_to_add,
-        mock.patch("garmin_daily.main.add_rows_from_garmin") as mocked_add_rows_from_garmin,
-        mock.patch("garmin_daily.main.open_google_sheet", return_value=(fitness, columns)),
+        mock.patch("garmin_daily.google_sheet.detect_days_to_add") as mocked_detect_days_to_add,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
     ):
         mocked_detect_days_to_add.return_value = (start_date, days_to_add)
 
@@ -256,6 +292,13 @@ def test_locations_with_gym():
             gym_duration=30,
             location_mapper=expected_mapper,
             activity_mapper=expected_activity_mapper,
+            steps_lookup=None,
+            sink=None,
+            daily=None,
+            fetch=None,
+            bulk_days=1,
+            store=mock.ANY,
+            workers=1,
         )
         assert result.exit_code == 0
 
@@ -288,9 +331,11 @@ def test_gym_location_default_ignored():
     days_to_add = DAY_TO_ADD_WITHOUT_FORCE
 
     with (
-        mock.patch("garmin_daily.main.detect_days_to_add") as mocked_detect_days_to_add,
-        mock.patch("garmin_daily.main.add_rows_from_garmin") as mocked_add_rows_from_garmin,
-        mock.patch("garmin_daily.main.open_google_sheet", return_value=(fitness, columns)),
+        mock.patch("garmin_daily.google_sheet.detect_days_to_add") as mocked_detect_days_to_add,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
     ):
         mocked_detect_days_to_add.return_value = (start_date, days_to_add)
         result = runner.invoke(
@@ -318,9 +363,11 @@ def test_rename_parameter():
     days_to_add = DAY_TO_ADD_WITHOUT_FORCE
 
     with (
-        mock.patch("garmin_daily.main.detect_days_to_add") as mocked_detect_days_to_add,
-        mock.patch("garmin_daily.main.add_rows_from_garmin") as mocked_add_rows_from_garmin,
-        mock.patch("garmin_daily.main.open_google_sheet", return_value=(fitness, columns)),
+        mock.patch("garmin_daily.google_sheet.detect_days_to_add") as mocked_detect_days_to_add,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
     ):
         mocked_detect_days_to_add.return_value = (start_date, days_to_add)
 
@@ -353,6 +400,13 @@ def test_rename_parameter():
             gym_duration=30,
             location_mapper=mock.ANY,  # We don't care about location mapper in this test
             activity_mapper=expected_activity_mapper,
+            steps_lookup=None,
+            sink=None,
+            daily=None,
+            fetch=None,
+            bulk_days=1,
+            store=mock.ANY,
+            workers=1,
         )
 
 
@@ -376,9 +430,11 @@ def test_rename_with_locations():
     days_to_add = DAY_TO_ADD_WITHOUT_FORCE
 
     with (
-        mock.patch("garmin_daily.main.detect_days_to_add") as mocked_detect_days_to_add,
-        mock.patch("garmin_daily.main.add_rows_from_garmin") as mocked_add_rows_from_garmin,
-        mock.patch("garmin_daily.main.open_google_sheet", return_value=(fitness, columns)),
+        mock.patch("garmin_daily.google_sheet.detect_days_to_add") as mocked_detect_days_to_add,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet", return_value=(fitness, columns, [])
+        ),
     ):
         mocked_detect_days_to_add.return_value = (start_date, days_to_add)
 
@@ -406,3 +462,72 @@ def test_rename_with_locations():
         call_kwargs = mocked_add_rows_from_garmin.call_args[1]
         assert isinstance(call_kwargs["activity_mapper"], ActivityMapper)
         assert isinstance(call_kwargs["location_mapper"], LocationMapper)
+
+
+def test_rules_file(tmp_path):
+    rules_path = tmp_path / "rules.ini"
+    rules_path.write_text("[locations]\ncycling = Track\n[rename]\nyoga = Stretching\n")
+    with (
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            return_value=(datetime.date(2022, 1, 1), 1),
+        ),
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), []),
+        ),
+    ):
+        result = CliRunner().invoke(
+            main,
+            ["--locations", "running=Park", "--rules", str(rules_path)],
+            catch_exceptions=False,
+        )
+    assert result.exit_code == 0, result.output
+    assert "cycling -> Track" in result.output
+    call_kwargs = mocked_add_rows_from_garmin.call_args.kwargs
+    assert call_kwargs["location_mapper"] == LocationMapperMatcher(
+        [("running", "Park"), ("cycling", "Track")], GYM_LOCATION_DEFAULT
+    )
+    assert call_kwargs["activity_mapper"] == ActivityMapperMatcher([("yoga", "Stretching")])
+
+
+def test_rules_file_missing(tmp_path):
+    result = CliRunner().invoke(main, ["--rules", str(tmp_path / "missing.ini")])
+    assert result.exit_code == 1
+    assert "Cannot read rules file" in result.output
+
+
+def test_main_wrong_rate_limit(monkeypatch):
+    monkeypatch.setenv(RATE_LIMIT_ENV, "-5")
+    with mock.patch("garmin_daily.google_sheet.open_google_sheet") as mocked_open_google_sheet:
+        result = CliRunner().invoke(main, [])
+    assert result.exit_code == 1
+    assert f"{RATE_LIMIT_ENV} should be requests per minute" in result.output
+    mocked_open_google_sheet.assert_not_called()
+
+
+def test_main_sheet_not_found():
+    with mock.patch(
+        "garmin_daily.google_sheet.open_google_sheet",
+        side_effect=ValueError("Google sheet 'fitness' not found."),
+    ):
+        result = CliRunner().invoke(main, [])
+    assert result.exit_code == 1
+    assert "Google sheet 'fitness' not found." in result.output
+
+
+def test_main_no_last_date():
+    with (
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), []),
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            side_effect=ValueError("Cannot find last filled date"),
+        ),
+    ):
+        result = CliRunner().invoke(main, [])
+    assert result.exit_code == 1
+    assert "Cannot find last filled date" in result.output
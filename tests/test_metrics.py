@@ -0,0 +1,112 @@
+import datetime
+from unittest import mock
+
+import pytest
+from click.testing import CliRunner
+
+from garmin_daily import metrics
+from garmin_daily.garmin_aggregations import GARMIN_RESPONSES, call_endpoint
+from garmin_daily.main import main
+from garmin_daily.metrics import Counter, Gauge, Histogram, Registry, run_metrics
+from garmin_daily.pipeline import StageStats
+
+
+def test_counter_and_gauge_render():
+    counter = Counter("requests_total", "Requests.", ("endpoint", "status"))
+    counter.inc(endpoint="get_steps_data", status="200")
+    counter.inc(2, endpoint="get_steps_data", status="200")
+    counter.inc(endpoint='say "hi"', status="500")
+    gauge = Gauge("last_run", "Last run.")
+    gauge.set(1.5)
+    gauge.set(2)
+    registry = Registry()
+    registry.register(counter)
+    registry.register(gauge)
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{endpoint="get_steps_data",status="200"} 3',
+        'requests_total{endpoint="say \\"hi\\"",status="500"} 1',
+        "# HELP last_run Last run.",
+        "# TYPE last_run gauge",
+        "last_run 2",
+    ]
+
+
+def test_counter_wrong_labels():
+    with pytest.raises(ValueError, match="labels"):
+        Counter("requests_total", "Requests.", ("endpoint",)).inc(status="200")
+
+
+def test_histogram_render():
+    histogram = Histogram("run_seconds", "Run.", buckets=(1, 10))
+    for value in (0.5, 1, 5, 100):
+        histogram.observe(value)
+    assert histogram.samples() == [
+        'run_seconds_bucket{le="1"} 2',
+        'run_seconds_bucket{le="10"} 3',
+        'run_seconds_bucket{le="+Inf"} 4',
+        "run_seconds_sum 106.5",
+        "run_seconds_count 4",
+    ]
+
+
+def test_registry_write_atomic(tmp_path):
+    path = tmp_path / "garmin_daily.prom"
+    registry = Registry()
+    registry.register(Counter("rows_total", "Rows.")).inc(5)
+    registry.write(path)
+    assert "rows_total 5" in path.read_text(encoding="utf8")
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_run_metrics():
+    stages = [StageStats("fetch", items=2, busy=0.5), StageStats("write", items=2, busy=0.1)]
+    days_before = metrics.DAYS_ADDED.values.get((), 0)
+    errors_before = metrics.RUNS.values.get(("error",), 0)
+    with pytest.raises(RuntimeError), run_metrics(stages):
+        raise RuntimeError("-fail-")
+    assert metrics.DAYS_ADDED.values[()] == days_before + 2
+    assert metrics.RUNS.values[("error",)] == errors_before + 1
+    assert ("fetch",) in metrics.STAGE_DURATION.counts
+    assert ("error",) in metrics.LAST_RUN.values
+
+
+def test_garmin_requests_by_endpoint():
+    def get_sleep_data(date_str):
+        GARMIN_RESPONSES.record(mock.Mock(status_code=401, content=b""))
+        GARMIN_RESPONSES.record(mock.Mock(status_code=200, content=b"{}"))
+        return {}
+
+    def get_heart_rates(date_str):
+        raise ConnectionError("-no network-")
+
+    api = mock.Mock(get_sleep_data=get_sleep_data, get_heart_rates=get_heart_rates)
+    requests = metrics.GARMIN_REQUESTS.values
+    before = dict(requests)
+    unauthorized_before = metrics.GARMIN_UNAUTHORIZED.values.get(("get_sleep_data",), 0)
+    call_endpoint(api, "get_sleep_data", "2023-01-01")
+    with pytest.raises(ConnectionError):
+        call_endpoint(api, "get_heart_rates", "2023-01-01")
+    for key in [("get_sleep_data", "401"), ("get_sleep_data", "200"), ("get_heart_rates", "error")]:
+        assert requests[key] == before.get(key, 0) + 1
+    assert metrics.GARMIN_UNAUTHORIZED.values[("get_sleep_data",)] == unauthorized_before + 1
+    assert GARMIN_RESPONSES.endpoint == "other"
+
+
+def test_main_metrics_file(tmp_path):
+    path = tmp_path / "garmin_daily.prom"
+    with (
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), []),
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            return_value=(datetime.date(2023, 1, 1), 1),
+        ),
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin"),
+    ):
+        result = CliRunner().invoke(main, ["--metrics-file", str(path)], catch_exceptions=False)
+    assert result.exit_code == 0, result.output
+    assert "# TYPE garmin_daily_run_duration_seconds histogram" in path.read_text(encoding="utf8")
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from garmin_daily.google_sheet import localized_csv_raw
+from garmin_daily.number_formatter import NumberFormatter
+
+
+@pytest.mark.parametrize(
+    "locale_name,val,precision,expected",
+    [
+        ("en_US", 1.5, None, "1.5"),
+        ("en_US", 1234.5678, None, "1,234.57"),
+        ("en_US", -123456.0, None, "-123,456"),
+        ("en_US", 1234567.0, None, "1.23457e+06"),
+        ("en_US", 0.00085, 2, "0.00085"),
+        ("en_US", 1e20, None, "1e+20"),
+        ("ru_RU", 1234.5678, None, "1\xa0234,57"),
+        ("ru_RU.UTF-8", 0.5, None, "0,5"),
+        ("de_DE", 12345.5, None, "12.345,5"),
+        ("de_CH", 12345.5, None, "12’345.5"),
+        ("pt_BR", 0.00089, 2, "0,00089"),
+        ("xx_XX", 1234.5, None, "1234.5"),
+    ],
+)
+def test_number_formatter(locale_name, val, precision, expected):
+    assert NumberFormatter.from_locale(locale_name).format(val, precision) == expected
+
+
+def test_number_formatter_as_c_locale():
+    formatter = NumberFormatter()
+    for val in [0.1, 1.0, 123456.789, -0.000012345, 1e-10, 12345678.9]:
+        assert formatter.format(val) == f"{val:n}"
+        assert formatter.format(val, precision=2) == f"{val:.2n}"
+
+
+def test_number_formatter_threads():
+    formatters = [NumberFormatter.from_locale(name) for name in ["en_US", "ru_RU"]]
+    expected = {"en_US": ["1,234.5", "7", "x"], "ru_RU": ["1\xa0234,5", "7", "x"]}
+
+    def rows(idx):
+        name = ["en_US", "ru_RU"][idx % 2]
+        return name, localized_csv_raw([1234.5, 7, "x"], formatters[idx % 2])
+
+    with ThreadPoolExecutor(8) as executor:
+        for name, row in executor.map(rows, range(1000)):
+            assert row == expected[name]
@@ -0,0 +1,72 @@
+import datetime
+from unittest import mock
+
+import pytest
+
+from garmin_daily import GarminDaily
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper
+from garmin_daily.google_sheet import add_rows_from_garmin
+from garmin_daily.mappers import ActivityMapper, LocationMapper
+from garmin_daily.parallel import ParallelAggregator
+from garmin_daily.sinks import CsvSink
+from garmin_daily.synthetic import DatasetGenerator
+
+FIRST_DAY = datetime.date(2023, 1, 1)
+
+
+def test_parallel_aggregator_keeps_order():
+    days = list(DatasetGenerator(activities_per_day=2).days(FIRST_DAY, 20))
+    with ParallelAggregator(workers=2, chunk_days=3) as aggregator:
+        aggregated = list(aggregator.map(days))
+    assert [responses for responses, _ in aggregated] == days
+    for responses, garmin_day in aggregated:
+        expected = GarminDaily.aggregate(responses)
+        assert garmin_day.date == responses.day
+        assert garmin_day.total_steps == expected.total_steps
+        assert garmin_day.activities == expected.activities
+        assert garmin_day.api is None
+
+
+def test_parallel_aggregator_error():
+    days = list(DatasetGenerator().days(FIRST_DAY, 5))
+    days[3].heart_rates = {}
+    with (
+        ParallelAggregator(workers=2, chunk_days=2) as aggregator,
+        pytest.raises(KeyError, match="maxHeartRate"),
+    ):
+        list(aggregator.map(days))
+
+
+def test_parallel_aggregator_stops_workers_on_early_exit():
+    days = list(DatasetGenerator().days(FIRST_DAY, 20))
+    with ParallelAggregator(workers=2, chunk_days=2) as aggregator:
+        aggregated = aggregator.map(days)
+        next(aggregated)  # the consumer stopped, the generator is not closed
+    with pytest.raises(RuntimeError, match="shutdown"):
+        aggregator.pool.submit(len, [])
+
+
+def test_add_rows_from_garmin_workers(tmp_path):
+    generator = DatasetGenerator(activities_per_day=2)
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    outputs = []
+    for workers in (1, 3):
+        output = tmp_path / f"fitness-{workers}.csv"
+        stages = add_rows_from_garmin(
+            fitness=None,
+            columns=columns,
+            start_date=FIRST_DAY,
+            days_to_add=30,
+            gym_days=[FIRST_DAY.weekday()],
+            gym_duration=30,
+            location_mapper=LocationMapper([], "Gym"),
+            activity_mapper=ActivityMapper([]),
+            sink=CsvSink(output, columns, DEFAULT_HEADER),
+            daily=mock.Mock(aggregate=GarminDaily.aggregate),
+            fetch=generator.day,
+            bulk_days=7,
+            workers=workers,
+        )
+        assert stages[-1].items == 30
+        outputs.append(output.read_text(encoding="utf8"))
+    assert outputs[0] == outputs[1]
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from garmin_daily.pipeline import Pipeline
+
+
+def test_pipeline_keeps_order():
+    written = []
+    stats = Pipeline(
+        ("double", lambda item: item * 2),
+        ("inc", lambda item: item + 1),
+        ("write", written.append),
+    ).run(range(100))
+    assert written == [item * 2 + 1 for item in range(100)]
+    assert [stage.name for stage in stats] == ["double", "inc", "write"]
+    assert all(stage.items == 100 for stage in stats)
+
+
+def test_pipeline_overlaps_stages():
+    delay = 0.05
+
+    def slow(item):
+        time.sleep(delay)
+        return item
+
+    started = time.perf_counter()
+    Pipeline(("fetch", slow), ("write", slow)).run(range(10))
+    assert time.perf_counter() - started < 20 * delay
+
+
+def test_pipeline_backpressure():
+    in_flight = []
+    lock = threading.Lock()
+    max_in_flight = 0
+
+    def fetch(item):
+        nonlocal max_in_flight
+        with lock:
+            in_flight.append(item)
+            max_in_flight = max(max_in_flight, len(in_flight))
+        return item
+
+    def write(item):
+        time.sleep(0.01)
+        with lock:
+            in_flight.remove(item)
+
+    Pipeline(("fetch", fetch), ("write", write), queue_size=2).run(range(30))
+    assert max_in_flight <= 4  # queue plus items in the stages
+
+
+def test_pipeline_error():
+    written = []
+
+    def fail(item):
+        if item == 5:
+            raise ValueError("-fail-")
+        return item
+
+    def write(item):
+        time.sleep(0.01)  # the items before the failure are still in the queues
+        written.append(item)
+
+    with pytest.raises(ValueError, match="-fail-"):
+        Pipeline(("fail", fail), ("inc", lambda item: item), ("write", write)).run(range(1000))
+    assert written == list(range(5))
+
+
+def test_pipeline_downstream_error_stops_upstream():
+    fetched = []
+
+    def fetch(item):
+        fetched.append(item)
+        return item
+
+    def write(item):
+        raise ValueError("-fail-")
+
+    with pytest.raises(ValueError, match="-fail-"):
+        Pipeline(("fetch", fetch), ("write", write), queue_size=2).run(range(1000))
+    assert len(fetched) <= 4  # queue plus items in the stages
@@ -0,0 +1,98 @@
+import datetime
+import pstats
+import threading
+from unittest import mock
+
+from click.testing import CliRunner
+
+from garmin_daily import DayResponses, GarminDaily, GarminDay
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper
+from garmin_daily.main import main
+from garmin_daily.pipeline import Pipeline
+from garmin_daily.profiling import Profiler, percentile
+from garmin_daily.sinks import CsvSink, open_sink
+
+
+def test_percentile():
+    values = [0.1, 0.5, 0.2, 0.4, 0.3]
+    assert percentile(values, 0.5) == 0.3
+    assert percentile(values, 0.95) == 0.5
+    assert percentile([0.1], 0.5) == 0.1
+
+
+def test_profiler_phases(tmp_path):
+    responses = DayResponses(
+        day=datetime.date(2023, 1, 1),
+        steps=[],
+        heart_rates={
+            "maxHeartRate": 136,
+            "minHeartRate": 42,
+            "restingHeartRate": 68,
+            "heartRateValues": None,
+        },
+        sleep={"dailySleepDTO": {"sleepTimeSeconds": None}},
+        training_status=None,
+        activities=[],
+    )
+    original = GarminDay.aggregate_activities
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    with open_sink(tmp_path / "days.csv", columns, DEFAULT_HEADER) as sink, Profiler() as profiler:
+        assert GarminDay.aggregate_activities is not original
+        garmin_day = GarminDaily.aggregate(responses)
+        garmin_day.aggregate_activities()
+        sink.write([["2023-01-01", 100]])
+    assert GarminDay.aggregate_activities is original
+    assert isinstance(vars(GarminDaily)["aggregate"], staticmethod)  # restored as it was
+    assert len(profiler.phases["aggregate"].durations) == 1
+    assert len(profiler.phases["aggregate.activities"].durations) == 2  # and in the init
+    assert profiler.phases[f"write.{CsvSink.__name__}"].size == len('[["2023-01-01", 100]]')
+    report = profiler.report().splitlines()
+    assert report[0].split() == ["phase", "count", "total", "s", "p50", "ms", "p95", "ms", "bytes"]
+    assert any(line.startswith("aggregate.activities ") for line in report)
+
+
+def test_profiler_cprofile_threads(tmp_path):
+    path = tmp_path / "run.prof"
+
+    def work_in_thread():
+        return sorted(range(1000))
+
+    with Profiler(path):
+        thread = threading.Thread(target=work_in_thread)
+        thread.start()
+        thread.join()
+    functions = {func_name for _, _, func_name in pstats.Stats(str(path)).stats}
+    assert "work_in_thread" in functions
+
+
+def test_profiler_cprofile_pipeline(tmp_path):
+    path = tmp_path / "run.prof"
+
+    def aggregate_in_stage(item):
+        return sorted(range(item))
+
+    with Profiler(path):
+        stats = Pipeline(
+            ("aggregate", aggregate_in_stage),
+            ("write", lambda item: None),
+        ).run(range(100))
+    assert all(stage.items == 100 for stage in stats)
+    functions = {func_name for _, _, func_name in pstats.Stats(str(path)).stats}
+    assert "aggregate_in_stage" in functions  # in the stage thread
+
+
+def test_main_profile():
+    with (
+        mock.patch(
+            "garmin_daily.google_sheet.open_google_sheet",
+            return_value=(mock.MagicMock(), mock.MagicMock(), []),
+        ),
+        mock.patch(
+            "garmin_daily.google_sheet.detect_days_to_add",
+            return_value=(datetime.date(2023, 1, 1), 1),
+        ),
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin"),
+    ):
+        result = CliRunner().invoke(main, ["--profile"], catch_exceptions=False)
+    assert result.exit_code == 0, result.output
+    assert "Profile:" in result.output
@@ -0,0 +1,107 @@
+import multiprocessing
+from unittest import mock
+
+import pytest
+
+from garmin_daily import GarminDaily, metrics
+from garmin_daily.garmin_aggregations import call_endpoint
+from garmin_daily.rate_limit import (
+    RATE_LIMIT_ENV,
+    RATE_LIMIT_FILE,
+    STATE,
+    HostRateLimiter,
+    host_rate_limiter,
+)
+
+NOW = 1_700_000_000.0
+
+
+def test_burst_then_rate(tmp_path):
+    limiter = HostRateLimiter(tmp_path / "limit", requests_per_minute=60, burst=3)
+    assert [limiter.reserve(NOW) for _ in range(3)] == [0, 0, 0]
+    assert [limiter.reserve(NOW) for _ in range(2)] == [1, 2]
+    # the budget is restored with time
+    assert limiter.reserve(NOW + 10) == 0
+
+
+def test_limiters_share_file(tmp_path):
+    first = HostRateLimiter(tmp_path / "limit", requests_per_minute=120, burst=1)
+    second = HostRateLimiter(tmp_path / "limit", requests_per_minute=120, burst=1)
+    assert first.reserve(NOW) == 0
+    assert second.reserve(NOW) == 0.5
+    assert first.reserve(NOW) == 1.0
+
+
+def test_file_kept_open(tmp_path):
+    limiter = HostRateLimiter(tmp_path / "limit", requests_per_minute=60, burst=1)
+    limiter.reserve(NOW)
+    file = limiter.file
+    limiter.reserve(NOW)
+    assert limiter.file is file
+    limiter.close()
+    assert file.closed
+    assert limiter.reserve(NOW) == 2  # reopened with the state
+
+
+def test_broken_state(tmp_path):
+    path = tmp_path / "limit"
+    limiter = HostRateLimiter(path, requests_per_minute=60, burst=1)
+    path.write_bytes(b"x")
+    assert limiter.reserve(NOW) == 0
+    path.write_bytes(STATE.pack(float("nan")))
+    assert limiter.reserve(NOW) == 0
+    path.write_bytes(STATE.pack(NOW * 2))
+    assert limiter.reserve(NOW) == 0
+    assert STATE.unpack(path.read_bytes())[0] == NOW + 1
+
+
+def reserve_slots(path, count, queue):
+    limiter = HostRateLimiter(path, requests_per_minute=60, burst=1)
+    queue.put([limiter.reserve(NOW) for _ in range(count)])
+
+
+def test_processes_share_budget(tmp_path):
+    path = tmp_path / "limit"
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=reserve_slots, args=(path, 10, queue)) for _ in range(3)
+    ]
+    for process in processes:
+        process.start()
+    waits = sorted(wait for _ in processes for wait in queue.get(timeout=30))
+    for process in processes:
+        process.join()
+    assert waits == [float(slot) for slot in range(30)]  # no slot is reserved twice
+
+
+def test_call_endpoint_waits_for_slot(local_cache_dir, monkeypatch):
+    monkeypatch.setenv(RATE_LIMIT_ENV, "600")
+    limiter = GarminDaily().rate_limiter
+    assert limiter is host_rate_limiter()  # one for the process
+    assert limiter.path == local_cache_dir / RATE_LIMIT_FILE
+    (local_cache_dir / RATE_LIMIT_FILE).write_bytes(STATE.pack(NOW))
+    slept_before = metrics.RATE_LIMIT_SLEEP.values.get((), 0)
+    api = mock.Mock()
+    with (
+        mock.patch("garmin_daily.rate_limit.time.time", return_value=NOW - 3),
+        mock.patch("garmin_daily.rate_limit.time.sleep") as mocked_sleep,
+    ):
+        call_endpoint(api, "get_steps_data", "2023-01-01", limiter=limiter)
+    api.get_steps_data.assert_called_once_with("2023-01-01")
+    assert mocked_sleep.call_args.args[0] == pytest.approx(0.1)
+    assert metrics.RATE_LIMIT_SLEEP.values.get((), 0) - slept_before == pytest.approx(0.1)
+
+
+def test_host_rate_limiter_env(monkeypatch):
+    monkeypatch.setenv(RATE_LIMIT_ENV, "0")
+    assert host_rate_limiter() is None
+    monkeypatch.delenv(RATE_LIMIT_ENV)
+    assert host_rate_limiter() is None  # opt-in
+    monkeypatch.setenv(RATE_LIMIT_ENV, "60")
+    assert host_rate_limiter().interval == 1
+    for value in ("often", "-5", "nan"):
+        monkeypatch.setenv(RATE_LIMIT_ENV, value)
+        with pytest.raises(ValueError, match=f"requests per minute .0 to disable., got '{value}'"):
+            host_rate_limiter()
+    with pytest.raises(ValueError, match="Wrong rate limit"):
+        HostRateLimiter(requests_per_minute=-1)
@@ -1,37 +1,41 @@
+import json
 from datetime import date, datetime, timedelta
 from unittest.mock import MagicMock, patch
 
+import gspread
 import pandas as pd
 import pytest
 from freezegun import freeze_time
+from gspread.http_client import HTTPClient
+from gspread.utils import a1_to_rowcol
 
 from garmin_daily import Activity
 from garmin_daily.columns_mapper import ColumnsMapper, GarminCol
-from garmin_daily.mappers import LocationMapper, ActivityMapper
 from garmin_daily.google_sheet import (
     BATCH_SIZE,
+    SPREADSHEET_KEYS_FILE,
+    SheetDateLookup,
     add_rows_from_garmin,
     create_day_rows,
     detect_days_to_add,
     open_google_sheet,
     search_missed_steps_in_sheet,
 )
+from garmin_daily.mappers import ActivityMapper, LocationMapper
 
 
 def test_detect_days_to_add_no_date(header_row):
     sheet_mock = MagicMock()
     sheet_mock.acell = lambda x: type("CellMock", (object,), {"value": None})()
-    with pytest.raises(SystemExit) as exc:
+    with pytest.raises(ValueError, match="Cannot find last filled date"):
         detect_days_to_add(sheet_mock, ColumnsMapper(header_row[0]))
-    assert exc.value.code == 1
 
 
 def test_detect_days_to_add_wrong_date(header_row):
     sheet_mock = MagicMock()
     sheet_mock.acell = lambda x: type("CellMock", (object,), {"value": "-invalid-date-"})()
-    with pytest.raises(SystemExit) as exc:
+    with pytest.raises(ValueError, match="Wrong date string"):
         detect_days_to_add(sheet_mock, ColumnsMapper(header_row[0]))
-    assert exc.value.code == 1
 
 
 def test_detect_days_to_add_all_filled(header_row):
@@ -91,7 +95,7 @@ def test_create_day_rows(header_row):
         activity_mapper=activity_mapper,
     )
     print(rows)
-    assert rows == [
+    assert [dict(zip(GarminCol, row, strict=True)) for row in rows] == [
         {
             GarminCol.LOCATION: "Park",
             GarminCol.SPORT: "Running",
@@ -170,27 +174,90 @@ def test_create_day_rows(header_row):
     ]
 
 
-def test_open_google_sheet():
+def sheets_http_mock(spreadsheets):
+    """Sheets API client with spreadsheets {key: title}."""
+    http_client = MagicMock(spec=HTTPClient)
+
+    def fetch_sheet_metadata(key, params=None):
+        if key not in spreadsheets:
+            response = MagicMock(status_code=404)
+            raise gspread.exceptions.APIError(response)
+        return {
+            "properties": {"title": spreadsheets[key], "locale": "ru_RU"},
+            "sheets": [{"properties": {"sheetId": 0, "title": "Sheet1", "index": 0}}],
+        }
+
+    http_client.fetch_sheet_metadata.side_effect = fetch_sheet_metadata
+    http_client.values_batch_get.return_value = {
+        "valueRanges": [
+            {"range": "Sheet1!1:1", "majorDimension": "ROWS", "values": [["Date", "Steps"]]},
+            {"range": "Sheet1!2:2", "majorDimension": "ROWS", "values": [["2023-01-01", 10]]},
+        ],
+    }
+    return http_client
+
+
+def test_open_google_sheet(local_cache_dir):
     sheet_name = "-fake-"
-    header_row = ("fake1,fake2",)
-    with (
-        patch("garmin_daily.google_sheet.gspread") as mock_gspread,
-        patch("garmin_daily.google_sheet.locale") as mock_locale,
-        patch("garmin_daily.google_sheet.ColumnsMapper") as mock_mapper,
-    ):
-        mock_session = MagicMock()
-        mock_spreadsheet = MagicMock()
-        mock_worksheet = MagicMock()
-        mock_worksheet.get = MagicMock(return_value=header_row)
-        mock_gspread.service_account = MagicMock(return_value=mock_session)
-        mock_session.open = MagicMock(return_value=mock_spreadsheet)
-        mock_spreadsheet.sheet1 = mock_worksheet
+    spreadsheets = {"-key-": sheet_name}
+    http_client = sheets_http_mock(spreadsheets)
+    with patch("garmin_daily.google_sheet.gspread.service_account") as mock_service_account:
+        mock_session = mock_service_account.return_value
+        mock_session.http_client = http_client
+        mock_session.list_spreadsheet_files.return_value = [{"id": "-key-", "name": sheet_name}]
+        fitness, columns, first_row = open_google_sheet(sheet_name)
+
+        mock_session.list_spreadsheet_files.assert_called_once_with(sheet_name)
+        assert http_client.fetch_sheet_metadata.call_count == 1
+        assert fitness.spreadsheet.locale == "ru_RU"
+        assert columns.idx(GarminCol.STEPS) == 1
+        assert first_row == ["2023-01-01", 10]
+        assert http_client.values_batch_get.call_args.kwargs["ranges"] == [
+            "'Sheet1'!1:1",
+            "'Sheet1'!2:2",
+        ]
+
+        # the second time we open by the cached key: one metadata and one values request
+        mock_session.reset_mock()
+        http_client.reset_mock()
         open_google_sheet(sheet_name)
+        mock_session.list_spreadsheet_files.assert_not_called()
+        assert http_client.fetch_sheet_metadata.call_count == 1
+        assert http_client.values_batch_get.call_count == 1
 
-    mock_gspread.service_account.assert_called()
-    mock_session.open.assert_called_with(sheet_name)
-    mock_locale.setlocale.assert_called_with(mock_locale.LC_NUMERIC, mock_spreadsheet.locale)
-    mock_mapper.assert_called_with(header_row[0])
+        # the cached key points to renamed spreadsheet, and no spreadsheet with the title
+        spreadsheets["-key-"] = "-renamed-"
+        mock_session.list_spreadsheet_files.return_value = []
+        with pytest.raises(ValueError, match="not found"):
+            open_google_sheet(sheet_name)
+        mock_session.list_spreadsheet_files.assert_called_with(sheet_name)
+
+
+def test_open_google_sheet_cached_key_not_shared(local_cache_dir):
+    (local_cache_dir / SPREADSHEET_KEYS_FILE).write_text(json.dumps({"-fake-": "-revoked-"}))
+    http_client = sheets_http_mock({"-key-": "-fake-"})
+    original = http_client.fetch_sheet_metadata.side_effect
+
+    def fetch_sheet_metadata(key, params=None):
+        if key == "-revoked-":
+            raise gspread.exceptions.APIError(MagicMock(status_code=403))
+        return original(key, params)
+
+    http_client.fetch_sheet_metadata.side_effect = fetch_sheet_metadata
+    with patch("garmin_daily.google_sheet.gspread.service_account") as mock_service_account:
+        mock_session = mock_service_account.return_value
+        mock_session.http_client = http_client
+        mock_session.list_spreadsheet_files.return_value = [{"id": "-key-", "name": "-fake-"}]
+        fitness, _, _ = open_google_sheet("-fake-")
+    assert fitness.spreadsheet.id == "-key-"
+    assert json.loads((local_cache_dir / SPREADSHEET_KEYS_FILE).read_text()) == {"-fake-": "-key-"}
+
+
+def test_open_google_sheet_not_found():
+    with patch("garmin_daily.google_sheet.gspread.service_account") as mock_service_account:
+        mock_service_account.return_value.list_spreadsheet_files.return_value = []
+        with pytest.raises(ValueError, match="'-fake-' not found"):
+            open_google_sheet("-fake-")
 
 
 def test_add_rows_from_garmin():
@@ -258,6 +325,38 @@ def test_add_rows_from_garmin():
         assert mock_create_day_rows.call_count == days_to_add
 
 
+class SortedSheetMock:
+    """Worksheet with Date (A) and Steps (B) columns sorted newest first."""
+
+    def __init__(self, rows):
+        self.title = "sorted"
+        self.rows = rows  # [(date, steps), ...] starting from the row #2
+        self.row_count = len(rows) + 1 + 10  # header and some empty rows at the end
+        self.cell_reads = 0
+        self.block_reads = 0
+        self.rows_read = 0
+
+    def _value(self, row, col):
+        idx = row - 2
+        return self.rows[idx][col] if 0 <= idx < len(self.rows) else ""
+
+    def get(self, cell):
+        self.cell_reads += 1
+        row, col = a1_to_rowcol(cell)
+        value = self._value(row, col - 1)
+        return [[value]] if value != "" else []
+
+    def batch_get(self, ranges, **kwargs):
+        self.block_reads += 1
+        result = []
+        for range_name in ranges:
+            first, last = range_name.split(":")
+            (first_row, col), (last_row, _) = a1_to_rowcol(first), a1_to_rowcol(last)
+            self.rows_read += last_row - first_row + 1
+            result.append([[self._value(row, col - 1)] for row in range(first_row, last_row + 1)])
+        return result
+
+
 def test_search_missed_steps_in_sheet():
     def mock_idx(column_id):
         return {
@@ -272,19 +371,17 @@ def test_search_missed_steps_in_sheet():
     # setup test data
     rows = [["=0*0.0001", "2022-02-16", "=0-400"], ["=0*0.0002", "2022-02-17", "=0-500"]]
 
-    # mock the get_steps function to return a value of 10
-    with patch("garmin_daily.google_sheet.fitness_df") as mock_fitness_df:
-        mock_fitness_df.return_value = pd.DataFrame(
-            [
-                (100, "2022-02-16"),
-                (200, "2022-02-17"),
-            ],
-            columns=["Steps", "Date"],
-        ).set_index("Date", inplace=False)
+    with patch("garmin_daily.google_sheet.SheetDateLookup") as mock_lookup:
+        mock_lookup.return_value.steps.return_value = {"2022-02-16": 100, "2022-02-17": 200}
         # call the function
         search_missed_steps_in_sheet(fitness, rows, columns)
         print(rows)
 
+        assert set(mock_lookup.return_value.steps.call_args[0][0]) == {
+            "2022-02-16",
+            "2022-02-17",
+        }
+
         # assert that the steps column was updated with the value of 10
         assert rows[0][columns.idx(GarminCol.STEPS)] == "=100-400"
         assert rows[1][columns.idx(GarminCol.STEPS)] == "=200-500"
@@ -294,6 +391,77 @@ def test_search_missed_steps_in_sheet():
         assert rows[1][columns.idx(GarminCol.DISTANCE)] == "=(200-500)*0.0002"
 
 
+def test_search_missed_steps_in_sheet_not_needed():
+    rows = [["1.2", "2022-02-16", "=1000"]]
+    columns = MagicMock()
+    columns.idx = {GarminCol.DISTANCE: 0, GarminCol.DATE: 1, GarminCol.STEPS: 2}.__getitem__
+    with patch("garmin_daily.google_sheet.SheetDateLookup") as mock_lookup:
+        search_missed_steps_in_sheet(MagicMock(), rows, columns)
+    mock_lookup.assert_not_called()
+    assert rows == [["1.2", "2022-02-16", "=1000"]]
+
+
+def test_sheet_date_lookup_binary_search():
+    start = date(2020, 1, 1)
+    days_num = 1000
+    rows = []
+    for day_num in reversed(range(days_num)):
+        day = (start + timedelta(days=day_num)).isoformat()
+        rows.append((day, ""))  # gym or other activity without steps
+        rows.append((day, 1000 + day_num))
+    fitness = SortedSheetMock(rows)
+    lookup = SheetDateLookup(fitness, ColumnsMapper(["Date", "Steps"]))
+
+    first_day = (start + timedelta(days=500)).isoformat()
+    last_day = (start + timedelta(days=502)).isoformat()
+    steps = lookup.steps([first_day, last_day, "2010-01-01"])
+
+    assert steps == {first_day: 1500, last_day: 1502}
+    assert fitness.block_reads == 1
+    assert fitness.rows_read == 2 * 6  # Date and Steps of the 3 days 2 rows each
+    # two binary searches for each of the two groups of close dates, 2010 is not in the sheet
+    assert fitness.cell_reads <= 2 * 2 * (len(rows) + 10).bit_length()
+    assert lookup.requests == fitness.cell_reads + fitness.block_reads
+
+
+def test_sheet_date_lookup_newer_than_sheet():
+    fitness = SortedSheetMock([("2022-02-16", 10), ("2022-02-15", 20)] * 500)
+    lookup = SheetDateLookup(fitness, ColumnsMapper(["Date", "Steps"]))
+    assert lookup.steps(["2022-02-17", "2022-02-18"]) == {}
+    assert fitness.cell_reads == 1
+    assert fitness.block_reads == 0
+
+    # the inserted rows are known without reading
+    inserted = [["2022-02-17", "=100"], ["2022-02-17", ""]]
+    fitness.rows = [tuple(row) for row in inserted] + fitness.rows
+    lookup.rows_inserted(inserted)  # like gspread, the mock does not update row_count
+    assert lookup.steps(["2022-02-18"]) == {}
+    assert fitness.cell_reads == 1
+    assert lookup.steps(["2022-02-15"]) == {"2022-02-15": 20}  # the bottom row is still found
+
+
+def test_sheet_date_lookup_far_dates():
+    start = date(2020, 1, 1)
+    rows = [((start + timedelta(days=day_num)).isoformat(), day_num) for day_num in range(1000)]
+    fitness = SortedSheetMock(rows[::-1])
+    lookup = SheetDateLookup(fitness, ColumnsMapper(["Date", "Steps"]))
+    days = [rows[10][0], rows[12][0], rows[900][0], rows[903][0]]
+    assert lookup.steps(days) == {rows[idx][0]: idx for idx in (10, 12, 900, 903)}
+    assert fitness.block_reads == 1
+    assert fitness.rows_read == 2 * (3 + 4)  # two blocks of the close dates, not the sheet
+
+
+def test_sheet_date_lookup_not_sorted():
+    fitness = SortedSheetMock([("2022-02-18", 10), ("not a date", 20)])
+    lookup = SheetDateLookup(fitness, ColumnsMapper(["Date", "Steps"]))
+    with patch("garmin_daily.google_sheet.fitness_df") as mock_fitness_df:
+        mock_fitness_df.return_value = pd.DataFrame(
+            [(100, "2022-02-16"), (200, "2022-02-17")],
+            columns=["Steps", "Date"],
+        ).set_index("Date", inplace=False)
+        assert lookup.steps(["2022-02-17"]) == {"2022-02-17": 200}
+
+
 def test_location_mapper():
     # Test basic location mapping
     mapper = LocationMapper([("running", "Park"), ("cycling", "Track")], "Default Gym")
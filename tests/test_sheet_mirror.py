@@ -0,0 +1,198 @@
+import json
+import time
+from datetime import UTC, date, datetime, timedelta
+from unittest.mock import MagicMock
+
+from gspread.utils import a1_to_rowcol
+
+from garmin_daily.columns_mapper import ColumnsMapper
+from garmin_daily.sheet_mirror import CLOCK_SKEW, SheetMirror, modified_timestamp
+
+HEADER = ["Date", "Sport", "Steps"]
+
+
+class WorksheetMock:
+    """Worksheet with rows inserted at the top like add_rows_from_garmin does."""
+
+    def __init__(self, rows):
+        self.id = 0
+        self.title = "fitness"
+        self.header = list(HEADER)
+        self.rows = rows
+        self.modified = time.time() - 60
+        self.reads = 0
+        self.spreadsheet = MagicMock()
+        self.spreadsheet.id = "key"
+        self.spreadsheet.title = "sheet"
+        self.spreadsheet.get_lastUpdateTime = lambda: (
+            datetime.fromtimestamp(self.modified, UTC).isoformat(timespec="milliseconds")[:-6] + "Z"
+        )
+
+    def touch(self, at=None):
+        """Change the modified time like Drive does on any change."""
+        self.modified = max(time.time() if at is None else at, self.modified + 0.001)
+
+    def insert_top(self, rows):
+        self.rows = rows + self.rows
+        self.touch()
+
+    def batch_get(self, ranges, **kwargs):
+        self.reads += 1
+        result = []
+        for range_name in ranges:
+            first, last = range_name.split(":")
+            first_row, _ = a1_to_rowcol(first)
+            if first_row == 1:
+                result.append([self.header])
+                continue
+            last_row = a1_to_rowcol(last)[0] if last[-1].isdigit() else len(self.rows) + 1
+            result.append(self.rows[first_row - 2 : last_row - 1])
+        return result
+
+
+def mirrored_rows(mirror):
+    rows = mirror.db.execute("SELECT cells FROM rows ORDER BY seq DESC").fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def make_rows(days_num, start=date(2020, 1, 1)):
+    rows = []
+    for day_num in reversed(range(days_num)):
+        day = (start + timedelta(days=day_num)).isoformat()
+        rows.append([day, "Walking", 1000 + day_num])
+        rows.append([day, "Gym", ""])
+    return rows
+
+
+def test_mirror_full_load_and_no_reads_if_not_modified(tmp_path):
+    fitness = WorksheetMock(make_rows(200))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+    assert mirrored_rows(mirror) == fitness.rows
+
+    reads = fitness.reads
+    mirror.sync()
+    assert fitness.reads == reads
+
+    # reopen existing mirror
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+    assert fitness.reads == reads
+
+
+def test_mirror_write_through(tmp_path):
+    fitness = WorksheetMock(make_rows(200))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+
+    # we insert locale strings and formulas, the mirror keeps the values as the sheet shows them
+    new_rows = [["2021-01-01", "Walking", "=5000-1000"], ["2021-01-01", "Running", "=0*0,0007"]]
+    mirror.before_insert()
+    fitness.insert_top([["2021-01-01", "Walking", 4000], ["2021-01-01", "Running", 0]])
+    mirror.rows_inserted(new_rows)
+    reads = fitness.reads
+
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    assert mirror.steps(["2021-01-01"]) == {"2021-01-01": 4000}
+    assert fitness.reads == reads
+    assert mirrored_rows(mirror) == fitness.rows
+
+
+def test_mirror_no_write_through_if_not_synced(tmp_path):
+    fitness = WorksheetMock(make_rows(10))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+
+    fitness.rows[0][2] = 12345  # edit before our insert
+    fitness.touch()
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    fitness.insert_top([["2021-01-01", "Walking", 4000]])
+    mirror.rows_inserted([["2021-01-01", "Walking", "=4000"]])
+    mirror.sync()
+    assert mirrored_rows(mirror) == fitness.rows
+
+
+def test_mirror_no_write_through_if_edited_after_sync(tmp_path):
+    fitness = WorksheetMock(make_rows(10))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+
+    fitness.rows[4][2] = 12345  # edit after the sync and before our insert
+    fitness.touch()
+    mirror.before_insert()
+    fitness.insert_top([["2021-01-01", "Walking", 4000]])
+    mirror.rows_inserted([["2021-01-01", "Walking", "=4000"]])
+    assert mirror.steps([fitness.rows[5][0]]) == {fitness.rows[5][0]: 12345}
+    assert mirrored_rows(mirror) == fitness.rows
+
+
+def test_mirror_no_write_through_if_edited_after_insert(tmp_path):
+    fitness = WorksheetMock(make_rows(10))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+
+    mirror.before_insert()
+    fitness.insert_top([["2021-01-01", "Walking", 4000]])
+    fitness.rows[5][2] = 12345  # edit after our insert, before we read the modified time
+    fitness.touch(time.time() + CLOCK_SKEW + 60)
+    reads = fitness.reads
+    mirror.rows_inserted([["2021-01-01", "Walking", "=4000"]])
+    assert fitness.reads == reads  # no write-through
+    assert mirror.steps([fitness.rows[5][0]]) == {fitness.rows[5][0]: 12345}  # reloaded
+    assert mirrored_rows(mirror) == fitness.rows
+
+
+def test_modified_timestamp():
+    assert modified_timestamp("2024-05-01T10:20:30.123Z") == (
+        datetime(2024, 5, 1, 10, 20, 30, 123000, tzinfo=UTC).timestamp()
+    )
+    assert modified_timestamp("yesterday") == float("inf")
+
+
+def test_mirror_edit_below_top(tmp_path):
+    fitness = WorksheetMock(make_rows(200))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+
+    row = fitness.rows[300]
+    fitness.rows[300] = [row[0], "Walking", 77777]
+    fitness.touch()
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    assert mirror.steps([row[0]]) == {row[0]: 77777}
+
+
+def test_mirror_reload_on_edit(tmp_path):
+    fitness = WorksheetMock(make_rows(10))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+
+    fitness.rows[3] = [fitness.rows[3][0], "Walking", 12345]
+    fitness.touch()
+    mirror.sync()
+    assert mirrored_rows(mirror) == fitness.rows
+
+    fitness.header = ["Date", "Steps", "Sport"]
+    fitness.touch()
+    mirror.sync()
+    assert mirror.meta("header") == '["Date", "Steps", "Sport"]'
+
+
+def test_mirror_queries(tmp_path):
+    fitness = WorksheetMock(make_rows(10))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    mirror.sync()
+
+    assert mirror.steps(["2020-01-02", "2020-01-05", "2010-01-01"]) == {
+        "2020-01-02": 1001,
+        "2020-01-05": 1004,
+    }
+
+
+def test_mirror_lazy_sync(tmp_path):
+    fitness = WorksheetMock(make_rows(10))
+    mirror = SheetMirror(fitness, ColumnsMapper(HEADER), tmp_path / "mirror.sqlite")
+    assert fitness.reads == 0
+    assert mirror.steps(["2020-01-02"]) == {"2020-01-02": 1001}
+    reads = fitness.reads
+    mirror.steps(["2020-01-03"])
+    assert fitness.reads == reads
@@ -0,0 +1,190 @@
+import csv
+import datetime
+import sqlite3
+from unittest import mock
+
+import pyarrow.parquet as pq
+import pytest
+from click.testing import CliRunner
+from freezegun import freeze_time
+
+from garmin_daily import Activity
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper, GarminCol
+from garmin_daily.google_sheet import GoogleSheetSink, create_day_rows
+from garmin_daily.main import DAY_TO_ADD_WITHOUT_FORCE, main
+from garmin_daily.mappers import ActivityMapper, LocationMapper
+from garmin_daily.number_formatter import NumberFormatter
+from garmin_daily.sinks import CsvSink, SqliteSink, open_sink
+
+
+def make_row(day, steps=1000, distance=0.85):
+    values = ["" for _ in GarminCol]
+    values[GarminCol.DATE] = day
+    values[GarminCol.SPORT] = "Walking"
+    values[GarminCol.STEPS] = steps
+    values[GarminCol.DISTANCE] = distance
+    return ColumnsMapper(DEFAULT_HEADER).row(values)
+
+
+@pytest.mark.parametrize("file_name", ["fitness.csv", "fitness.sqlite", "fitness.parquet"])
+def test_file_sink_write_and_last_date(tmp_path, file_name):
+    path = tmp_path / file_name
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    with open_sink(path, columns, DEFAULT_HEADER) as sink:
+        assert sink.last_date() is None
+        sink.write_rows([make_row("2023-01-01"), make_row("2023-01-01", steps="", distance="")])
+        sink.write_rows([make_row("2023-01-02")])
+        assert sink.last_date() == datetime.date(2023, 1, 2)
+        assert sink.rows_written == 3
+    with open_sink(path, columns, DEFAULT_HEADER) as sink:
+        assert sink.last_date() == datetime.date(2023, 1, 2)
+        sink.write_rows([make_row("2023-01-03")])
+    with open_sink(path, columns, DEFAULT_HEADER) as sink:
+        assert sink.last_date() == datetime.date(2023, 1, 3)
+
+
+def test_parquet_sink_append_mixed_numbers(tmp_path):
+    path = tmp_path / "fitness.parquet"
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    walking = make_row("2023-01-01")
+    walking[columns.idx(GarminCol.HOURS)] = 0
+    with open_sink(path, columns, DEFAULT_HEADER) as sink:
+        sink.write_rows([walking])
+    gym = make_row("2023-01-02", steps="", distance="")
+    gym[columns.idx(GarminCol.HOURS)] = 0.5
+    with open_sink(path, columns, DEFAULT_HEADER) as sink:
+        sink.write_rows([gym])
+    table = pq.read_table(path)
+    assert table.column("hours").to_pylist() == [0.0, 0.5]
+    assert table.column("steps").to_pylist() == [1000, None]
+
+
+def test_sqlite_sink_typed_values(tmp_path):
+    path = tmp_path / "fitness.db"
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    with open_sink(path, columns, DEFAULT_HEADER) as sink:
+        assert isinstance(sink, SqliteSink)
+        sink.write_rows([make_row("2023-01-01"), make_row("2023-01-01", steps="", distance="")])
+    rows = sqlite3.connect(path).execute("SELECT date, steps, distance FROM fitness").fetchall()
+    assert rows == [("2023-01-01", 1000, 0.85), ("2023-01-01", None, None)]
+
+
+def test_csv_sink_header(tmp_path):
+    path = tmp_path / "fitness.csv"
+    with open_sink(path, ColumnsMapper(DEFAULT_HEADER), DEFAULT_HEADER) as sink:
+        assert isinstance(sink, CsvSink)
+        sink.write_rows([make_row("2023-01-01")])
+    with path.open(newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert rows[0] == DEFAULT_HEADER
+    assert rows[1][:3] == ["2023-01-01", "0.85", "1000"]
+
+
+def test_open_sink_unknown_type(tmp_path):
+    with pytest.raises(ValueError, match="Unknown output file type"):
+        open_sink(tmp_path / "fitness.xlsx", ColumnsMapper(DEFAULT_HEADER), DEFAULT_HEADER)
+
+
+def test_google_sheet_sink():
+    fitness = mock.MagicMock()
+    fitness.spreadsheet.locale = "ru_RU"
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    sink = GoogleSheetSink(fitness, columns)
+    with mock.patch("garmin_daily.google_sheet.search_missed_steps_in_sheet") as mock_search:
+        sink.write_rows([make_row("2023-01-01", steps="=1000")])
+    rows = fitness.insert_rows.call_args[0][0]
+    assert rows[0][:3] == ["2023-01-01", "0,85", "=1000"]
+    mock_search.assert_called_once_with(fitness, rows, columns, sink.steps_lookup)
+
+
+def test_google_sheet_sink_writes_through_to_lookup():
+    fitness = mock.MagicMock()
+    fitness.spreadsheet.locale = "en_US"
+    lookup = mock.MagicMock()
+    sink = GoogleSheetSink(fitness, ColumnsMapper(DEFAULT_HEADER), lookup)
+    with mock.patch("garmin_daily.google_sheet.search_missed_steps_in_sheet"):
+        sink.write_rows([make_row("2023-01-01", steps="=1000")])
+    lookup.before_insert.assert_called_once()
+    lookup.rows_inserted.assert_called_once_with(fitness.insert_rows.call_args[0][0])
+
+
+def test_create_day_rows_typed():
+    day = datetime.date(2023, 1, 2)
+    garmin_day = mock.MagicMock()
+    garmin_day.activities = [
+        Activity(
+            activity_type="Walking",
+            sport="Walking",
+            steps=10000,
+            non_walking_steps=2000,
+            location_name="Novi Sad",
+        ),
+        Activity(activity_type="running", sport="Running", steps=3000, location_name="Park"),
+    ]
+    garmin_day.hr_rest = 50
+    garmin_day.sleep_time = 7.5
+    garmin_day.vo2max = 45.0
+    daily = mock.MagicMock()
+    daily.__getitem__ = mock.MagicMock(return_value=garmin_day)
+    kwargs = {
+        "daily": daily,
+        "day": day,
+        "gym_duration": 30,
+        "gym_days": [],
+        "location_mapper": LocationMapper([], None),
+        "activity_mapper": ActivityMapper([]),
+    }
+
+    walking, running = create_day_rows(**kwargs)
+    assert walking[GarminCol.STEPS] == "=10000-2000"
+    assert walking[GarminCol.DISTANCE] == "=(10000-2000)*0.00085"
+    assert running[GarminCol.DISTANCE] == "=(3000-0)*0.00089"
+
+    walking, _ = create_day_rows(**kwargs, formatter=NumberFormatter.from_locale("de_DE"))
+    assert walking[GarminCol.DISTANCE] == "=(10000-2000)*0,00085"
+
+    walking, running = create_day_rows(**kwargs, formulas=False)
+    assert walking[GarminCol.STEPS] == 8000
+    assert walking[GarminCol.DISTANCE] == 6.8
+    assert running[GarminCol.STEPS] == ""
+    assert running[GarminCol.DISTANCE] == 2.67
+
+
+@freeze_time("2023-01-10")
+def test_main_output_file(tmp_path):
+    path = tmp_path / "fitness.csv"
+    with (
+        mock.patch("garmin_daily.google_sheet.open_google_sheet") as mocked_open_google_sheet,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+    ):
+        result = CliRunner().invoke(main, ["--output", str(path)], catch_exceptions=False)
+    assert result.exit_code == 0, result.output
+    mocked_open_google_sheet.assert_not_called()
+    kwargs = mocked_add_rows_from_garmin.call_args.kwargs
+    assert kwargs["fitness"] is None
+    assert isinstance(kwargs["sink"], CsvSink)
+    assert kwargs["days_to_add"] == DAY_TO_ADD_WITHOUT_FORCE
+    assert kwargs["start_date"] == datetime.date(2023, 1, 10) - datetime.timedelta(
+        days=DAY_TO_ADD_WITHOUT_FORCE
+    )
+
+
+def test_main_output_unknown_type(tmp_path):
+    result = CliRunner().invoke(main, ["--output", str(tmp_path / "fitness.txt")])
+    assert result.exit_code == 1
+    assert "Unknown output file type" in result.output
+
+
+@freeze_time("2023-01-10")
+@pytest.mark.parametrize("last_day", ["2022-01-01", "2023-01-09"])
+def test_main_output_closed_without_adding(tmp_path, last_day):
+    path = tmp_path / "fitness.sqlite"
+    with open_sink(path, ColumnsMapper(DEFAULT_HEADER), DEFAULT_HEADER) as sink:
+        sink.write_rows([make_row(last_day)])
+    with (
+        mock.patch.object(SqliteSink, "close", autospec=True) as mocked_close,
+        mock.patch("garmin_daily.google_sheet.add_rows_from_garmin") as mocked_add_rows_from_garmin,
+    ):
+        CliRunner().invoke(main, ["--output", str(path)], catch_exceptions=False)
+    mocked_add_rows_from_garmin.assert_not_called()
+    mocked_close.assert_called_once()
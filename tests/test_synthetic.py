@@ -0,0 +1,109 @@
+import datetime
+from collections import Counter
+
+import pytest
+from click.testing import CliRunner
+
+from garmin_daily import GarminDaily
+from garmin_daily.day_store import STORE_FILE, DayStore
+from garmin_daily.garmin_aggregations import ReplayApi
+from garmin_daily.synthetic import DatasetGenerator, main, parse_sport_mix
+
+FIRST_DAY = datetime.date(2023, 1, 1)
+
+
+def test_generator_is_reproducible():
+    days = list(DatasetGenerator(seed=7).days(FIRST_DAY, 10))
+    assert [day.to_dict() for day in days] == [
+        day.to_dict() for day in DatasetGenerator(seed=7).days(FIRST_DAY, 10)
+    ]
+    # any day can be generated alone
+    assert DatasetGenerator(seed=7).day(days[5].day) == days[5]
+    assert DatasetGenerator(seed=8).day(days[5].day) != days[5]
+
+
+def test_generated_days_aggregate():
+    days = list(DatasetGenerator(activities_per_day=3, missing_rate=0).days(FIRST_DAY, 5))
+    api = ReplayApi(*days)
+    activities = api.get_activities_by_date("2023-01-01", "2023-01-05")
+    assert len(activities) == sum(len(day.activities) for day in days) > 0
+    assert len({activity["activityId"] for activity in activities}) == len(activities)
+    for responses in days:
+        assert len(responses.steps) == 96
+        assert len(responses.heart_rates["heartRateValues"]) == 24 * 30
+        garmin_day = GarminDaily.aggregate(responses)
+        assert garmin_day.total_steps > 0
+        assert garmin_day.hr_rest
+        assert garmin_day.sleep_time
+        assert garmin_day.vo2max
+        assert "Walking" in [activity.sport for activity in garmin_day.activities]
+
+
+def test_generator_missing_data():
+    for responses in DatasetGenerator(missing_rate=1).days(FIRST_DAY, 3):
+        assert responses.steps == []
+        assert responses.heart_rates["heartRateValues"] is None
+        assert responses.sleep["dailySleepDTO"]["sleepTimeSeconds"] is None
+        assert responses.training_status is None
+        garmin_day = GarminDaily.aggregate(responses)
+        assert garmin_day.total_steps == 0
+        assert garmin_day.sleep_time is None
+        assert garmin_day.vo2max == 0.0
+
+
+def test_generator_sport_mix():
+    generator = DatasetGenerator(sport_mix={"running": 1, "yoga": 0}, activities_per_day=2)
+    sports = Counter(
+        activity["activityType"]["typeKey"]
+        for responses in generator.days(FIRST_DAY, 30)
+        for activity in responses.activities
+    )
+    assert set(sports) == {"running"}
+    assert 30 < sports["running"] < 90
+    assert not any(
+        responses.activities
+        for responses in DatasetGenerator(activities_per_day=0).days(FIRST_DAY, 10)
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"sport_mix": {"curling": 1}},
+        {"sport_mix": {"yoga": 0}},
+        {"activities_per_day": -1},
+        {"missing_rate": 2},
+    ],
+)
+def test_generator_wrong_config(kwargs):
+    with pytest.raises(ValueError):
+        DatasetGenerator(**kwargs)
+
+
+def test_parse_sport_mix():
+    assert parse_sport_mix(["cycling=3", "yoga"]) == {"cycling": 3, "yoga": 1}
+    with pytest.raises(ValueError, match="sport=weight"):
+        parse_sport_mix(["cycling=often"])
+
+
+def test_main_writes_day_store(tmp_path):
+    output = tmp_path / "days"
+    result = CliRunner().invoke(
+        main,
+        [str(output), "--since", "2023-01-01", "--days", "3", "--sport", "cycling=2"],
+        catch_exceptions=False,
+    )
+    assert result.exit_code == 0, result.output
+    with DayStore(path=output / STORE_FILE) as store:
+        assert next(store.responses(FIRST_DAY, FIRST_DAY)) == DatasetGenerator(
+            sport_mix={"cycling": 2},
+        ).day(FIRST_DAY)
+        assert store.response_days(FIRST_DAY, datetime.date(2023, 1, 4)) == {
+            FIRST_DAY + datetime.timedelta(days=day_num) for day_num in range(3)
+        }
+
+
+def test_main_unknown_sport(tmp_path):
+    result = CliRunner().invoke(main, [str(tmp_path), "--sport", "curling=1"])
+    assert result.exit_code == 1
+    assert "Unknown sports ['curling']" in result.output
@@ -0,0 +1,139 @@
+import datetime
+import json
+from unittest import mock
+
+import pytest
+
+from garmin_daily import DayResponses, GarminDaily, tracing
+from garmin_daily.columns_mapper import DEFAULT_HEADER, ColumnsMapper
+from garmin_daily.garmin_aggregations import GARMIN_RESPONSES, call_endpoint
+from garmin_daily.google_sheet import add_rows_from_garmin
+from garmin_daily.mappers import ActivityMapper, LocationMapper
+from garmin_daily.sinks import CsvSink
+
+
+@pytest.fixture
+def trace_path(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    with tracing.configure(path):
+        yield path
+    assert not tracing.tracer.enabled
+
+
+def read_spans(path):
+    spans = []
+    for line in path.read_text(encoding="utf8").splitlines():
+        (resource_spans,) = json.loads(line)["resourceSpans"]
+        (scope_spans,) = resource_spans["scopeSpans"]
+        for span in scope_spans["spans"]:
+            span["attributes"] = {
+                attr["key"]: next(iter(attr["value"].values())) for attr in span["attributes"]
+            }
+            spans.append(span)
+    return spans
+
+
+def test_tracer_disabled():
+    with tracing.span("run") as span:
+        assert span is None
+    assert tracing.start("day") is None
+
+
+def test_tracer_nested_spans(trace_path):
+    with tracing.span("run", days=2) as run_span:
+        with tracing.span("child", ratio=0.5, ok=True):
+            pass
+        with pytest.raises(ValueError), tracing.span("failed"):
+            raise ValueError("-fail-")
+    child, failed, run = read_spans(trace_path)
+    assert run["spanId"] == run_span.span_id
+    assert "parentSpanId" not in run
+    assert run["attributes"] == {"days": "2"}
+    assert child["parentSpanId"] == failed["parentSpanId"] == run["spanId"]
+    assert child["traceId"] == run["traceId"]
+    assert child["attributes"] == {"ratio": 0.5, "ok": True}
+    assert failed["status"] == {"code": 2, "message": "ValueError: -fail-"}
+    assert int(run["endTimeUnixNano"]) >= int(child["endTimeUnixNano"])
+
+
+def test_call_endpoint_span(trace_path):
+    def get_steps_data(date_str):
+        for status in (401, 200):
+            GARMIN_RESPONSES.record(mock.Mock(status_code=status, content=b"[1, 2]"))
+        return [1, 2]
+
+    api = mock.Mock(get_steps_data=get_steps_data)
+    assert call_endpoint(api, "get_steps_data", "2023-01-01") == [1, 2]
+    (span,) = read_spans(trace_path)
+    assert span["name"] == "garmin.get_steps_data"
+    assert span["attributes"] == {
+        "endpoint": "get_steps_data",
+        "day": "2023-01-01",
+        "unauthorized": "1",
+        "response_size": "12",
+    }
+
+
+def test_call_endpoint_page_span(trace_path):
+    api = mock.Mock()
+    api.get_activities.return_value = []
+    call_endpoint(api, "get_activities", 40, 20, page_start=40, page_limit=20)
+    (span,) = read_spans(trace_path)
+    assert span["attributes"] == {
+        "endpoint": "get_activities",
+        "page_start": "40",
+        "page_limit": "20",
+        "unauthorized": "0",
+        "response_size": "0",
+    }
+
+
+def test_add_rows_from_garmin_spans(trace_path, tmp_path):
+    api = mock.Mock()
+    api.get_steps_data.return_value = []
+    api.get_heart_rates.return_value = {
+        "maxHeartRate": 136,
+        "minHeartRate": 42,
+        "restingHeartRate": 68,
+        "heartRateValues": None,
+    }
+    api.get_sleep_data.return_value = {"dailySleepDTO": {"sleepTimeSeconds": None}}
+    api.get_training_status.return_value = None
+    api.get_activities_by_date.return_value = []
+    daily = mock.Mock(aggregate=GarminDaily.aggregate)
+    columns = ColumnsMapper(DEFAULT_HEADER)
+    with mock.patch("garmin_daily.google_sheet.create_day_rows", return_value=[]):
+        add_rows_from_garmin(
+            fitness=None,
+            columns=columns,
+            start_date=datetime.date(2023, 1, 1),
+            days_to_add=2,
+            gym_days=[],
+            gym_duration=30,
+            location_mapper=LocationMapper([], "Gym"),
+            activity_mapper=ActivityMapper([]),
+            sink=CsvSink(tmp_path / "fitness.csv", columns, DEFAULT_HEADER),
+            daily=daily,
+            fetch=lambda day: DayResponses.fetch(api, day),
+        )
+    spans = read_spans(trace_path)
+    by_id = {span["spanId"]: span for span in spans}
+    (run,) = [span for span in spans if span["name"] == "run"]
+    days = [span for span in spans if span["name"] == "day"]
+    assert [day["attributes"]["day"] for day in days] == ["2023-01-01", "2023-01-02"]
+    assert all(day["parentSpanId"] == run["spanId"] for day in days)
+    for day in days:
+        stages = [span["name"] for span in spans if span.get("parentSpanId") == day["spanId"]]
+        assert stages == ["fetch", "aggregate", "rows", "write"]
+    endpoints = [span for span in spans if span["name"].startswith("garmin.")]
+    assert len(endpoints) == 2 * 5
+    for endpoint in endpoints:
+        fetch = by_id[endpoint["parentSpanId"]]
+        assert fetch["name"] == "fetch"
+        assert by_id[fetch["parentSpanId"]]["attributes"]["day"] == endpoint["attributes"]["day"]
+    assert {span["traceId"] for span in spans} == {run["traceId"]}
+
+
+def test_garmin_daily_observes_requests():
+    session = GarminDaily().api.client._fresh_api_session()
+    assert GARMIN_RESPONSES.record in session.hooks["response"]